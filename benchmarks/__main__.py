@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer import ifo
+from dvd_remuxer.disc import Cell, Title
+from dvd_remuxer.dvdremux import DVDRemuxer
+from dvd_remuxer.lsdvd import lsdvd
+from dvd_remuxer.options import create_argparser
+from dvd_remuxer.remux_service import RemuxService
+from dvd_remuxer.vobcopy import VobCopier
+from dvd_remuxer.vobsub import VobSubDemuxer, VobSubWriter
+
+from . import discgen, fixtures
+
+RESULTS_VERSION = 1
+
+benchmarks = []
+
+
+def benchmark(name: str, **params):
+    def register(func):
+        benchmarks.append((name, func, params))
+        return func
+
+    return register
+
+
+def create_remuxer(dvd_info: lsdvd, outdir: Path, **options) -> DVDRemuxer:
+    return DVDRemuxer(
+        str(outdir),
+        lsdvd=dvd_info,
+        use_sys_tmp_dir=False,
+        tmp_dir=outdir,
+        file_prefix="BENCH_DVD",
+        **options,
+    )
+
+
+# Every benchmark prepares its fixture in tmp_dir and returns the measured
+# function, the number of processed bytes (or None) and an optional setup
+# function called before each run.
+
+
+@benchmark("lsdvd.get_dvd_info 99 titles x 250 chapters", titles=99, chapters=250)
+@benchmark("lsdvd.get_dvd_info 1 title x 10 chapters", titles=1, chapters=10)
+def bench_lsdvd_get_dvd_info(tmp_dir: Path, scale: float, titles, chapters):
+    output = fixtures.gen_lsdvd_output(
+        fixtures.gen_titles(titles, max(1, int(chapters * scale)))
+    )
+
+    return lambda: lsdvd.get_dvd_info(output), len(output), None
+
+
+@benchmark("lsdvd.from_dict 99 titles x 250 chapters", titles=99, chapters=250)
+def bench_lsdvd_from_dict(tmp_dir: Path, scale: float, titles, chapters):
+    output = fixtures.gen_lsdvd_output(
+        fixtures.gen_titles(titles, max(1, int(chapters * scale)))
+    )
+    data_dict = lsdvd.get_dvd_info(output)
+
+    return lambda: lsdvd.from_dict(data_dict), None, None
+
+
+@benchmark("ifo.read 99 titles x 250 chapters", titles=99, chapters=250)
+def bench_ifo_read(tmp_dir: Path, scale: float, titles, chapters):
+    discgen.create_ifo_tree(
+        tmp_dir, fixtures.gen_titles(titles, max(1, int(chapters * scale)))
+    )
+    size = sum(file.stat().st_size for file in (tmp_dir / "VIDEO_TS").iterdir())
+
+    return lambda: ifo.read(str(tmp_dir)), size, None
+
+
+@benchmark("DVDRemuxer.gen_chapters 500 chapters", chapters=500)
+def bench_gen_chapters(tmp_dir: Path, scale: float, chapters):
+    dvd_info = lsdvd.from_dict(
+        lsdvd.get_dvd_info(
+            fixtures.gen_lsdvd_output(
+                fixtures.gen_titles(1, max(1, int(chapters * scale)))
+            )
+        )
+    )
+    remuxer = create_remuxer(dvd_info, tmp_dir)
+
+    return lambda: remuxer.gen_chapters(1), None, None
+
+
+@benchmark("DVDRemuxer.gen_mkvmerge_cmd 8 audio x 32 subtitles", audio=8, subp=32)
+def bench_gen_mkvmerge_cmd(tmp_dir: Path, scale: float, audio, subp):
+    titles = fixtures.gen_titles(1, 10, audio, subp)
+    dvd_info = lsdvd.from_dict(
+        lsdvd.get_dvd_info(fixtures.gen_lsdvd_output(titles))
+    )
+    remuxer = create_remuxer(dvd_info, tmp_dir)
+    audio_params = [[i + 1, code] for i, code in enumerate(titles[0]["audio"])]
+    subs_params = [[i + 1, code] for i, code in enumerate(titles[0]["subp"])]
+
+    return (
+        lambda: remuxer.gen_mkvmerge_cmd(1, audio_params, subs_params, tmp_dir),
+        None,
+        None,
+    )
+
+
+@benchmark("DVDRemuxer._fix_vobsub_file_content 20000 entries", entries=20000)
+def bench_fix_vobsub_file_content(tmp_dir: Path, scale: float, entries):
+    content = fixtures.gen_vobsub_idx(max(1, int(entries * scale)))
+    idx_file = tmp_dir / "BENCH_DVD_1_vobsub_1_en.idx"
+    remuxer = create_remuxer(None, tmp_dir)
+
+    return (
+        lambda: remuxer._fix_vobsub_file_content(idx_file, "en"),
+        len(content),
+        lambda: idx_file.write_text(content),
+    )
+
+
+@benchmark("VobSubDemuxer.demux 64 MiB, 4 subtitles", mib=64, subp=4)
+def bench_vobsub_demux(tmp_dir: Path, scale: float, mib, subp):
+    sectors = max(1, int(mib * scale)) * 512
+    vob_file = tmp_dir / "BENCH_DVD_1_video.vob"
+    vob_file.write_bytes(fixtures.gen_vob(sectors, subp))
+
+    def run():
+        writers = {
+            0x20 + i: VobSubWriter(
+                tmp_dir / ("sub_%i.idx" % (i)),
+                tmp_dir / ("sub_%i.sub" % (i)),
+                "en",
+                i,
+            )
+            for i in range(subp)
+        }
+        VobSubDemuxer(writers).demux(vob_file)
+
+    return run, vob_file.stat().st_size, None
+
+
+@benchmark("VobCopier.copy 256 MiB", mib=256)
+def bench_vob_copy(tmp_dir: Path, scale: float, mib):
+    sectors = max(1, int(mib * scale)) * 512
+    video_ts = discgen.create_ifo_tree(tmp_dir, fixtures.gen_titles(1, 1))
+
+    # not a sparse file, the data has to be read
+    with (video_ts / "VTS_01_1.VOB").open(mode="wb") as f:
+        for i in range(sectors // 512):
+            f.write(bytes(range(256)) * 4096)
+
+    source = ifo.open_video_ts(str(tmp_dir))
+    title = Title(
+        1, 1.0, vts=1, cell=[Cell(1, 1.0, first_sector=0, last_sector=sectors - 1)]
+    )
+    copier = VobCopier(source, title)
+    outfile = tmp_dir / "BENCH_DVD_1_video.vob"
+
+    return lambda: copier.copy(outfile), copier.size, None
+
+
+@benchmark("dry run remux 99 titles x 20 chapters", titles=99, chapters=20)
+def bench_dry_run_remux(tmp_dir: Path, scale: float, titles, chapters):
+    discgen.create_ifo_tree(
+        tmp_dir, fixtures.gen_titles(max(1, int(titles * scale)), chapters)
+    )
+    args = create_argparser().parse_args(
+        [str(tmp_dir), "--dry-run", "--all", "--no-cache"]
+    )
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            RemuxService(lsdvd, DVDRemuxer, args).run()
+
+    return run, None, None
+
+
+def run_benchmark(run, size: int, setup, repeat: int) -> dict:
+    times = []
+
+    for i in range(repeat):
+        if setup:
+            setup()
+
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    result = {
+        "repeat": repeat,
+        "min_seconds": round(min(times), 6),
+        "median_seconds": round(statistics.median(times), 6),
+    }
+
+    if size is not None:
+        result["bytes"] = size
+        result["mib_per_second"] = round(size / 1048576 / max(min(times), 1e-9), 3)
+
+    return result
+
+
+def run_benchmarks(name_filter: str = None, repeat: int = 5, scale=1.0) -> dict:
+    results = {}
+
+    for name, func, params in benchmarks:
+        if name_filter and name_filter not in name:
+            continue
+
+        cwd = os.getcwd()
+
+        with TemporaryDirectory(prefix="dvdremux_bench_") as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                run, size, setup = func(Path(tmp_dir), scale, **params)
+                results[name] = run_benchmark(run, size, setup, repeat)
+            finally:
+                os.chdir(cwd)
+
+        results[name]["params"] = params
+        print(format_result(name, results[name]))
+
+    return results
+
+
+def format_result(name: str, result: dict) -> str:
+    line = "%-55s %10.3f ms" % (name, result["min_seconds"] * 1000)
+
+    if "mib_per_second" in result:
+        line += " %10.1f MiB/s" % (result["mib_per_second"])
+
+    return line
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare_results(results: dict, baseline: dict, max_slowdown: float) -> list:
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = result["min_seconds"] / max(baseline[name]["min_seconds"], 1e-9)
+        change = (ratio - 1) * 100
+        print("%-55s %+9.1f %%" % (name, change))
+
+        if max_slowdown is not None and change > max_slowdown:
+            regressions.append(name)
+
+    return regressions
+
+
+def create_argparser_bench() -> argparse.ArgumentParser:
+    argparser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="dvd-remuxer benchmarks"
+    )
+
+    argparser.add_argument("--output", metavar="FILE", help="write results to FILE")
+    argparser.add_argument(
+        "--compare", metavar="FILE", help="compare with results from FILE"
+    )
+    argparser.add_argument(
+        "--max-slowdown",
+        metavar="PERCENT",
+        type=float,
+        help="exit with code 1 if a benchmark is slower than in --compare FILE",
+    )
+    argparser.add_argument("--filter", help="run benchmarks with the text in name")
+    argparser.add_argument("--repeat", type=int, default=5)
+    argparser.add_argument(
+        "--quick", action="store_true", help="use small fixtures, for a smoke test"
+    )
+
+    return argparser
+
+
+def main(argv: list = None) -> int:
+    args = create_argparser_bench().parse_args(argv)
+
+    results = run_benchmarks(args.filter, args.repeat, 0.05 if args.quick else 1.0)
+
+    data = {
+        "version": RESULTS_VERSION,
+        "commit": get_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, mode="w") as f:
+            json.dump(data, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, mode="r") as f:
+            baseline = json.load(f)
+
+        print("\nchange of min time against %s" % (baseline.get("commit")))
+        if compare_results(results, baseline["results"], args.max_slowdown):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
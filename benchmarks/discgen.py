@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+# Builders for synthetic DVD structures: IFO files and MPEG-2 program stream
+# packs. Shared by the test suite, the benchmarks and the stub tools.
+
+from __future__ import annotations
+
+from pathlib import Path
+
+SECTOR_SIZE = 2048
+
+
+def encode_dvdtime(seconds: float) -> bytes:
+    whole = int(seconds)
+    fraction = seconds - whole
+
+    fps, fps_bits = 25, 0x40
+    if abs(round(fraction * fps) / fps - fraction) > 1e-6:
+        fps, fps_bits = 29.97, 0xC0
+
+    frames = int(round(fraction * fps))
+
+    return bytes(
+        [
+            int_to_bcd(whole // 3600),
+            int_to_bcd(whole // 60 % 60),
+            int_to_bcd(whole % 60),
+            fps_bits | int_to_bcd(frames),
+        ]
+    )
+
+
+def int_to_bcd(number: int) -> int:
+    return (number // 10) << 4 | number % 10
+
+
+def u16(number: int) -> bytes:
+    return number.to_bytes(2, "big")
+
+
+def u32(number: int) -> bytes:
+    return number.to_bytes(4, "big")
+
+
+def pad(data: bytes, size: int) -> bytes:
+    return data + b"\x00" * (size - len(data))
+
+
+def pad_to_sectors(data: bytes) -> bytes:
+    return pad(data, -(-len(data) // SECTOR_SIZE) * SECTOR_SIZE or SECTOR_SIZE)
+
+
+def build_vmg_ifo(titles: list) -> bytes:
+    header = pad(b"DVDVIDEO-VMG", 0xC4) + u32(1)
+
+    tt_srpt = u16(len(titles)) + u16(0) + u32(8 + len(titles) * 12 - 1)
+    for i, title in enumerate(titles):
+        tt_srpt += bytes([0x3C, 1]) + u16(1) + u16(0) + bytes([1, i + 1]) + u32(0)
+
+    return pad_to_sectors(header) + pad_to_sectors(tt_srpt)
+
+
+def build_pgc(title: dict, first_sector: int) -> bytes:
+    chapters = title["chapters"]
+
+    pgc = u16(0) + bytes([len(chapters), len(chapters)])
+    pgc += encode_dvdtime(title["length"]) + u32(0)
+
+    audio_control = b""
+    for i in range(8):
+        audio_control += u16(0x8000 | i << 8 if i < len(title["audio"]) else 0)
+    pgc += audio_control
+
+    subp_control = b""
+    for i in range(32):
+        if i < len(title["subp"]):
+            subp_control += u32(0x80000000 | i << 24 | i << 16)
+        else:
+            subp_control += u32(0)
+    pgc += subp_control
+
+    pgc = pad(pgc, 0xA4) + u32(0x108080) * 16
+
+    program_map_offset = 0xEC
+    cell_playback_offset = program_map_offset + len(chapters) + (len(chapters) & 1)
+    cell_position_offset = cell_playback_offset + 24 * len(chapters)
+
+    pgc = pad(pgc, 0xE6)
+    pgc += u16(program_map_offset if chapters else 0)
+    pgc += u16(cell_playback_offset if chapters else 0)
+    pgc += u16(cell_position_offset if chapters else 0)
+
+    pgc += bytes(range(1, len(chapters) + 1))
+    pgc = pad(pgc, cell_playback_offset)
+
+    sector = first_sector
+    for length in chapters:
+        cell_sectors = int(length * 10)
+        pgc += bytes([0, 0, 0, 0]) + encode_dvdtime(length)
+        pgc += u32(sector) + u32(0) + u32(sector) + u32(sector + cell_sectors - 1)
+        sector += cell_sectors
+
+    for i in range(len(chapters)):
+        pgc += u16(1) + bytes([0, i + 1])
+
+    return pgc
+
+
+def build_vts_ifo(titles: list) -> bytes:
+    header = pad(b"DVDVIDEO-VTS", 0xC4) + u32(0) + u32(1) + u32(2)
+    header = pad(header, 0x200) + u16(0x1000)
+
+    audio = max([title["audio"] for title in titles], key=len)
+    header += u16(len(audio))
+    for langcode in audio:
+        header += pad(bytes([0, 0]) + langcode.encode("ascii"), 8)
+
+    subp = max([title["subp"] for title in titles], key=len)
+    header = pad(header, 0x254) + u16(len(subp))
+    for langcode in subp:
+        header += pad(bytes([0, 0]) + langcode.encode("ascii"), 6)
+
+    ptt_srpt = u16(len(titles)) + u16(0) + u32(8 + len(titles) * 8 - 1)
+    for i in range(len(titles)):
+        ptt_srpt += u32(8 + len(titles) * 4 + i * 4)
+    for i in range(len(titles)):
+        ptt_srpt += u16(i + 1) + u16(1)
+
+    pgcs = []
+    sector = 0
+    for title in titles:
+        pgcs.append(build_pgc(title, sector))
+        sector += sum(int(length * 10) for length in title["chapters"])
+
+    pgcit = u16(len(pgcs)) + u16(0)
+    pgc_offset = 8 + len(pgcs) * 8
+    pgcit_body = b""
+    pgcit_table = b""
+    for pgc in pgcs:
+        pgcit_table += u32(0x81000000) + u32(pgc_offset + len(pgcit_body))
+        pgcit_body += pgc
+    pgcit += u32(pgc_offset + len(pgcit_body) - 1) + pgcit_table + pgcit_body
+
+    return pad_to_sectors(header) + pad_to_sectors(ptt_srpt) + pad_to_sectors(pgcit)
+
+
+def create_ifo_tree(path: Path, titles: list) -> Path:
+    video_ts = path / "VIDEO_TS"
+    video_ts.mkdir(parents=True)
+    (video_ts / "VIDEO_TS.IFO").write_bytes(build_vmg_ifo(titles))
+    (video_ts / "VTS_01_0.IFO").write_bytes(build_vts_ifo(titles))
+
+    return video_ts
+
+
+def encode_pts(pts: int) -> bytes:
+    return bytes(
+        [
+            0x21 | ((pts >> 29) & 0x0E),
+            (pts >> 22) & 0xFF,
+            ((pts >> 14) & 0xFE) | 0x01,
+            (pts >> 7) & 0xFF,
+            ((pts << 1) & 0xFE) | 0x01,
+        ]
+    )
+
+
+def pack_header() -> bytes:
+    # MPEG-2 pack header without stuffing, SCR 0
+    return bytes(
+        [0x00, 0x00, 0x01, 0xBA, 0x44, 0, 0x04, 0, 0x04, 0x01, 0x01, 0x89, 0xC3, 0xF8]
+    )
+
+
+def gen_pes(
+    stream_id: int, payload: bytes, pts: int = None, length: int = None
+) -> bytes:
+    # length pads the packet with 0xff to that many bytes
+    header = encode_pts(pts) if pts is not None else b""
+    flags = 0x80 if pts is not None else 0x00
+    body = bytes([0x81, flags, len(header)]) + header + payload
+
+    if length is not None:
+        body += b"\xff" * (length - 6 - len(body))
+
+    return bytes([0x00, 0x00, 0x01, stream_id]) + len(body).to_bytes(2, "big") + body
+
+
+def gen_pack(stream_id: int, pts: int, payload: bytes, substream_id=None) -> bytes:
+    # one sector: a pack header and a PES packet filling the rest
+    header = pack_header()
+
+    if substream_id is not None:
+        payload = bytes([substream_id]) + payload
+
+    return header + gen_pes(stream_id, payload, pts, SECTOR_SIZE - len(header))
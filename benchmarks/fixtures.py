@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import random
+
+from .discgen import SECTOR_SIZE, gen_pack
+
+LANGCODES = ["en", "ru", "fr", "de", "es", "it", "ja", "zh"]
+
+
+def gen_titles(titles: int, chapters: int, audio: int = 2, subp: int = 4) -> list:
+    # the title structure of the discgen IFO builders
+    rnd = random.Random(titles * 1000 + chapters)
+    result = []
+
+    for i in range(titles):
+        chapter_lengths = [round(rnd.uniform(30, 600), 3) for j in range(chapters)]
+        result.append(
+            {
+                "length": round(sum(chapter_lengths), 3),
+                "audio": LANGCODES[:audio],
+                "subp": [LANGCODES[j % len(LANGCODES)] for j in range(subp)],
+                "chapters": chapter_lengths,
+            }
+        )
+
+    return result
+
+
+def gen_lsdvd_output(titles: list) -> str:
+    lines = ["libdvdread: Encrypted DVD support unavailable.", "lsdvd = {"]
+    lines.append("  'device' : '.',")
+    lines.append("  'title' : 'BENCH_DVD',")
+    lines.append("  'track' : [")
+
+    for ix, title in enumerate(titles, start=1):
+        lines.append("    {")
+        lines.append("      'ix' : %i," % (ix))
+        lines.append("      'length' : %.3f," % (title["length"]))
+        lines += gen_lsdvd_streams("audio", title["audio"])
+        lines.append("      'chapter' : [")
+        for chapter_ix, length in enumerate(title["chapters"], start=1):
+            lines.append("        {")
+            lines.append("          'ix' : %i," % (chapter_ix))
+            lines.append("          'length' : %.3f," % (length))
+            lines.append("          'startcell' : %i," % (chapter_ix))
+            lines.append("        },")
+        lines.append("      ],")
+        lines += gen_lsdvd_streams("subp", title["subp"])
+        lines.append("    },")
+
+    lines.append("  ],")
+    lines.append("  'longest_track' : 1,")
+    lines.append("}")
+
+    return "\n".join(lines) + "\n"
+
+
+def gen_lsdvd_streams(name: str, langcodes: list) -> list:
+    lines = ["      '%s' : [" % (name)]
+
+    for ix, langcode in enumerate(langcodes, start=1):
+        lines.append("        {")
+        lines.append("          'ix' : %i," % (ix))
+        lines.append("          'langcode' : '%s'," % (langcode))
+        lines.append("          'streamid' : '0x%x'," % (0x20 + ix - 1))
+        lines.append("        },")
+
+    lines.append("      ],")
+
+    return lines
+
+
+def gen_vob(sectors: int, subp_streams: int = 4, subp_every: int = 50) -> bytes:
+    # video packs with a subpicture pack of every stream each subp_every sectors
+    packs = []
+    payload = bytes(range(256)) * 7
+
+    for sector in range(sectors):
+        pts = 90000 + sector * 300
+
+        if sector % subp_every < subp_streams:
+            substream_id = 0x20 + sector % subp_every
+            packs.append(gen_pack(0xBD, pts, payload[:1024], substream_id))
+        else:
+            packs.append(gen_pack(0xE0, pts, payload))
+
+    return b"".join(packs)
+
+
+def gen_vobsub_idx(entries: int, langcode: str = "") -> str:
+    lines = [
+        "# VobSub index file, v7 (do not modify this line!)",
+        "size: 720x576",
+        "palette: " + ", ".join(["000000"] * 16),
+        "",
+        "langidx: 0",
+        "",
+        "id: %s, index: 0" % (langcode),
+    ]
+
+    for i in range(entries):
+        lines.append(
+            "timestamp: %02i:%02i:%02i:%03i, filepos: %09x"
+            % (i // 3600 % 24, i // 60 % 60, i % 60, i % 1000, i * SECTOR_SIZE)
+        )
+
+    return "\n".join(lines) + "\n"
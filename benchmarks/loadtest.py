@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer.dvdremux import DVDRemuxer
+from dvd_remuxer.lsdvd import lsdvd
+from dvd_remuxer.options import create_argparser
+from dvd_remuxer.remux_service import RemuxService
+
+STUBS_DIR = Path(__file__).parent / "stubs"
+
+
+def stub_env(args) -> dict:
+    return {
+        "STUB_TITLES": str(args.titles),
+        "STUB_CHAPTERS": str(args.chapters),
+        "STUB_TITLE_SIZE": str(args.title_size),
+        "STUB_RATE": str(args.rate),
+        "STUB_LATENCY": str(args.latency),
+        "STUB_FAIL_RATE": str(args.fail_rate),
+        "STUB_SEED": str(args.seed),
+    }
+
+
+def run_load_test(args, remux_args: list) -> dict:
+    os.environ.update(stub_env(args))
+
+    with TemporaryDirectory(prefix="dvdremux_load_") as tmp_dir:
+        device = Path(tmp_dir) / "dvd"
+        outdir = Path(tmp_dir) / "out"
+        device.mkdir()
+        outdir.mkdir()
+
+        remux_args = create_argparser().parse_args(
+            [str(device), "--all", "--no-cache", "--tools-dir", str(STUBS_DIR)]
+            + remux_args
+        )
+
+        cwd = os.getcwd()
+        os.chdir(outdir)
+        start = time.monotonic()
+        error = None
+
+        try:
+            RemuxService(lsdvd, DVDRemuxer, remux_args).run()
+        except Exception as inst:
+            error = str(inst)
+        finally:
+            os.chdir(cwd)
+
+        seconds = time.monotonic() - start
+        outputs = list(outdir.glob("*.mkv"))
+        size = sum(file.stat().st_size for file in outputs)
+
+    return {
+        "seconds": round(seconds, 3),
+        "titles": args.titles,
+        "remuxed": len(outputs),
+        "bytes": size,
+        "mib_per_second": round(size / 1048576 / max(seconds, 1e-9), 3),
+        "error": error,
+    }
+
+
+def create_argparser_load() -> argparse.ArgumentParser:
+    argparser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadtest",
+        description="remux a synthetic DVD with stub external tools, the other"
+        + " arguments are passed to dvd-remuxer",
+    )
+
+    argparser.add_argument("--titles", type=int, default=8)
+    argparser.add_argument("--chapters", type=int, default=10)
+    argparser.add_argument(
+        "--title-size", type=float, default=8, help="MiB of video per title"
+    )
+    argparser.add_argument(
+        "--rate", type=float, default=0, help="MiB/s of each tool, 0 is unlimited"
+    )
+    argparser.add_argument(
+        "--latency", type=float, default=0, help="seconds before a tool starts"
+    )
+    argparser.add_argument(
+        "--fail-rate", type=float, default=0, help="probability of a tool failure"
+    )
+    argparser.add_argument("--seed", type=int, default=1)
+
+    return argparser
+
+
+def main(argv: list = None) -> int:
+    args, remux_args = create_argparser_load().parse_known_args(argv)
+
+    result = run_load_test(args, remux_args)
+
+    print(
+        "remuxed %i of %i titles in %.2f s (%.1f MiB/s)"
+        % (
+            result["remuxed"],
+            result["titles"],
+            result["seconds"],
+            result["mib_per_second"],
+        )
+    )
+
+    if result["error"]:
+        print("ERROR: %s" % (result["error"]))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
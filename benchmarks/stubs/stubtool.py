@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+# Stand-ins for lsdvd, mplayer, mencoder and mkvmerge. They accept the argument
+# vectors DVDRemuxer produces and write synthetic output of a realistic size.
+#
+# Environment:
+#   STUB_LATENCY      seconds before a tool starts writing (default: 0)
+#   STUB_RATE         write rate in MiB/s, 0 is unlimited (default: 0)
+#   STUB_TITLE_SIZE   MiB of video per title (default: 8)
+#   STUB_SUB_SIZE     KiB of each subtitle stream (default: 256)
+#   STUB_TITLES       number of titles lsdvd reports (default: 3)
+#   STUB_CHAPTERS     number of chapters per title (default: 10)
+#   STUB_FAIL_RATE    probability that a run fails (default: 0)
+#   STUB_FAIL_TOOLS   comma separated tools that may fail (default: all)
+#   STUB_FAIL_MATCH   fail every run with this text in an argument
+#   STUB_SEED         random seed for the failures
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from benchmarks import fixtures  # noqa: E402
+from benchmarks.discgen import SECTOR_SIZE, gen_pack  # noqa: E402
+
+WRITE_CHUNK_SECTORS = 512
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def get_arg(argv: list, option: str) -> str:
+    if option in argv and argv.index(option) + 1 < len(argv):
+        return argv[argv.index(option) + 1]
+
+    return None
+
+
+def get_title_idx(argv: list) -> int:
+    for arg in argv:
+        if arg.startswith("dvd://"):
+            return int(arg[6:] or 1)
+
+    return 1
+
+
+def should_fail(tool: str, argv: list) -> bool:
+    fail_tools = os.environ.get("STUB_FAIL_TOOLS")
+    if fail_tools and tool not in fail_tools.split(","):
+        return False
+
+    fail_match = os.environ.get("STUB_FAIL_MATCH")
+    if fail_match and any(fail_match in arg for arg in argv):
+        return True
+
+    rate = env_float("STUB_FAIL_RATE", 0)
+    if not rate:
+        return False
+
+    seed = os.environ.get("STUB_SEED")
+    rnd = random.Random("%s %s %s" % (seed, tool, argv)) if seed else random
+    return rnd.random() < rate
+
+
+def write_data(file, size: int, pack: bytes, status=None) -> None:
+    rate = env_float("STUB_RATE", 0) * 1048576
+    chunk = pack * WRITE_CHUNK_SECTORS
+    start = time.monotonic()
+    written = 0
+
+    while written < size:
+        data = chunk[: size - written]
+        file.write(data)
+        written += len(data)
+
+        if status:
+            # the status line is redrawn like the real tools do
+            print(status(written, size), end="\r")
+            sys.stdout.flush()
+
+        if rate:
+            delay = written / rate - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def run_mplayer(argv: list) -> int:
+    outfile = get_arg(argv, "-dumpfile")
+    if not outfile:
+        print("Nothing to do", file=sys.stderr)
+        return 1
+
+    sectors = int(env_float("STUB_TITLE_SIZE", 8) * 512)
+    title_idx = get_title_idx(argv)
+
+    # also works for the named pipe of --stream-mux
+    with open(outfile, mode="wb") as f:
+        write_data(
+            f,
+            sectors * SECTOR_SIZE,
+            gen_pack(0xE0, title_idx, b""),
+            lambda written, size: "dump: %i bytes written (~%.1f%%)"
+            % (written, written * 100 / size),
+        )
+
+    print("\ndump: %i bytes written" % (sectors * SECTOR_SIZE))
+    print("core dumped :)")
+
+    return 0
+
+
+def run_mencoder(argv: list) -> int:
+    vobsubout = get_arg(argv, "-vobsubout")
+    if not vobsubout:
+        return 1
+
+    index = int(get_arg(argv, "-vobsuboutindex") or 0)
+    size = int(env_float("STUB_SUB_SIZE", 256) * 1024) // SECTOR_SIZE * SECTOR_SIZE
+    entries = max(1, size // SECTOR_SIZE)
+
+    with open("%s.sub" % (vobsubout), mode="wb") as f:
+        write_data(
+            f,
+            size,
+            gen_pack(0xBD, index, b"", 0x20 + index),
+            lambda written, size: "Pos: %.1fs %if (%2i%%)"
+            % (written / 1048576, written // SECTOR_SIZE, written * 100 // size),
+        )
+
+    # mencoder leaves the language empty, DVDRemuxer fixes it
+    idx_content = fixtures.gen_vobsub_idx(entries).replace(
+        "index: 0", "index: %i" % (index)
+    )
+    with open("%s.idx" % (vobsubout), mode="w") as f:
+        f.write(idx_content)
+
+    return 0
+
+
+def run_mkvmerge(argv: list) -> int:
+    outfile = get_arg(argv, "--output")
+    if not outfile:
+        return 2
+
+    gui_mode = "--gui-mode" in argv
+    inputs = [
+        arg
+        for i, arg in enumerate(argv)
+        if arg != outfile and argv[i - 1] != "--output" and os.path.exists(arg)
+    ]
+
+    # read the inputs like mkvmerge does, a named pipe is read until EOF
+    size = 0
+    for i, infile in enumerate(inputs):
+        with open(infile, mode="rb") as f:
+            while True:
+                data = f.read(WRITE_CHUNK_SECTORS * SECTOR_SIZE)
+                if not data:
+                    break
+                size += len(data)
+
+        progress = (i + 1) * 100 // len(inputs)
+        if gui_mode:
+            print("#GUI#progress %i%%" % (progress))
+        else:
+            print("Progress: %i%%" % (progress))
+        sys.stdout.flush()
+
+    with open(outfile, mode="wb") as f:
+        write_data(f, size, b"\x1a\x45\xdf\xa3" + b"\x00" * (SECTOR_SIZE - 4))
+
+    return 0
+
+
+def run_lsdvd(argv: list) -> int:
+    titles = fixtures.gen_titles(
+        int(env_float("STUB_TITLES", 3)), int(env_float("STUB_CHAPTERS", 10))
+    )
+    print(fixtures.gen_lsdvd_output(titles), end="")
+
+    return 0
+
+
+TOOLS = {
+    "lsdvd": run_lsdvd,
+    "mplayer": run_mplayer,
+    "mencoder": run_mencoder,
+    "mkvmerge": run_mkvmerge,
+}
+
+
+def main(tool: str) -> None:
+    argv = sys.argv[1:]
+
+    # the version line is read for the output manifests
+    if not argv or argv == ["--version"]:
+        print("%s stub" % (tool))
+        sys.exit(0)
+
+    time.sleep(env_float("STUB_LATENCY", 0))
+
+    if should_fail(tool, argv):
+        print("%s stub: injected failure" % (tool), file=sys.stderr)
+        # mkvmerge uses 2 for errors, the other tools 1
+        sys.exit(2 if tool == "mkvmerge" else 1)
+
+    sys.exit(TOOLS[tool](argv))
@@ -1,14 +1,47 @@
+import signal
 import sys
 
-from .options import parse_args
+from .options import parse_args, parse_batch_args, parse_daemon_args
 from .dvdremux import DVDRemuxer
 from .lsdvd import lsdvd
 from .remux_service import RemuxService
+from .batch import BatchRunner
+from .daemon import RemuxDaemon
+from .plan import execute_plan
 
 
 def main():
+    args = parse_args()
+
+    try:
+        if args.execute_plan:
+            execute_plan(DVDRemuxer, args)
+        else:
+            RemuxService(lsdvd, DVDRemuxer, args).run()
+    except KeyboardInterrupt:
+        sys.exit("\nERROR: Interrupted by user")
+    except Exception as error:
+        sys.exit("\nERROR: %s" % (error))
+
+
+def batch_main():
+    try:
+        summary = BatchRunner(lsdvd, DVDRemuxer, parse_batch_args()).run()
+    except KeyboardInterrupt:
+        sys.exit("\nERROR: Interrupted by user")
+    except Exception as error:
+        sys.exit("\nERROR: %s" % (error))
+
+    if summary["failed"]:
+        sys.exit(1)
+
+
+def daemon_main():
+    daemon = RemuxDaemon(lsdvd, DVDRemuxer, parse_daemon_args())
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+
     try:
-        RemuxService(lsdvd, DVDRemuxer, parse_args()).run()
+        daemon.run()
     except KeyboardInterrupt:
         sys.exit("\nERROR: Interrupted by user")
     except Exception as error:
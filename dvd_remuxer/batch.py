@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import stat
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from .dvdremux import DVDRemuxer
+from .lsdvd import lsdvd
+from .remux_service import RemuxService
+from .staging import StagingPool
+from .trace import Tracer
+
+
+def find_discs(source: str) -> list:
+    path = Path(source)
+
+    if path.is_file() and path.suffix.lower() != ".iso":
+        return read_manifest(path)
+
+    if path.exists():
+        return scan_path(path)
+
+    discs = []
+    for match in sorted(glob.glob(source, recursive=True)):
+        discs += scan_path(Path(match))
+
+    return discs
+
+
+def read_manifest(manifest: Path) -> list:
+    discs = []
+
+    with manifest.open(mode="r") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                discs.append(line)
+
+    return discs
+
+
+def scan_path(path: Path) -> list:
+    if is_disc(path):
+        return [str(path)]
+
+    if not path.is_dir():
+        return []
+
+    discs = []
+    for entry in sorted(path.iterdir()):
+        discs += scan_path(entry)
+
+    return discs
+
+
+def is_disc(path: Path) -> bool:
+    if path.is_file():
+        return path.suffix.lower() == ".iso"
+
+    if path.is_dir():
+        return (path / "VIDEO_TS").is_dir() or (path / "VIDEO_TS.IFO").is_file()
+
+    return False
+
+
+def get_disc_path(disc: str) -> Path:
+    path = Path(disc).resolve()
+
+    if path.name.upper() == "VIDEO_TS":
+        return path.parent
+
+    return path
+
+
+def get_disc_name(disc: str) -> str:
+    return get_disc_path(disc).stem or "dvd"
+
+
+def get_unique_disc_name(disc: str, names: dict) -> str:
+    # names maps the names given so far to their discs, a.iso and a/VIDEO_TS
+    # in other folders get their own output directories
+    path = str(get_disc_path(disc))
+    name = get_disc_name(disc)
+
+    if names.setdefault(name, path) != path:
+        name = "%s-%s" % (name, hashlib.sha1(path.encode()).hexdigest()[:8])
+        names[name] = path
+
+    return name
+
+
+def get_device_key(disc: str) -> int:
+    disc_stat = os.stat(disc)
+
+    # an optical drive is a device by itself
+    if stat.S_ISBLK(disc_stat.st_mode):
+        return disc_stat.st_rdev
+
+    return disc_stat.st_dev
+
+
+class BatchJob:
+    def __init__(self, disc: str, title_idx: int, service: RemuxService, device):
+        self.disc = disc
+        self.title_idx = title_idx
+        self.service = service
+        self.device = device
+        self.status = "pending"
+        self.error = None
+        self.seconds = None
+
+    def run(self) -> None:
+        start = time.monotonic()
+
+        try:
+            self.service._run_title(self.service._create_remuxer(), self.title_idx)
+            self.status = "success"
+        except Exception as inst:
+            self.status = "failed"
+            self.error = str(inst) or inst.__class__.__name__
+        finally:
+            self.seconds = round(time.monotonic() - start, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "disc": self.disc,
+            "title": self.title_idx,
+            "status": self.status,
+            "error": self.error,
+            "seconds": self.seconds,
+        }
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        dvd_info_reader_cls: lsdvd,
+        remuxer_cls: DVDRemuxer,
+        args,
+        service_cls=RemuxService,
+    ):
+        self.dvd_info_reader_cls = dvd_info_reader_cls
+        self.remuxer_cls = remuxer_cls
+        self.service_cls = service_cls
+        self.args = args
+        self.jobs = []
+        # output directory name: disc
+        self.disc_names = {}
+        # one timeline for all discs
+        self.tracer = Tracer(args.trace)
+        # the discs running at the same time reserve temp space against each other
+        self.staging_pool = StagingPool()
+
+    def run(self) -> dict:
+        start = time.monotonic()
+
+        discs = find_discs(self.args.source)
+        if not discs:
+            raise Exception("No discs found in %s" % (self.args.source))
+
+        print("Found %i discs" % (len(discs)))
+
+        for disc in discs:
+            self.jobs += self.create_jobs(disc)
+
+        try:
+            self.run_jobs()
+        finally:
+            self.cleanup()
+            self.tracer.save()
+
+        summary = self.gen_summary(time.monotonic() - start)
+
+        if self.args.summary:
+            with open(self.args.summary, mode="w") as f:
+                json.dump(summary, f, indent=2)
+
+        print(
+            "Batch finished: %i succeeded, %i failed"
+            % (summary["succeeded"], summary["failed"])
+        )
+
+        return summary
+
+    def create_jobs(self, disc: str) -> list:
+        args = argparse.Namespace(**vars(self.args))
+        args.dvd = disc
+        # titles of one disc are spread over the batch workers
+        args.jobs = 1
+        args.info = False
+
+        try:
+            service = self.service_cls(
+                self.dvd_info_reader_cls, self.remuxer_cls, args, self.tracer
+            )
+            service.outdir = Path(self.args.output_dir) / self.get_disc_name(disc)
+            service.tmp_dir = service.outdir
+            service.staging_pool = self.staging_pool
+
+            # the staging planner of the remuxer looks at the output file system
+            if not self.args.dry_run:
+                service.outdir.mkdir(parents=True, exist_ok=True)
+
+            service.langcodes = service._create_remuxer().langcodes
+            titles_idx = service._get_titles()
+            device = get_device_key(disc)
+        except Exception as inst:
+            job = BatchJob(disc, None, None, None)
+            job.status = "failed"
+            job.error = str(inst) or inst.__class__.__name__
+            print("ERROR: %s: %s" % (disc, job.error))
+            return [job]
+
+        return [BatchJob(disc, idx, service, device) for idx in titles_idx]
+
+    def cleanup(self) -> None:
+        services = {job.service for job in self.jobs if job.service}
+
+        for service in services:
+            if service.staging:
+                service.staging.cleanup()
+
+    def get_disc_name(self, disc: str) -> str:
+        return get_unique_disc_name(disc, self.disc_names)
+
+    def run_jobs(self) -> None:
+        pending = deque(job for job in self.jobs if job.status == "pending")
+        running = {}
+        device_jobs = {}
+
+        with ThreadPoolExecutor(max_workers=self.args.jobs) as executor:
+            while pending or running:
+                # start jobs in order, skipping those whose device is busy
+                for job in list(pending):
+                    if len(running) >= self.args.jobs:
+                        break
+
+                    if device_jobs.get(job.device, 0) >= self.args.device_jobs:
+                        continue
+
+                    pending.remove(job)
+                    job.status = "running"
+                    device_jobs[job.device] = device_jobs.get(job.device, 0) + 1
+                    running[executor.submit(job.run)] = job
+
+                done, not_done = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    job = running.pop(future)
+                    device_jobs[job.device] -= 1
+
+                    if job.status == "failed":
+                        print(
+                            "ERROR: %s title #%s: %s"
+                            % (job.disc, job.title_idx, job.error)
+                        )
+
+    def gen_summary(self, seconds: float) -> dict:
+        return {
+            "seconds": round(seconds, 3),
+            "succeeded": len([job for job in self.jobs if job.status == "success"]),
+            "failed": len([job for job in self.jobs if job.status == "failed"]),
+            "jobs": [job.to_dict() for job in self.jobs],
+        }
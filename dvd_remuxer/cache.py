@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat
+from pathlib import Path
+
+CACHE_VERSION = 1
+
+# 64 KiB cover the IFO headers and the ISO volume descriptors
+FINGERPRINT_READ_SIZE = 64 * 1024
+ISO_VOLUME_DESCRIPTORS_OFFSET = 16 * 2048
+
+
+def default_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+
+    if cache_home:
+        return Path(cache_home) / "dvdremuxer"
+
+    return Path.home() / ".cache" / "dvdremuxer"
+
+
+def fingerprint(device: str) -> str:
+    path = Path(device)
+    digest = hashlib.sha1(b"dvdremuxer-%i" % (CACHE_VERSION))
+
+    try:
+        if path.is_dir():
+            if (path / "VIDEO_TS").is_dir():
+                path = path / "VIDEO_TS"
+
+            ifo_files = sorted(
+                entry for entry in path.iterdir() if entry.suffix.upper() == ".IFO"
+            )
+            if not ifo_files:
+                return None
+
+            for ifo_file in ifo_files:
+                file_stat = ifo_file.stat()
+                digest.update(
+                    b"%s:%i:%i\n"
+                    % (
+                        ifo_file.name.upper().encode(),
+                        file_stat.st_size,
+                        file_stat.st_mtime_ns,
+                    )
+                )
+                with ifo_file.open(mode="rb") as f:
+                    digest.update(f.read(FINGERPRINT_READ_SIZE))
+        else:
+            mode = path.stat().st_mode
+            if not stat.S_ISREG(mode) and not stat.S_ISBLK(mode):
+                return None
+
+            with path.open(mode="rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                digest.update(b"%i\n" % (size))
+                f.seek(ISO_VOLUME_DESCRIPTORS_OFFSET)
+                descriptors = f.read(FINGERPRINT_READ_SIZE)
+                if not descriptors:
+                    return None
+                digest.update(descriptors)
+    except OSError:
+        return None
+
+    return digest.hexdigest()
+
+
+class DVDInfoCache:
+    def __init__(self, cache_dir: Path = None, max_size: int = 32 * 1024 * 1024):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_size = max_size
+
+    def get(self, key: str) -> dict:
+        cache_file = self._cache_file(key)
+
+        try:
+            with cache_file.open(mode="r") as f:
+                data = json.load(f)
+            # the modification time is used as the last access time for eviction
+            os.utime(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        return data
+
+    def put(self, key: str, data: dict) -> None:
+        cache_file = self._cache_file(key)
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            tmp_file = cache_file.with_suffix(".tmp%i" % (os.getpid()))
+            with tmp_file.open(mode="w") as f:
+                json.dump(data, f)
+            tmp_file.replace(cache_file)
+
+            self.evict()
+        except OSError as error:
+            print("WARNING: can not write DVD info cache: %s" % (error))
+
+    def evict(self) -> None:
+        entries = []
+        total_size = 0
+
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                file_stat = cache_file.stat()
+            except OSError:
+                continue
+
+            entries.append((file_stat.st_mtime, file_stat.st_size, cache_file))
+            total_size += file_stat.st_size
+
+        # remove least recently used entries first
+        for mtime, size, cache_file in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                cache_file.unlink()
+            except OSError:
+                continue
+
+            total_size -= size
+
+    def _cache_file(self, key: str) -> Path:
+        return self.cache_dir / ("%s.json" % (key))
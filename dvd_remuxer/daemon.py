@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .batch import get_device_key, get_unique_disc_name, scan_path
+from .dvdremux import DVDRemuxer
+from .lsdvd import lsdvd
+from .options import check_args, create_argparser
+from .remux_service import RemuxService
+from .staging import StagingPool
+
+# finished jobs kept for the status command
+MAX_FINISHED_JOBS = 1000
+
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+class DaemonError(Exception):
+    pass
+
+
+def parse_job_args(argv: list) -> argparse.Namespace:
+    # the options of dvd-remuxer, errors and --help are returned to the client,
+    # nothing is printed to the daemon's stdout and the daemon does not exit
+    argparser = create_argparser()
+
+    def error(message):
+        raise DaemonError(message)
+
+    def exit(status=0, message=None):
+        raise DaemonError(message or argparser.format_help())
+
+    argparser.error = error
+    argparser.exit = exit
+    argparser.print_help = lambda file=None: None
+
+    if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+        raise DaemonError("args must be a list of strings")
+
+    args = check_args(argparser, argparser.parse_args(argv))
+
+    if args.execute_plan:
+        raise DaemonError("--execute-plan is not supported by the daemon")
+
+    return args
+
+
+def get_disc_state(disc: str) -> tuple:
+    # size and mtime of the disc files, to see if a disc is still copied
+    path = Path(disc)
+
+    if path.is_file():
+        disc_stat = path.stat()
+        return disc_stat.st_size, disc_stat.st_mtime_ns
+
+    size = 0
+    mtime = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            file_stat = os.stat(os.path.join(root, name))
+            size += file_stat.st_size
+            mtime = max(mtime, file_stat.st_mtime_ns)
+
+    return size, mtime
+
+
+class DaemonJob:
+    def __init__(self, job_id: int, disc: str, args, outdir: Path, origin: str):
+        self.job_id = job_id
+        self.disc = disc
+        self.args = args
+        self.outdir = outdir
+        self.origin = origin
+        self.device = get_device_key(disc)
+        self.status = "pending"
+        self.error = None
+        self.seconds = None
+        self.cancel_event = threading.Event()
+
+    def run(self, daemon: RemuxDaemon) -> None:
+        start = time.monotonic()
+
+        try:
+            service = daemon.service_cls(
+                daemon.dvd_info_reader_cls, daemon.remuxer_cls, self.args
+            )
+            service.outdir = self.outdir
+            service.tmp_dir = self.outdir
+            service.staging_pool = daemon.staging_pool
+            service.cancel_event = self.cancel_event
+
+            if not self.args.dry_run:
+                self.outdir.mkdir(parents=True, exist_ok=True)
+
+            service.run()
+            self.status = "success"
+        except Exception as inst:
+            if self.cancel_event.is_set():
+                self.status = "cancelled"
+            else:
+                self.status = "failed"
+            self.error = str(inst) or inst.__class__.__name__
+        finally:
+            self.seconds = round(time.monotonic() - start, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "job": self.job_id,
+            "disc": self.disc,
+            "origin": self.origin,
+            "outdir": str(self.outdir),
+            "status": (
+                "cancelling"
+                if self.status == "running" and self.cancel_event.is_set()
+                else self.status
+            ),
+            "error": self.error,
+            "seconds": self.seconds,
+        }
+
+
+class RemuxDaemon:
+    # A long running RemuxService: discs come from the watched folders and
+    # from clients of a Unix domain socket. One worker pool runs the discs,
+    # at most device_jobs of them from one storage device at a time.
+    def __init__(
+        self,
+        dvd_info_reader_cls: lsdvd,
+        remuxer_cls: DVDRemuxer,
+        args,
+        service_cls=RemuxService,
+    ):
+        self.dvd_info_reader_cls = dvd_info_reader_cls
+        self.remuxer_cls = remuxer_cls
+        self.service_cls = service_cls
+        self.args = args
+        self.jobs = []
+        self.job_ids = itertools.count(1)
+        # device: running jobs
+        self.device_jobs = {}
+        self.running = 0
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+        # disc of the watched folders: ((size, mtime), submitted)
+        self.inbox = {}
+        # output directory name: disc
+        self.disc_names = {}
+        # the discs running at the same time reserve temp space against each other
+        self.staging_pool = StagingPool()
+        self.server = None
+
+    def run(self) -> None:
+        socket_path = Path(self.args.socket)
+        if socket_path.is_socket():
+            # left by a daemon that did not stop cleanly
+            socket_path.unlink()
+
+        self.server = DaemonServer(str(socket_path), self)
+        threads = [
+            threading.Thread(target=self.server.serve_forever, daemon=True),
+            threading.Thread(target=self.watch, daemon=True),
+        ]
+
+        print("Listening on %s" % (socket_path))
+        for path in self.args.watch:
+            print("Watching %s" % (path))
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.schedule()
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+            socket_path.unlink(missing_ok=True)
+
+    def stop(self) -> None:
+        with self.condition:
+            self.stopped.set()
+
+            for job in self.jobs:
+                if job.status == "pending":
+                    job.status = "cancelled"
+                elif job.status == "running":
+                    job.cancel_event.set()
+
+            self.condition.notify_all()
+
+    def submit(self, disc: str, args, origin: str, output_dir: str = None) -> DaemonJob:
+        args = argparse.Namespace(**vars(args))
+        args.dvd = disc
+        # discs run in parallel, not the titles of one disc
+        args.jobs = 1
+        args.info = False
+
+        with self.condition:
+            if self.stopped.is_set():
+                raise DaemonError("the daemon is stopping")
+
+            outdir = Path(output_dir or self.args.output_dir) / get_unique_disc_name(
+                disc, self.disc_names
+            )
+
+            job = DaemonJob(next(self.job_ids), disc, args, outdir, origin)
+            self.jobs.append(job)
+            self._forget_finished_jobs()
+            self.condition.notify_all()
+
+        print("job #%i: %s from %s" % (job.job_id, disc, origin))
+
+        return job
+
+    def cancel(self, job_id: int) -> DaemonJob:
+        with self.condition:
+            job = self._get_job(job_id)
+
+            if job.status == "pending":
+                job.status = "cancelled"
+            elif job.status == "running":
+                job.cancel_event.set()
+            else:
+                raise DaemonError("job #%i is already %s" % (job_id, job.status))
+
+            self.condition.notify_all()
+
+        return job
+
+    def status(self, job_id: int = None) -> list:
+        with self.condition:
+            if job_id is not None:
+                return [self._get_job(job_id).to_dict()]
+
+            return [job.to_dict() for job in self.jobs]
+
+    def _get_job(self, job_id: int) -> DaemonJob:
+        for job in self.jobs:
+            if job.job_id == job_id:
+                return job
+
+        raise DaemonError("no job #%s" % (job_id))
+
+    def _forget_finished_jobs(self) -> None:
+        finished = [
+            job for job in self.jobs if job.status not in ("pending", "running")
+        ]
+
+        for job in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            self.jobs.remove(job)
+
+    def schedule(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.args.jobs) as executor:
+            try:
+                with self.condition:
+                    while not self.stopped.is_set():
+                        self._start_jobs(executor)
+                        self.condition.wait()
+            finally:
+                # running jobs stop before their next stage
+                self.stop()
+
+    def _start_jobs(self, executor: ThreadPoolExecutor) -> None:
+        # start jobs in order, skipping those whose device is busy
+        for job in self.jobs:
+            if self.running >= self.args.jobs:
+                break
+
+            device_jobs = self.device_jobs.get(job.device, 0)
+
+            if job.status != "pending" or device_jobs >= self.args.device_jobs:
+                continue
+
+            job.status = "running"
+            self.running += 1
+            self.device_jobs[job.device] = device_jobs + 1
+            executor.submit(self._run_job, job)
+
+    def _run_job(self, job: DaemonJob) -> None:
+        try:
+            job.run(self)
+        finally:
+            with self.condition:
+                self.running -= 1
+                self.device_jobs[job.device] -= 1
+                self.condition.notify_all()
+
+        if job.status == "success":
+            print("job #%i: done in %.1f s" % (job.job_id, job.seconds))
+        else:
+            print("ERROR: job #%i %s: %s" % (job.job_id, job.status, job.error))
+
+    def watch(self) -> None:
+        while not self.stopped.wait(self.args.poll_interval):
+            self.scan_inbox()
+
+    def scan_inbox(self) -> list:
+        # a disc is taken when it did not change since the last scan
+        jobs = []
+        inbox = {}
+
+        for path in self.args.watch:
+            for disc in scan_path(Path(path)):
+                try:
+                    state = get_disc_state(disc)
+                except OSError:
+                    continue
+
+                last_state, submitted = self.inbox.get(disc, (None, False))
+
+                if state != last_state:
+                    # new or still copied, a replaced disc is taken again
+                    submitted = False
+                elif not submitted:
+                    try:
+                        jobs.append(self.submit(disc, self.args, "inbox"))
+                    except (OSError, DaemonError) as inst:
+                        print("ERROR: %s: %s" % (disc, inst))
+
+                    submitted = True
+
+                inbox[disc] = (state, submitted)
+
+        self.inbox = inbox
+
+        return jobs
+
+    def handle_request(self, request: dict) -> dict:
+        try:
+            if not isinstance(request, dict):
+                raise DaemonError("a request must be a JSON object")
+
+            command = request.get("command")
+
+            if command == "submit":
+                args = parse_job_args(request.get("args"))
+                job = self.submit(args.dvd, args, "socket", request.get("output_dir"))
+                return {"ok": True, "job": job.to_dict()}
+
+            if command == "status":
+                return {"ok": True, "jobs": self.status(request.get("job"))}
+
+            if command == "cancel":
+                job = self.cancel(request.get("job"))
+                return {"ok": True, "job": job.to_dict()}
+
+            raise DaemonError("unknown command: %s" % (command))
+        except (OSError, DaemonError) as inst:
+            return {"ok": False, "error": str(inst)}
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    # one JSON request per line, one JSON response line for each
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_SIZE)
+            if not line:
+                break
+
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok": False, "error": "invalid JSON"}
+            else:
+                response = self.server.remux_daemon.handle_request(request)
+
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, remux_daemon: RemuxDaemon):
+        self.remux_daemon = remux_daemon
+        super().__init__(socket_path, DaemonRequestHandler)
+
+
+def send_request(socket_path: str, request: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+
+        with sock.makefile(mode="rwb") as f:
+            f.write(json.dumps(request).encode("utf-8") + b"\n")
+            f.flush()
+            response = f.readline()
+
+    if not response:
+        raise DaemonError("no response from %s" % (socket_path))
+
+    return json.loads(response)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+
+from .disc import SECTOR_SIZE, Title
+from .vobcopy import VobCopier, VobCopyError
+
+# sectors read from a title for its content fingerprint
+FINGERPRINT_SAMPLES = 16
+
+
+def title_ranges(title: Title) -> list:
+    # sorted and merged (vts, first_sector, last_sector) of the played cells
+    ranges = []
+
+    for cell in sorted(
+        title.playback_cells(), key=lambda cell: (cell.first_sector or 0)
+    ):
+        if cell.first_sector is None or cell.last_sector is None:
+            return None
+
+        if (
+            ranges
+            and ranges[-1][0] == title.vts
+            and cell.first_sector <= ranges[-1][2] + 1
+        ):
+            ranges[-1] = (
+                title.vts,
+                ranges[-1][1],
+                max(ranges[-1][2], cell.last_sector),
+            )
+        else:
+            ranges.append((title.vts, cell.first_sector, cell.last_sector))
+
+    return ranges or None
+
+
+def is_contained(ranges: list, other: list) -> bool:
+    starts = [(vts, first) for vts, first, last in other]
+
+    for vts, first, last in ranges:
+        pos = bisect.bisect_right(starts, (vts, first)) - 1
+
+        if pos < 0:
+            return False
+
+        other_vts, other_first, other_last = other[pos]
+        if other_vts != vts or last > other_last:
+            return False
+
+    return True
+
+
+def content_fingerprint(source, title: Title, samples=FINGERPRINT_SAMPLES) -> str:
+    # Titles of other program chains may point to copies of the same VOBs,
+    # a hash of sectors sampled across the title finds them.
+    copier = VobCopier(source, title)
+    size = copier.size
+    digest = hashlib.blake2b(b"%i" % (size), digest_size=16)
+
+    for i in range(samples):
+        digest.update(read_sector(copier.ranges, size * i // samples // SECTOR_SIZE))
+
+    return digest.hexdigest()
+
+
+def read_sector(ranges: list, sector: int) -> bytes:
+    position = sector * SECTOR_SIZE
+
+    for path, offset, length in ranges:
+        if position < length:
+            with open(path, mode="rb") as f:
+                f.seek(offset + position)
+                return f.read(SECTOR_SIZE)
+
+        position -= length
+
+    return b""
+
+
+def find_duplicate_titles(titles: list, source=None) -> list:
+    # returns (title_idx, kept_title_idx, reason) of each skipped title
+    duplicates = []
+    kept = []
+    fingerprints = {}
+
+    def get_fingerprint(title: Title) -> str:
+        if title.ix not in fingerprints:
+            try:
+                fingerprints[title.ix] = content_fingerprint(source, title)
+            except (OSError, VobCopyError):
+                fingerprints[title.ix] = None
+
+        return fingerprints[title.ix]
+
+    # the longest title of a group is kept, the first one of equal titles
+    for title in sorted(titles, key=lambda title: (-title.dump_size, title.ix)):
+        ranges = title_ranges(title)
+
+        if ranges is None:
+            # nothing to compare without the cell address table
+            continue
+
+        for other, other_ranges in kept:
+            if ranges == other_ranges:
+                duplicates.append((title.ix, other.ix, "same cells as"))
+                break
+
+            if is_contained(ranges, other_ranges):
+                duplicates.append((title.ix, other.ix, "cells contained in"))
+                break
+
+            if (
+                source is not None
+                and title.dump_size == other.dump_size
+                and get_fingerprint(title)
+                and get_fingerprint(title) == get_fingerprint(other)
+            ):
+                duplicates.append((title.ix, other.ix, "same content as"))
+                break
+        else:
+            kept.append((title, ranges))
+
+    return sorted(duplicates)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+SECTOR_SIZE = 2048
+
+
+def _format_length(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+
+    return "%02i:%02i:%02i.%03i" % (
+        millis // 3600000,
+        millis // 60000 % 60,
+        millis // 1000 % 60,
+        millis % 1000,
+    )
+
+
+def _to_int(value) -> int:
+    # lsdvd -x prints stream ids as hex strings
+    if isinstance(value, str):
+        return int(value, 16)
+
+    return value
+
+
+class AudioStream:
+    __slots__ = ("ix", "langcode", "streamid")
+
+    def __init__(self, ix: int, langcode: str, streamid: int = None):
+        self.ix = ix
+        self.langcode = langcode
+        self.streamid = streamid
+
+    @classmethod
+    def from_dict(cls, data: dict) -> AudioStream:
+        return cls(data["ix"], data.get("langcode"), _to_int(data.get("streamid")))
+
+
+class SubpStream:
+    __slots__ = ("ix", "langcode", "streamid")
+
+    def __init__(self, ix: int, langcode: str, streamid: int = None):
+        self.ix = ix
+        self.langcode = langcode
+        self.streamid = streamid
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SubpStream:
+        return cls(data["ix"], data.get("langcode"), _to_int(data.get("streamid")))
+
+
+class Chapter:
+    __slots__ = ("ix", "length", "startcell", "start")
+
+    def __init__(self, ix: int, length: float, startcell: int = None, start=0.0):
+        self.ix = ix
+        self.length = length
+        self.startcell = startcell
+        self.start = start
+
+    @classmethod
+    def from_dict(cls, data: dict, start: float = 0.0) -> Chapter:
+        return cls(data["ix"], data["length"], data.get("startcell"), start)
+
+
+class Cell:
+    __slots__ = (
+        "ix",
+        "length",
+        "block_mode",
+        "block_type",
+        "first_sector",
+        "last_sector",
+        "vob_id",
+        "cell_id",
+    )
+
+    def __init__(self, ix: int, length: float, **attrs):
+        self.ix = ix
+        self.length = length
+        self.block_mode = attrs.get("block_mode", 0)
+        self.block_type = attrs.get("block_type", 0)
+        self.first_sector = attrs.get("first_sector")
+        self.last_sector = attrs.get("last_sector")
+        self.vob_id = attrs.get("vob_id")
+        self.cell_id = attrs.get("cell_id")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Cell:
+        attrs = {key: data[key] for key in cls.__slots__[2:] if key in data}
+        return cls(data["ix"], data.get("length", 0.0), **attrs)
+
+    @property
+    def sectors(self) -> int:
+        if self.first_sector is None or self.last_sector is None:
+            return 0
+
+        return self.last_sector - self.first_sector + 1
+
+
+class Title:
+    __slots__ = (
+        "ix",
+        "length",
+        "vts",
+        "ttn",
+        "vts_sector",
+        "vobs_sector",
+        "angles",
+        "format",
+        "aspect",
+        "width",
+        "height",
+        "palette",
+        "audio",
+        "subp",
+        "chapter",
+        "cell",
+        "_audio_by_langcode",
+        "_subp_by_langcode",
+    )
+
+    _optional_attrs = __slots__[2:12]
+
+    def __init__(self, ix: int, length: float, **attrs):
+        self.ix = ix
+        self.length = length
+
+        for name in self._optional_attrs:
+            setattr(self, name, attrs.get(name))
+
+        self.audio = attrs.get("audio", [])
+        self.subp = attrs.get("subp", [])
+        self.chapter = attrs.get("chapter", [])
+        self.cell = attrs.get("cell", [])
+
+        self._audio_by_langcode = self._group_by_langcode(self.audio)
+        self._subp_by_langcode = self._group_by_langcode(self.subp)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Title:
+        attrs = {name: data[name] for name in cls._optional_attrs if name in data}
+
+        attrs["audio"] = [AudioStream.from_dict(item) for item in data.get("audio", [])]
+        attrs["subp"] = [SubpStream.from_dict(item) for item in data.get("subp", [])]
+        attrs["cell"] = [Cell.from_dict(item) for item in data.get("cell", [])]
+
+        # cumulative start time of each chapter
+        attrs["chapter"] = []
+        start = 0.0
+        for item in data.get("chapter", []):
+            attrs["chapter"].append(Chapter.from_dict(item, start))
+            start += item["length"]
+
+        return cls(data["ix"], data["length"], **attrs)
+
+    @staticmethod
+    def _group_by_langcode(streams: list) -> dict:
+        groups = {}
+        for stream in streams:
+            groups.setdefault(stream.langcode, []).append(stream)
+
+        return groups
+
+    def audio_by_langcode(self, langcode: str) -> list:
+        return self._audio_by_langcode.get(langcode, [])
+
+    def subp_by_langcode(self, langcode: str) -> list:
+        return self._subp_by_langcode.get(langcode, [])
+
+    def subp_by_langcodes(self, langcodes: list) -> list:
+        # in the order of the disc, not of langcodes
+        streams = [
+            stream
+            for langcode in dict.fromkeys(langcodes)
+            for stream in self.subp_by_langcode(langcode)
+        ]
+
+        return sorted(streams, key=lambda stream: stream.ix)
+
+    def get_stream(self, type: str, idx: int):
+        streams = getattr(self, type)
+
+        # stream ix are sequential, so this is a direct lookup in most cases
+        if 0 < idx <= len(streams) and streams[idx - 1].ix == idx:
+            return streams[idx - 1]
+
+        for stream in streams:
+            if stream.ix == idx:
+                return stream
+
+        return None
+
+    @property
+    def sectors(self) -> int:
+        return sum(cell.sectors for cell in self.cell)
+
+    def playback_cells(self) -> list:
+        # only the first angle of an angle block is played
+        return [
+            cell
+            for cell in self.cell
+            if not (cell.block_type == 1 and cell.block_mode in (2, 3))
+        ]
+
+    @property
+    def has_angle_blocks(self) -> bool:
+        return any(cell.block_type == 1 for cell in self.cell)
+
+    @property
+    def dump_size(self) -> int:
+        return sum(cell.sectors for cell in self.playback_cells()) * SECTOR_SIZE
+
+    @property
+    def min_dump_size(self) -> int:
+        # The units of one angle are interleaved with the other angles and the
+        # cells do not tell their size, only the cells outside angle blocks count.
+        sectors = sum(cell.sectors for cell in self.cell if cell.block_type != 1)
+
+        return sectors * SECTOR_SIZE
+
+
+class Disc:
+    __slots__ = ("device", "title", "track", "longest_track", "_track_by_ix")
+
+    def __init__(self, device: str, title: str, track: list, longest_track: int = None):
+        self.device = device
+        self.title = title
+        self.track = track
+        self.longest_track = longest_track
+        self._track_by_ix = {item.ix: item for item in track}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Disc:
+        return cls(
+            data.get("device"),
+            data.get("title"),
+            [Title.from_dict(item) for item in data.get("track", [])],
+            data.get("longest_track"),
+        )
+
+    def title_by_ix(self, ix: int) -> Title:
+        return self._track_by_ix.get(ix)
+
+    def get_title(self, ix: int) -> Title:
+        title = self.title_by_ix(ix)
+
+        if title is None:
+            raise Exception("title #%i is not on the disc" % (ix))
+
+        return title
+
+    def format_info(self) -> str:
+        # the layout of lsdvd -x, without running it again
+        lines = ["Disc Title: %s" % (self.title)]
+
+        for title in self.track:
+            lines.append(
+                "Title: %02i, Length: %s Chapters: %02i, Cells: %02i,"
+                " Audio streams: %02i, Subpictures: %02i"
+                % (
+                    title.ix,
+                    _format_length(title.length),
+                    len(title.chapter),
+                    len(title.cell),
+                    len(title.audio),
+                    len(title.subp),
+                )
+            )
+
+            for audio in title.audio:
+                lines.append("\tAudio: %02i, Language: %s" % (audio.ix, audio.langcode))
+
+            for chapter in title.chapter:
+                lines.append(
+                    "\tChapter: %02i, Length: %s, Start Cell: %02i"
+                    % (
+                        chapter.ix,
+                        _format_length(chapter.length),
+                        chapter.startcell or 0,
+                    )
+                )
+
+            for cell in title.cell:
+                lines.append(
+                    "\tCell: %02i, Length: %s" % (cell.ix, _format_length(cell.length))
+                )
+
+            for subp in title.subp:
+                lines.append(
+                    "\tSubtitle: %02i, Language: %s" % (subp.ix, subp.langcode)
+                )
+
+        if self.longest_track:
+            lines.append("Longest track: %02i" % (self.longest_track))
+
+        return "\n".join(lines)
@@ -2,13 +2,29 @@
 
 from __future__ import annotations
 
+import os
+import stat
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import TemporaryDirectory
 from pathlib import Path
 from datetime import datetime, timedelta
 from pprint import pprint
 import re
 
+from . import ifo
+from .cache import fingerprint
+from .engine import STREAM_MUX_POLL_INTERVAL, kill_process_group, send_fifo_eof
+from .journal import Journal
+from .manifest import OutputManifest, get_outputs, get_tool_version
+from .staging import estimate_title_space
+from .tools import resolve_cmd
+from .trace import Tracer
+from .vobcopy import VobCopier, VobCopyError
+from .vobsub import VobSubDemuxer, VobSubWriter, convert_palette, SUBPICTURE_FIRST_ID
+
 wrong_lang_codes = ["", None]
 
 
@@ -24,67 +40,337 @@ class DVDRemuxer:
         self.split_chapters = options.get("split_chapters")
         self.verbose = options.get("verbose")
         self.file_prefix = options.get("file_prefix")
+        self.native_vobsub = options.get("native_vobsub")
+        self.stream_mux = options.get("stream_mux")
+        self.resume = options.get("resume")
+        self.native_dump = options.get("native_dump")
+        self.sub_jobs = options.get("sub_jobs") or 1
+        self.tracer = options.get("tracer") or Tracer()
+        self.engine = options.get("engine")
+        self.staging = options.get("staging")
+        # --tools-dir of this job, the process environment is shared by all jobs
+        self.tools_dir = options.get("tools_dir")
+        # threading.Event, a set event stops the title before its next stage
+        self.cancel_event = options.get("cancel_event")
+
+        if self.use_sys_tmp_dir and self.resume:
+            print(
+                "WARNING: --resume does not work with --use-sys-tmp-dir,"
+                + " the temp files are removed after each run"
+            )
+            self.resume = False
 
         if self.use_sys_tmp_dir:
             self.tmp_dir_obj = TemporaryDirectory(prefix="dvdremux_")
             self.tmp_dir = Path(self.tmp_dir_obj.name)
         else:
             self.tmp_dir_obj = None
-            self.tmp_dir = Path.cwd()
+            self.tmp_dir = options.get("tmp_dir") or Path.cwd()
 
         self.temp_files = []
         self.langcodes = ["ru", "en"]
+        self.journals = {}
+        self.journals_lock = threading.Lock()
+        # title_idx: temp directory chosen by the staging planner
+        self.title_tmp_dirs = {}
+        # title and stage run by the current thread, for the progress of the tools
+        self.stage_context = threading.local()
+        self.disc_fingerprint = None
+        self.disc_fingerprint_lock = threading.Lock()
 
     def remux_to_mkv(
         self, title_idx: int, audio_params: list, subs_params: list, outdir: Path
     ) -> None:
+        job = self.prepare_remux(title_idx, audio_params, subs_params, outdir)
+
+        return self.merge_remux(job)
+
+    def prepare_remux(
+        self, title_idx: int, audio_params: list, subs_params: list, outdir: Path
+    ) -> RemuxJob:
         print(
             "remuxing title #%i (%s)"
             % (
                 title_idx,
-                convert_seconds_to_hhmmss(self.lsdvd.track[title_idx - 1].length),
+                convert_seconds_to_hhmmss(self.lsdvd.get_title(title_idx).length),
             )
         )
 
-        if self.verbose:
-            print("Temp directory: %s" % (self.tmp_dir))
+        outfile = self.gen_output_filename(title_idx, outdir)
+        manifest = self.get_manifest(title_idx, audio_params, subs_params, outfile)
+
+        if manifest and not self.rewrite and manifest.is_current():
+            print("title #%i is up to date: %s" % (title_idx, outfile))
+            job = RemuxJob(title_idx, outfile, None)
+            job.done = True
+            return job
 
-        outfile = outdir / Path("%s_%i.DVDRemux.mkv" % (self.file_prefix, title_idx))
+        self._stage_title(title_idx, subs_params)
 
-        mkvmerge_cmd = self.gen_mkvmerge_cmd(
-            title_idx, audio_params, subs_params, outdir
+        try:
+            job = self._prepare_remux(title_idx, audio_params, subs_params, outdir)
+            job.manifest = manifest
+            return job
+        except BaseException:
+            self._release_title_tmp_dir(title_idx)
+            raise
+
+    def _prepare_remux(
+        self, title_idx: int, audio_params: list, subs_params: list, outdir: Path
+    ) -> RemuxJob:
+        tmp_dir = self.get_tmp_dir(title_idx)
+
+        if self.verbose:
+            print("Temp directory: %s" % (tmp_dir))
+
+        job = RemuxJob(
+            title_idx,
+            self.gen_output_filename(title_idx, outdir),
+            self.gen_mkvmerge_cmd(title_idx, audio_params, subs_params, outdir),
         )
+        job.journal = self.get_journal(title_idx, tmp_dir)
 
-        file_stream = self.dumpstream(title_idx, self.tmp_dir)
-        self.temp_files.append(file_stream)
+        if self._is_stage_done(job.journal, "merge", [job.outfile]):
+            print("title #%i is already remuxed" % (title_idx))
+            job.done = True
+            return job
 
-        for sub_idx, langcode in subs_params:
-            file_vobsub_idx, file_vobsub_sub = self.dumpvobsub(
-                title_idx, sub_idx, langcode, self.tmp_dir
+        if self.stream_mux:
+            # the stream is dumped into a named pipe while mkvmerge reads it
+            file_stream, job.dump_args = self.build_dumpstream_cmd(
+                title_idx, tmp_dir, fifo=True
             )
+        else:
+            file_stream = self.dumpstream(title_idx, tmp_dir)
+            job.temp_files.append(file_stream)
+
+        if self.native_dump and self.stream_mux:
+            print("WARNING: native dump is not used with stream mux, use mplayer")
+
+        if self.native_vobsub and self.stream_mux:
+            print(
+                "WARNING: native VobSub extraction needs a seekable stream file,"
+                + " fall back to mencoder"
+            )
+
+        if self.native_vobsub and not self.stream_mux:
+            vobsub_files = self.extract_vobsubs(
+                title_idx, subs_params, file_stream, tmp_dir
+            )
+        else:
+            vobsub_files = self.dumpvobsub_list(title_idx, subs_params, tmp_dir)
+
+        for file_vobsub_idx, file_vobsub_sub in vobsub_files:
+            job.temp_files.append(file_vobsub_idx)
+            job.temp_files.append(file_vobsub_sub)
+
+        file_chapters = self.dumpchapters(title_idx, tmp_dir)
+        job.temp_files.append(file_chapters)
 
-            self.temp_files.append(file_vobsub_idx)
-            self.temp_files.append(file_vobsub_sub)
+        return job
 
-        file_chapters = self.dumpchapters(title_idx, self.tmp_dir)
-        self.temp_files.append(file_chapters)
+    def merge_remux(self, job: RemuxJob) -> Path:
+        try:
+            return self._merge_remux(job)
+        finally:
+            self._release_title_tmp_dir(job.title_idx)
+
+    def _merge_remux(self, job: RemuxJob) -> Path:
+        if job.done:
+            return job.outfile
 
         print("merge tracks")
-        self._subprocess_run(mkvmerge_cmd)
 
-        # Unlink а zero size file, when error occurred during the merge.
-        self._unlink_empty_file(outfile)
+        self._run_stage(
+            job.title_idx,
+            job.journal,
+            "merge",
+            [job.outfile],
+            lambda: self._perform_merge(job),
+        )
+
+        # only reached after a successful merge
+        if job.manifest and not self.dry_run:
+            job.manifest.save()
 
-        if not self.keep_temp_files and not self.tmp_dir_obj:
+        # a temp directory of the system is removed with all files at the end
+        staged = job.title_idx in self.title_tmp_dirs
+        if not self.keep_temp_files and (not self.tmp_dir_obj or staged):
             print("remove temp files")
-            self._rm_temp_files()
+            self._rm_temp_files(job.temp_files)
 
-        return outfile
+        # the journal only describes the temp files of an unfinished title
+        if job.journal and not self.keep_temp_files and not self.dry_run:
+            self._remove_journal(job.journal)
+
+        return job.outfile
+
+    def _perform_merge(self, job: RemuxJob) -> None:
+        if job.dump_args:
+            self._perform_stream_mux(job.dump_args, job.mkvmerge_cmd)
+        else:
+            self._run_mkvmerge(job.mkvmerge_cmd)
+
+        # Unlink а zero size file, when error occurred during the merge.
+        self._unlink_empty_file(job.outfile)
+
+    def _run_mkvmerge(self, mkvmerge_cmd: list) -> None:
+        code = self._subprocess_run(mkvmerge_cmd)
+
+        # mkvmerge exit code 1 means warnings only
+        if code in (None, 0, 1):
+            return
+
+        # do not leave a truncated MKV behind
+        outfile = Path(mkvmerge_cmd[mkvmerge_cmd.index("--output") + 1])
+        for file in get_outputs(outfile):
+            self._unlink_file(file)
+
+        raise Exception("mkvmerge exited with code %i" % (code))
+
+    def gen_output_filename(self, title_idx: int, outdir: Path) -> Path:
+        return outdir / Path("%s_%i.DVDRemux.mkv" % (self.file_prefix, title_idx))
+
+    def get_manifest(
+        self, title_idx: int, audio_params: list, subs_params: list, outfile: Path
+    ) -> OutputManifest:
+        # a dry run neither reads the disc nor runs the tools for their versions
+        if self.dry_run:
+            return None
+
+        disc = self._get_disc_fingerprint()
+        if disc is None:
+            # no stable identity of the source, e.g. a device without a disc
+            return None
+
+        return OutputManifest(
+            outfile,
+            {
+                "disc": disc,
+                "title": title_idx,
+                "audio": audio_params,
+                "subs": subs_params,
+                "aspect_ratio": self.aspect_ratio,
+                "split_chapters": bool(self.split_chapters),
+                "tools": {
+                    name: get_tool_version(name, self.tools_dir)
+                    for name in ("mkvmerge", "mplayer", "mencoder")
+                },
+            },
+        )
+
+    def _get_disc_fingerprint(self) -> str:
+        with self.disc_fingerprint_lock:
+            if self.disc_fingerprint is None:
+                self.disc_fingerprint = fingerprint(self.device) or ""
+
+        return self.disc_fingerprint or None
+
+    def get_tmp_dir(self, title_idx: int) -> Path:
+        return self.title_tmp_dirs.get(title_idx, self.tmp_dir)
+
+    def _stage_title(self, title_idx: int, subs_params: list) -> None:
+        if not self.staging:
+            return
+
+        temp_size, output_size = estimate_title_space(
+            self.lsdvd.get_title(title_idx), len(subs_params), self.stream_mux
+        )
+        self.title_tmp_dirs[title_idx] = self.staging.reserve(
+            title_idx, temp_size, output_size, "%s_%i" % (self.file_prefix, title_idx)
+        )
+
+    def _release_title_tmp_dir(self, title_idx: int) -> None:
+        if not self.staging:
+            return
+
+        self.staging.release(title_idx)
+        self.title_tmp_dirs.pop(title_idx, None)
+
+    def get_journal(self, title_idx: int, outdir: Path) -> Journal:
+        if not self.resume:
+            return None
+
+        path = outdir / ("%s_%i.journal.json" % (self.file_prefix, title_idx))
+
+        with self.journals_lock:
+            if path not in self.journals:
+                self.journals[path] = Journal(path)
+
+            return self.journals[path]
+
+    def _remove_journal(self, journal: Journal) -> None:
+        with self.journals_lock:
+            self.journals.pop(journal.path, None)
+
+        journal.remove()
+
+    def _is_stage_done(self, journal: Journal, stage: str, files: list) -> bool:
+        return bool(journal) and not self.rewrite and journal.is_done(stage, files)
+
+    def _run_stage(
+        self,
+        title_idx: int,
+        journal: Journal,
+        stage: str,
+        files: list,
+        perform,
+        expected_size: int = None,
+        min_size: int = None,
+    ) -> None:
+        if journal is None:
+            self._perform_stage(title_idx, stage, files, perform, expected_size)
+            return
+
+        if self._is_stage_done(journal, stage, files):
+            print("%s: already done" % (stage))
+            return
+
+        # files of an unfinished stage are not trusted
+        for file in files:
+            self._unlink_file(file)
+
+        self._perform_stage(title_idx, stage, files, perform, expected_size)
+
+        if self.dry_run:
+            return
+
+        if not journal.record(stage, files, min_size):
+            raise Exception("%s stage is incomplete" % (stage))
+
+    def _perform_stage(
+        self,
+        title_idx: int,
+        stage: str,
+        files: list,
+        perform,
+        expected_size: int = None,
+    ):
+        if self.cancel_event and self.cancel_event.is_set():
+            raise Exception("title #%i is cancelled before %s" % (title_idx, stage))
+
+        self.stage_context.stage = (title_idx, stage, expected_size)
+
+        try:
+            with self.tracer.span(
+                stage,
+                "title #%i" % (title_idx),
+                files,
+                title=title_idx,
+                device=self.device,
+            ):
+                perform()
+        finally:
+            self.stage_context.stage = None
+
+    def _get_current_stage(self) -> tuple:
+        return getattr(self.stage_context, "stage", None) or (None, None, None)
 
     def gen_mkvmerge_cmd(
         self, title_idx: int, audio_params: list, subs_params: list, outdir: Path
     ) -> list():
-        outfile = outdir / Path("%s_%i.DVDRemux.mkv" % (self.file_prefix, title_idx))
+        outfile = self.gen_output_filename(title_idx, outdir)
+        tmp_dir = self.get_tmp_dir(title_idx)
 
         merge_args = ["mkvmerge", "--output", outfile]
 
@@ -112,12 +398,12 @@ class DVDRemuxer:
             merge_args.append("--aspect-ratio")
             merge_args.append("0:%s" % (self.aspect_ratio))
 
-        file_stream = self.gen_dumpstream_filename(title_idx, self.tmp_dir)
+        file_stream = self.gen_dumpstream_filename(title_idx, tmp_dir, self.stream_mux)
         merge_args.append(file_stream)
 
         for sub_idx, langcode in subs_params:
             file_vobsub, file_vobsub_idx, file_vobsub_sub = self.gen_vobsub_filenames(
-                title_idx, sub_idx, langcode, self.tmp_dir
+                title_idx, sub_idx, langcode, tmp_dir
             )
 
             in_file_number += 1  # each subtitle track in separate file
@@ -129,8 +415,8 @@ class DVDRemuxer:
             # subtitle just after audio
             track_order += ",%i:0" % (in_file_number)
 
-        if len(self.lsdvd.track[title_idx - 1].chapter) > 1:
-            file_chapters = self.gen_chapters_filename(title_idx, self.tmp_dir)
+        if len(self.lsdvd.get_title(title_idx).chapter) > 1:
+            file_chapters = self.gen_chapters_filename(title_idx, tmp_dir)
             merge_args.append("--chapters")
             merge_args.append(file_chapters)
 
@@ -145,14 +431,25 @@ class DVDRemuxer:
 
     def dumpstream(self, title_idx: int, outdir: Path) -> Path:
         outfile, dump_args = self.build_dumpstream_cmd(title_idx, outdir)
+        title = self.lsdvd.get_title(title_idx)
 
         print("dump stream")
-        self._perform_dumpstream(outfile, dump_args)
+        self._run_stage(
+            title_idx,
+            self.get_journal(title_idx, outdir),
+            "stream",
+            [outfile],
+            lambda: self._perform_title_dump(title_idx, outfile, dump_args),
+            title.dump_size,
+            title.min_dump_size,
+        )
 
         return outfile
 
-    def build_dumpstream_cmd(self, title_idx: int, outdir: Path) -> list:
-        outfile = self.gen_dumpstream_filename(title_idx, outdir)
+    def build_dumpstream_cmd(
+        self, title_idx: int, outdir: Path, fifo: bool = False
+    ) -> list:
+        outfile = self.gen_dumpstream_filename(title_idx, outdir, fifo)
 
         dump_args = [
             "mplayer",
@@ -166,15 +463,172 @@ class DVDRemuxer:
 
         return outfile, dump_args
 
-    def gen_dumpstream_filename(self, title_idx: int, outdir: Path) -> list:
+    def gen_dumpstream_filename(
+        self, title_idx: int, outdir: Path, fifo: bool = False
+    ) -> list:
+        # the named pipe of --stream-mux
+        if fifo:
+            return outdir / ("%s_%i_video.fifo.vob" % (self.file_prefix, title_idx))
+
         return outdir / ("%s_%i_video.vob" % (self.file_prefix, title_idx))
 
     def _perform_dumpstream(self, outfile: Path, dump_args: list) -> None:
         if not outfile.exists() or self.rewrite:
-            self._subprocess_run(
+            self._run_checked(
                 dump_args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
             )
 
+    def _perform_title_dump(self, title_idx: int, outfile: Path, dump_args: list):
+        if self.native_dump:
+            self._perform_native_dumpstream(title_idx, outfile, dump_args)
+        else:
+            self._perform_dumpstream(outfile, dump_args)
+
+    def _perform_native_dumpstream(
+        self, title_idx: int, outfile: Path, dump_args: list
+    ) -> None:
+        if outfile.exists() and not self.rewrite:
+            return
+
+        try:
+            source, copier = self._create_vob_copier(title_idx)
+        except (OSError, ifo.IfoError, VobCopyError) as error:
+            print("WARNING: %s, fall back to mplayer" % (error))
+            self._perform_dumpstream(outfile, dump_args)
+            return
+
+        try:
+            if self.dry_run or self.verbose:
+                print(
+                    "copy %i cells (%i bytes) of title #%i to %s"
+                    % (
+                        len(copier.title.playback_cells()),
+                        copier.size,
+                        title_idx,
+                        outfile,
+                    )
+                )
+
+            if self.dry_run:
+                return
+
+            seconds = copier.copy(outfile)
+        finally:
+            source.close()
+
+        print(
+            "copied %.1f MiB in %.2f s (%.1f MiB/s)"
+            % (
+                copier.size / 1048576,
+                seconds,
+                copier.size / 1048576 / max(seconds, 0.001),
+            )
+        )
+
+    def _create_vob_copier(self, title_idx: int) -> tuple:
+        # a physical drive needs libdvdcss and the read error handling of mplayer
+        if stat.S_ISBLK(os.stat(self.device).st_mode):
+            raise VobCopyError("%s is a physical drive" % (self.device))
+
+        source = ifo.open_video_ts(self.device)
+
+        try:
+            copier = VobCopier(source, self.lsdvd.get_title(title_idx))
+
+            if copier.is_scrambled():
+                raise VobCopyError("title #%i is CSS protected" % (title_idx))
+        except BaseException:
+            source.close()
+            raise
+
+        return source, copier
+
+    def _perform_stream_mux(self, dump_args: list, mkvmerge_cmd: list) -> None:
+        fifo = dump_args[-1]
+        outfile = mkvmerge_cmd[mkvmerge_cmd.index("--output") + 1]
+
+        if self.dry_run or self.verbose:
+            print(subprocess.list2cmdline(["mkfifo", fifo]))
+            print(subprocess.list2cmdline(dump_args) + " &")
+            print(subprocess.list2cmdline(mkvmerge_cmd))
+
+        if self.dry_run:
+            return
+
+        if fifo.exists():
+            fifo.unlink()
+
+        os.mkfifo(fifo)
+
+        try:
+            self._run_stream_mux(dump_args, mkvmerge_cmd)
+        except BaseException:
+            # do not leave a truncated MKV behind
+            if outfile.exists():
+                outfile.unlink()
+            raise
+        finally:
+            fifo.unlink()
+
+    def _run_stream_mux(self, dump_args: list, mkvmerge_cmd: list) -> None:
+        if self.engine:
+            title_idx = self._get_current_stage()[0]
+            merge_code, dump_code = self.engine.submit(
+                self.engine.run_stream_mux(
+                    resolve_cmd(dump_args, self.tools_dir),
+                    resolve_cmd(mkvmerge_cmd, self.tools_dir),
+                    title_idx,
+                    self.lsdvd.get_title(title_idx).dump_size if title_idx else None,
+                )
+            )
+        else:
+            merge_code, dump_code = self._poll_stream_mux(dump_args, mkvmerge_cmd)
+
+        if merge_code not in (None, 0, 1):
+            raise Exception("mkvmerge exited with code %i" % (merge_code))
+
+        if dump_code:
+            raise Exception("mplayer exited with code %i" % (dump_code))
+
+    def _poll_stream_mux(self, dump_args: list, mkvmerge_cmd: list) -> tuple:
+        fifo = dump_args[-1]
+        # own process groups, so the children of the tools can be stopped too
+        merge_proc = subprocess.Popen(
+            resolve_cmd(mkvmerge_cmd, self.tools_dir), start_new_session=True
+        )
+        dump_proc = subprocess.Popen(
+            resolve_cmd(dump_args, self.tools_dir),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+        try:
+            while True:
+                merge_code = merge_proc.poll()
+                dump_code = dump_proc.poll()
+
+                if merge_code is not None and dump_code is not None:
+                    break
+
+                # A side that failed will never open or drain the pipe,
+                # so the other side has to be stopped too.
+                # mkvmerge exit code 1 means warnings only.
+                if dump_code or merge_code not in (None, 0, 1):
+                    break
+
+                # a dump that never opened the pipe leaves mkvmerge waiting
+                if dump_code is not None:
+                    send_fifo_eof(fifo)
+
+                time.sleep(STREAM_MUX_POLL_INTERVAL)
+        finally:
+            for proc in (merge_proc, dump_proc):
+                kill_process_group(proc.pid)
+                proc.wait()
+
+        return merge_code, dump_code
+
     def dumpchapters(self, title_idx: int, outdir: Path) -> Path:
         print("dump chapters")
 
@@ -185,7 +639,13 @@ class DVDRemuxer:
         if self.verbose:
             print(chapters)
 
-        self._perform_dumpchapters(outfile, chapters)
+        self._run_stage(
+            title_idx,
+            self.get_journal(title_idx, outdir),
+            "chapters",
+            [outfile],
+            lambda: self._perform_dumpchapters(outfile, chapters),
+        )
 
         return outfile
 
@@ -193,18 +653,15 @@ class DVDRemuxer:
         return outdir / ("%s_%i_chapters.txt" % (self.file_prefix, title_idx))
 
     def gen_chapters(self, title_idx: int) -> str:
-        start = 0.000
         chapters = ""
 
-        for chapter in self.lsdvd.track[title_idx - 1].chapter:
+        for chapter in self.lsdvd.get_title(title_idx).chapter:
             chapters += "CHAPTER%02d=%s\n" % (
                 chapter.ix,
-                convert_seconds_to_hhmmss(start),
+                convert_seconds_to_hhmmss(chapter.start),
             )
             chapters += "CHAPTER%02dNAME=\n" % (chapter.ix)
 
-            start += chapter.length
-
         return chapters
 
     def _perform_dumpchapters(self, outfile: Path, chapters: str) -> Path:
@@ -212,17 +669,45 @@ class DVDRemuxer:
             self._save_to_file(outfile, chapters)
 
     def dumpvobsubs(self, title_idx: int, outdir: Path) -> dict:
+        title = self.lsdvd.get_title(title_idx)
+        subs_params = [
+            (vobsub.ix, vobsub.langcode)
+            for vobsub in title.subp_by_langcodes(self.langcodes)
+        ]
+
         output_files = {}
-        for vobsub in self.lsdvd.track[title_idx - 1].subp:
-            if vobsub.langcode in self.langcodes:
-                output_files[vobsub.langcode] = self.dumpvobsub(
-                    title_idx, vobsub.ix, vobsub.langcode, outdir
-                )
+        for (sub_ix, langcode), files in zip(
+            subs_params, self.dumpvobsub_list(title_idx, subs_params, outdir)
+        ):
+            output_files[langcode] = files
 
         return output_files
 
+    def dumpvobsub_list(self, title_idx: int, subs_params: list, outdir: Path) -> list:
+        if self.sub_jobs <= 1 or len(subs_params) <= 1:
+            return [
+                self.dumpvobsub(title_idx, sub_ix, langcode, outdir)
+                for sub_ix, langcode in subs_params
+            ]
+
+        # mencoder is CPU bound, so several subtitles are extracted at once
+        with ThreadPoolExecutor(max_workers=self.sub_jobs) as executor:
+            futures = [
+                executor.submit(
+                    self.dumpvobsub, title_idx, sub_ix, langcode, outdir, True
+                )
+                for sub_ix, langcode in subs_params
+            ]
+
+            return [future.result() for future in futures]
+
     def dumpvobsub(
-        self, title_idx: int, sub_ix: int, langcode: str, outdir: Path
+        self,
+        title_idx: int,
+        sub_ix: int,
+        langcode: str,
+        outdir: Path,
+        unique_tmp_file: bool = False,
     ) -> tuple(Path, Path):
         print("extracting subtitle %i lang %s" % (sub_ix, langcode))
 
@@ -230,9 +715,20 @@ class DVDRemuxer:
             title_idx, sub_ix, langcode, outdir
         )
 
-        dump_args = self.gen_dumpvobsub_cmd(outfile, title_idx, sub_ix)
+        # with a unique file the vobsub gets its name when mencoder is finished
+        tmp_outfile = self.gen_vobsub_tmp_filename(outfile) if unique_tmp_file else None
 
-        self._perform_dumpvobsub(dump_args, outfile_idx, outfile_sub, langcode)
+        dump_args = self.gen_dumpvobsub_cmd(tmp_outfile or outfile, title_idx, sub_ix)
+
+        self._run_stage(
+            title_idx,
+            self.get_journal(title_idx, outdir),
+            "vobsub_%i_%s" % (sub_ix, langcode),
+            [outfile_idx, outfile_sub],
+            lambda: self._perform_dumpvobsub(
+                dump_args, outfile_idx, outfile_sub, langcode, tmp_outfile
+            ),
+        )
 
         return outfile_idx, outfile_sub
 
@@ -248,6 +744,11 @@ class DVDRemuxer:
 
         return outfile, outfile_idx, outfile_sub
 
+    def gen_vobsub_tmp_filename(self, outfile: Path) -> Path:
+        return outfile.with_name(
+            "%s.%i-%i.part" % (outfile.name, os.getpid(), threading.get_ident())
+        )
+
     def gen_dumpvobsub_cmd(self, outfile: int, title_idx: int, sub_ix: int) -> list:
         return [
             "mencoder",
@@ -277,6 +778,7 @@ class DVDRemuxer:
         outfile_idx: Path,
         outfile_sub: Path,
         langcode: str,
+        tmp_outfile: Path = None,
     ) -> None:
         if outfile_idx.exists() or outfile_sub.exists():
             if self.rewrite:
@@ -289,11 +791,95 @@ class DVDRemuxer:
                 print("Use the --rewrite option to rewrite.")
                 return
 
-        self._subprocess_run(
+        self._run_checked(
             dump_args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
         )
 
-        self._fix_vobsub_file_content(outfile_idx, langcode)
+        if tmp_outfile is None:
+            self._fix_vobsub_file_content(outfile_idx, langcode)
+            return
+
+        tmp_idx = Path("%s.idx" % (tmp_outfile))
+        tmp_sub = Path("%s.sub" % (tmp_outfile))
+
+        self._fix_vobsub_file_content(tmp_idx, langcode)
+        self._move_file(tmp_idx, outfile_idx)
+        self._move_file(tmp_sub, outfile_sub)
+
+    def extract_vobsubs(
+        self, title_idx: int, subs_params: list, file_stream: Path, outdir: Path
+    ) -> list:
+        print("demux subtitles from %s" % (file_stream.name))
+
+        output_files = [
+            self.gen_vobsub_filenames(title_idx, sub_idx, langcode, outdir)[1:]
+            for sub_idx, langcode in subs_params
+        ]
+
+        self._run_stage(
+            title_idx,
+            self.get_journal(title_idx, outdir),
+            "vobsub_demux",
+            [file for files in output_files for file in files],
+            lambda: self._perform_title_vobsubs(
+                title_idx, subs_params, file_stream, output_files
+            ),
+        )
+
+        return output_files
+
+    def _perform_title_vobsubs(
+        self, title_idx: int, subs_params: list, file_stream: Path, output_files: list
+    ) -> None:
+        track = self.lsdvd.get_title(title_idx)
+        size = self._get_vobsub_size(track)
+        palette = convert_palette(track.palette)
+        writers = {}
+
+        for (sub_idx, langcode), (outfile_idx, outfile_sub) in zip(
+            subs_params, output_files
+        ):
+            if (outfile_idx.exists() or outfile_sub.exists()) and not self.rewrite:
+                print("VobSub files exist:")
+                print(outfile_idx.as_posix())
+                print(outfile_sub.as_posix())
+                print("Use the --rewrite option to rewrite.")
+                continue
+
+            writers[self._get_vobsub_stream_id(track, sub_idx)] = VobSubWriter(
+                outfile_idx, outfile_sub, langcode, sub_idx, size, palette
+            )
+
+        if writers:
+            self._perform_extract_vobsubs(file_stream, writers)
+
+    def _get_vobsub_stream_id(self, track, sub_idx: int) -> int:
+        subp = track.get_stream("subp", sub_idx)
+
+        if subp and subp.streamid:
+            return subp.streamid
+
+        return SUBPICTURE_FIRST_ID + sub_idx - 1
+
+    def _get_vobsub_size(self, track) -> tuple:
+        width = track.width or 720
+        height = track.height
+
+        if not height:
+            height = 480 if track.format == "NTSC" else 576
+
+        return width, height
+
+    def _perform_extract_vobsubs(self, file_stream: Path, writers: dict) -> None:
+        if self.dry_run:
+            for stream_id, writer in writers.items():
+                print(
+                    "0x%02x -> %s, %s"
+                    % (stream_id, writer.outfile_idx.name, writer.outfile_sub.name)
+                )
+            return
+
+        VobSubDemuxer(writers).demux(file_stream)
 
     def _fix_vobsub_file_content(self, idx_file: Path, langcode: str):
         if self.dry_run:
@@ -312,12 +898,36 @@ class DVDRemuxer:
     def _fix_vobsub_lang_id(self, content: str, langcode: str) -> str:
         return re.sub("id: , index", f"id: {langcode}, index", content, flags=re.M)
 
-    def _subprocess_run(self, cmd: list, **kwargs) -> None:
+    def _subprocess_run(self, cmd: list, **kwargs) -> int:
+        # the exit code, None in a dry run
+        cmd = resolve_cmd(cmd, self.tools_dir)
+
         if self.dry_run or self.verbose:
             print(subprocess.list2cmdline(cmd))
 
-        if not self.dry_run:
-            subprocess.run(cmd, **kwargs)
+        if self.dry_run:
+            return
+
+        if self.engine:
+            title_idx, stage, expected_size = self._get_current_stage()
+            return self.engine.submit(
+                self.engine.run(
+                    cmd,
+                    title_idx,
+                    stage,
+                    expected_size,
+                    quiet=kwargs.get("stdout") == subprocess.DEVNULL,
+                )
+            )
+        else:
+            return subprocess.run(cmd, **kwargs).returncode
+
+    def _run_checked(self, cmd: list, **kwargs) -> None:
+        # a failed dump must not be recorded as a finished stage
+        code = self._subprocess_run(cmd, **kwargs)
+
+        if code:
+            raise Exception("%s exited with code %i" % (cmd[0], code))
 
     def _save_to_file(self, outfile: Path, data: str) -> None:
         if self.dry_run:
@@ -333,6 +943,19 @@ class DVDRemuxer:
 
         file.open(mode="w").close()
 
+    def _move_file(self, file: Path, target: Path) -> None:
+        if self.dry_run:
+            return
+
+        file.replace(target)
+
+    def _unlink_file(self, file: Path) -> None:
+        if self.dry_run:
+            return
+
+        if file.exists():
+            file.unlink()
+
     def _unlink_empty_file(self, file: Path) -> None:
         if self.dry_run:
             return
@@ -343,17 +966,32 @@ class DVDRemuxer:
         except:
             print("Oops! %s" % file)
 
-    def _rm_temp_files(self) -> None:
+    def _rm_temp_files(self, temp_files: list = None) -> None:
+        if temp_files is None:
+            temp_files = self.temp_files
+
         if self.dry_run:
-            pprint(self.temp_files)
+            pprint(temp_files)
         else:
-            while self.temp_files:
+            while temp_files:
                 try:
-                    self.temp_files.pop().unlink()
+                    temp_files.pop().unlink()
                 except:
                     print("Oops!")
 
 
+class RemuxJob:
+    def __init__(self, title_idx: int, outfile: Path, mkvmerge_cmd: list):
+        self.title_idx = title_idx
+        self.outfile = outfile
+        self.mkvmerge_cmd = mkvmerge_cmd
+        self.dump_args = None
+        self.journal = None
+        self.manifest = None
+        self.done = False
+        self.temp_files = []
+
+
 def convert_seconds_to_hhmmss(seconds: float) -> str:
     return (datetime.utcfromtimestamp(0) + timedelta(seconds=seconds)).strftime(
         "%H:%M:%S.%f"
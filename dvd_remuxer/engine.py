@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import re
+import signal
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+MKVMERGE_PROGRESS_RE = re.compile(rb"^(?:#GUI#progress|Progress:) (\d+)%")
+MENCODER_PROGRESS_RE = re.compile(rb"^Pos:.*\(\s*(\d+)%\)")
+MPLAYER_DUMP_RE = re.compile(rb"dump: (\d+) bytes written")
+
+# mplayer and mencoder redraw their status line with a carriage return
+LINE_SEPARATOR_RE = re.compile(rb"[\r\n]")
+
+READ_SIZE = 65536
+
+OUTPUT_CLOSE_TIMEOUT = 1.0
+
+STREAM_MUX_POLL_INTERVAL = 0.1
+
+
+def parse_mkvmerge_progress(line: bytes) -> float:
+    match = MKVMERGE_PROGRESS_RE.match(line)
+    return int(match.group(1)) / 100 if match else None
+
+
+def parse_mencoder_progress(line: bytes) -> float:
+    match = MENCODER_PROGRESS_RE.match(line)
+    return int(match.group(1)) / 100 if match else None
+
+
+def parse_mplayer_dump(line: bytes) -> int:
+    match = MPLAYER_DUMP_RE.search(line)
+    return int(match.group(1)) if match else None
+
+
+def get_tool_name(cmd: list) -> str:
+    return Path(str(cmd[0])).name
+
+
+def send_fifo_eof(fifo: Path) -> bool:
+    # A reader waiting on a named pipe whose writer exited without opening it
+    # gets the end of file once another writer opens and closes the pipe.
+    try:
+        fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:
+        # ENXIO, nobody reads the pipe right now
+        return False
+
+    os.close(fd)
+    return True
+
+
+def kill_process_group(pid: int) -> None:
+    # the children of a tool, like a shell pipeline, are stopped too
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    return "%i:%02i:%02i" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+class TitleProgress:
+    def __init__(self, title_idx: int, stage: str, total: int = None):
+        self.title_idx = title_idx
+        self.stage = stage
+        # bytes, None if unknown
+        self.total = total or None
+        self.done = 0
+        self.fraction = None
+        self.finished = False
+        self.start = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    @property
+    def rate(self) -> float:
+        return self.done / max(self.elapsed, 1e-6)
+
+    @property
+    def eta(self) -> float:
+        if not self.fraction:
+            return None
+
+        return self.elapsed * (1 - self.fraction) / self.fraction
+
+    def update_bytes(self, done: int) -> None:
+        self.done = done
+
+        if self.total:
+            self.fraction = min(done / self.total, 1.0)
+
+    def update_fraction(self, fraction: float) -> None:
+        self.fraction = min(fraction, 1.0)
+
+    def format(self) -> str:
+        line = "title #%i %s:" % (self.title_idx, self.stage)
+
+        if self.fraction is not None:
+            line += " %3i%%" % (self.fraction * 100)
+
+        if self.done:
+            line += " %.1f MiB (%.1f MiB/s)" % (
+                self.done / 1048576,
+                self.rate / 1048576,
+            )
+
+        if self.finished:
+            line += " in %s" % (format_seconds(self.elapsed))
+        elif self.eta is not None:
+            line += " ETA %s" % (format_seconds(self.eta))
+
+        return line
+
+
+class AsyncEngine:
+    # Runs the external tools of all titles from one event loop. The steps of
+    # DVDRemuxer stay blocking and run in worker threads, they send their
+    # commands to the loop, which reads the output of all children and keeps
+    # the progress of each running stage.
+    def __init__(self, on_progress=None, interval: float = 2.0, verbose=False):
+        self.on_progress = on_progress
+        self.interval = interval
+        self.verbose = verbose
+        self.loop = None
+        # (title_idx, stage): TitleProgress of running stages
+        self.progress = {}
+        self.last_report = {}
+
+    async def remux(
+        self,
+        remuxer,
+        title_idx: int,
+        audio_params: list,
+        subs_params: list,
+        outdir: Path,
+    ) -> Path:
+        return await self.run_blocking(
+            remuxer, remuxer.remux_to_mkv, title_idx, audio_params, subs_params, outdir
+        )
+
+    async def remux_titles(
+        self, remuxer, titles: list, outdir: Path, jobs: int = 1
+    ) -> list:
+        # titles is a list of (title_idx, audio_params, subs_params)
+        return await self.run_titles(
+            remuxer,
+            [
+                (
+                    title_idx,
+                    functools.partial(
+                        remuxer.remux_to_mkv,
+                        title_idx,
+                        audio_params,
+                        subs_params,
+                        outdir,
+                    ),
+                )
+                for title_idx, audio_params, subs_params in titles
+            ],
+            jobs,
+        )
+
+    async def run_titles(self, remuxer, calls: list, jobs: int = 1) -> list:
+        # calls is a list of (title_idx, function), at most jobs run at once
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = await asyncio.gather(
+                *[
+                    self.run_blocking(remuxer, call, executor=executor)
+                    for title_idx, call in calls
+                ],
+                return_exceptions=True,
+            )
+
+        errors = []
+
+        for (title_idx, call), result in zip(calls, results):
+            if isinstance(result, Exception):
+                print("ERROR: title #%i: %s" % (title_idx, result))
+                errors.append(title_idx)
+
+        if errors:
+            raise Exception(
+                "Failed titles: %s" % (", ".join("#%i" % (idx) for idx in errors))
+            )
+
+        return results
+
+    async def run_blocking(self, remuxer, func, *args, executor=None):
+        remuxer.engine = self
+        self.loop = asyncio.get_running_loop()
+
+        return await self.loop.run_in_executor(executor, func, *args)
+
+    def submit(self, coro):
+        # called from the worker threads
+        if self.loop is None:
+            coro.close()
+            raise Exception("the engine is not running")
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def run(
+        self,
+        cmd: list,
+        title_idx: int = None,
+        stage: str = None,
+        total: int = None,
+        quiet=False,
+    ) -> int:
+        proc = await self._spawn(cmd)
+
+        return await self._follow(proc, cmd, title_idx, stage, total, quiet)
+
+    async def run_stream_mux(
+        self,
+        dump_args: list,
+        mkvmerge_cmd: list,
+        title_idx: int = None,
+        total: int = None,
+    ) -> tuple:
+        # the stream is dumped into the named pipe given as the last argument
+        fifo = dump_args[-1]
+        merge_proc = await self._spawn(mkvmerge_cmd, new_session=True)
+
+        try:
+            dump_proc = await self._spawn(dump_args, new_session=True)
+        except BaseException:
+            kill_process_group(merge_proc.pid)
+            await merge_proc.wait()
+            raise
+
+        merge_task = asyncio.ensure_future(
+            self._follow(merge_proc, mkvmerge_cmd, title_idx, "merge", None, False)
+        )
+        dump_task = asyncio.ensure_future(
+            self._follow(dump_proc, dump_args, title_idx, "stream", total, True)
+        )
+        codes = {}
+
+        try:
+            pending = {merge_task, dump_task}
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=STREAM_MUX_POLL_INTERVAL,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in done:
+                    codes[task] = task.result()
+
+                # A side that failed will never open or drain the pipe,
+                # so the other side has to be stopped too.
+                # mkvmerge exit code 1 means warnings only.
+                if codes.get(dump_task) or codes.get(merge_task) not in (None, 0, 1):
+                    break
+
+                # a dump that never opened the pipe leaves mkvmerge waiting
+                if dump_task in codes and merge_task in pending:
+                    send_fifo_eof(fifo)
+        finally:
+            for proc in (merge_proc, dump_proc):
+                kill_process_group(proc.pid)
+
+            # Process.wait() also waits for the output pipe, which a child of a
+            # stopped tool may still hold open.
+            for proc in (merge_proc, dump_proc):
+                while proc.returncode is None:
+                    await asyncio.sleep(0.1)
+
+            done, pending = await asyncio.wait(
+                [merge_task, dump_task], timeout=OUTPUT_CLOSE_TIMEOUT
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(merge_task, dump_task, return_exceptions=True)
+
+        return codes.get(merge_task), codes.get(dump_task)
+
+    async def _spawn(self, cmd: list, new_session=False):
+        cmd = [str(arg) for arg in cmd]
+
+        if get_tool_name(cmd) == "mkvmerge" and "--gui-mode" not in cmd:
+            cmd.insert(1, "--gui-mode")
+
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=new_session,
+        )
+
+    async def _follow(
+        self, proc, cmd: list, title_idx: int, stage: str, total: int, quiet
+    ) -> int:
+        tool = get_tool_name(cmd)
+        progress = None
+
+        if title_idx is not None:
+            progress = TitleProgress(title_idx, stage, total)
+            self.progress[(title_idx, stage)] = progress
+
+        try:
+            buffer = b""
+
+            while True:
+                data = await proc.stdout.read(READ_SIZE)
+                if not data:
+                    break
+
+                lines = LINE_SEPARATOR_RE.split(buffer + data)
+                buffer = lines.pop()
+
+                for line in lines:
+                    self._handle_line(line, tool, progress, quiet)
+
+            if buffer:
+                self._handle_line(buffer, tool, progress, quiet)
+
+            return await proc.wait()
+        finally:
+            if progress:
+                self.progress.pop((title_idx, stage), None)
+                progress.finished = True
+
+                if progress.done or progress.fraction is not None:
+                    self._report(progress)
+
+    def _handle_line(self, line: bytes, tool: str, progress, quiet) -> None:
+        if tool == "mplayer":
+            done = parse_mplayer_dump(line)
+            if done is not None:
+                if progress:
+                    progress.update_bytes(done)
+                    self._report(progress)
+                return
+        elif tool in ("mkvmerge", "mencoder"):
+            if tool == "mkvmerge":
+                fraction = parse_mkvmerge_progress(line)
+            else:
+                fraction = parse_mencoder_progress(line)
+
+            if fraction is not None:
+                if progress:
+                    progress.update_fraction(fraction)
+                    self._report(progress)
+                return
+
+        if line.strip() and (not quiet or self.verbose):
+            print(line.decode("utf-8", errors="replace"))
+
+    def _report(self, progress: TitleProgress) -> None:
+        if self.on_progress:
+            self.on_progress(progress)
+            return
+
+        key = (progress.title_idx, progress.stage)
+        now = time.monotonic()
+        last = self.last_report.get(key)
+
+        if not progress.finished and last is not None and now - last < self.interval:
+            return
+
+        self.last_report[key] = now
+        print(progress.format())
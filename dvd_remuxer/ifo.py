@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import stat
+from pathlib import Path
+
+from .isofs import IsoFsError, IsoImage
+
+SECTOR_SIZE = 2048
+
+VMG_IDENTIFIER = b"DVDVIDEO-VMG"
+VTS_IDENTIFIER = b"DVDVIDEO-VTS"
+
+
+class IfoError(Exception):
+    pass
+
+
+class VideoTsDirectory:
+    def __init__(self, path: Path):
+        self.path = path
+        self.files = {
+            entry.name.upper(): entry for entry in path.iterdir() if entry.is_file()
+        }
+
+    def read_file(self, name: str) -> bytes:
+        if name not in self.files:
+            raise IfoError("%s not found" % (name))
+
+        return self.files[name].read_bytes()
+
+    def file_extents(self, name: str) -> list:
+        if name not in self.files:
+            return []
+
+        return [(self.files[name], 0, self.files[name].stat().st_size)]
+
+    def get_volume_id(self) -> str:
+        return "unknown"
+
+    def close(self) -> None:
+        pass
+
+
+def open_video_ts(device: str):
+    path = Path(device)
+
+    if path.is_dir():
+        if (path / "VIDEO_TS").is_dir():
+            path = path / "VIDEO_TS"
+        return VideoTsDirectory(path)
+
+    mode = path.stat().st_mode
+    if stat.S_ISREG(mode) or stat.S_ISBLK(mode):
+        try:
+            return IsoImage(path)
+        except IsoFsError as error:
+            raise IfoError(str(error))
+
+    raise IfoError("%s is not a VIDEO_TS directory or an ISO image" % (device))
+
+
+def read(device: str) -> dict:
+    source = open_video_ts(device)
+
+    try:
+        return read_dvd_info(source, device)
+    except IsoFsError as error:
+        raise IfoError(str(error))
+    finally:
+        source.close()
+
+
+def read_dvd_info(source, device: str) -> dict:
+    vmg = source.read_file("VIDEO_TS.IFO")
+    if vmg[:12] != VMG_IDENTIFIER:
+        raise IfoError("VIDEO_TS.IFO is not valid")
+
+    vts_cache = {}
+    tracks = []
+
+    for ix, title in enumerate(parse_tt_srpt(vmg), start=1):
+        vts_no = title["vts"]
+        if vts_no not in vts_cache:
+            vts_cache[vts_no] = parse_vts(
+                source.read_file("VTS_%02i_0.IFO" % (vts_no))
+            )
+
+        tracks.append(gen_track(ix, title, vts_cache[vts_no]))
+
+    longest_track = 0
+    longest_length = -1
+    for track in tracks:
+        if track["length"] > longest_length:
+            longest_track = track["ix"]
+            longest_length = track["length"]
+
+    return {
+        "device": device,
+        "title": source.get_volume_id(),
+        "track": tracks,
+        "longest_track": longest_track,
+    }
+
+
+def parse_tt_srpt(vmg: bytes) -> list:
+    offset = u32be(vmg, 0xC4) * SECTOR_SIZE
+    titles_number = u16be(vmg, offset)
+    titles = []
+
+    for i in range(titles_number):
+        entry = offset + 8 + i * 12
+        titles.append(
+            {
+                "angles": vmg[entry + 1],
+                "chapters": u16be(vmg, entry + 2),
+                "vts": vmg[entry + 6],
+                "ttn": vmg[entry + 7],
+                "vts_sector": u32be(vmg, entry + 8),
+            }
+        )
+
+    return titles
+
+
+def parse_vts(vts: bytes) -> dict:
+    if vts[:12] != VTS_IDENTIFIER:
+        raise IfoError("VTS IFO is not valid")
+
+    video_attr = u16be(vts, 0x200)
+    is_pal = bool(video_attr & 0x1000)
+    is_widescreen = (video_attr >> 10) & 0x03 == 3
+
+    audio_attrs = []
+    for i in range(min(u16be(vts, 0x202), 8)):
+        attr = vts[0x204 + i * 8 : 0x204 + i * 8 + 8]
+        audio_attrs.append({"langcode": decode_langcode(attr[2:4])})
+
+    subp_attrs = []
+    for i in range(min(u16be(vts, 0x254), 32)):
+        attr = vts[0x256 + i * 6 : 0x256 + i * 6 + 6]
+        subp_attrs.append({"langcode": decode_langcode(attr[2:4])})
+
+    ptt_offset = u32be(vts, 0xC8) * SECTOR_SIZE
+    pgci_offset = u32be(vts, 0xCC) * SECTOR_SIZE
+
+    return {
+        "vobs_sector": u32be(vts, 0xC4),
+        "format": "PAL" if is_pal else "NTSC",
+        "aspect": "16/9" if is_widescreen else "4/3",
+        "width": 720,
+        "height": 576 if is_pal else 480,
+        "audio": audio_attrs,
+        "subp": subp_attrs,
+        "ptt": parse_ptt_srpt(vts, ptt_offset),
+        "pgcs": parse_pgcit(vts, pgci_offset),
+    }
+
+
+def parse_ptt_srpt(vts: bytes, offset: int) -> list:
+    titles_number = u16be(vts, offset)
+    end = u32be(vts, offset + 4) + 1
+    starts = [u32be(vts, offset + 8 + i * 4) for i in range(titles_number)]
+    titles = []
+
+    for i, start in enumerate(starts):
+        stop = starts[i + 1] if i + 1 < titles_number else end
+        titles.append(
+            [
+                (u16be(vts, offset + pos), u16be(vts, offset + pos + 2))
+                for pos in range(start, stop - 3, 4)
+            ]
+        )
+
+    return titles
+
+
+def parse_pgcit(vts: bytes, offset: int) -> list:
+    pgcs_number = u16be(vts, offset)
+    pgcs = []
+
+    for i in range(pgcs_number):
+        pgc_offset = offset + u32be(vts, offset + 8 + i * 8 + 4)
+        pgcs.append(parse_pgc(vts, pgc_offset))
+
+    return pgcs
+
+
+def parse_pgc(vts: bytes, offset: int) -> dict:
+    programs_number = vts[offset + 2]
+    cells_number = vts[offset + 3]
+
+    program_map_offset = offset + u16be(vts, offset + 0xE6)
+    cell_playback_offset = offset + u16be(vts, offset + 0xE8)
+    cell_position_offset = offset + u16be(vts, offset + 0xEA)
+
+    cells = []
+    for i in range(cells_number):
+        playback = cell_playback_offset + i * 24
+        position = cell_position_offset + i * 4
+        cells.append(
+            {
+                "ix": i + 1,
+                "length": dvdtime_to_seconds(vts[playback + 4 : playback + 8]),
+                "block_mode": vts[playback] >> 6,
+                "block_type": (vts[playback] >> 4) & 0x03,
+                "first_sector": u32be(vts, playback + 8),
+                "last_sector": u32be(vts, playback + 20),
+                "vob_id": u16be(vts, position),
+                "cell_id": vts[position + 3],
+            }
+        )
+
+    return {
+        "length": dvdtime_to_seconds(vts[offset + 4 : offset + 8]),
+        "audio_control": [u16be(vts, offset + 0x0C + i * 2) for i in range(8)],
+        "subp_control": [u32be(vts, offset + 0x1C + i * 4) for i in range(32)],
+        "palette": [
+            u32be(vts, offset + 0xA4 + i * 4) & 0xFFFFFF for i in range(16)
+        ],
+        "program_map": list(
+            vts[program_map_offset : program_map_offset + programs_number]
+        ),
+        "cells": cells,
+    }
+
+
+def gen_track(ix: int, title: dict, vts: dict) -> dict:
+    ptts = vts["ptt"][title["ttn"] - 1] if title["ttn"] <= len(vts["ptt"]) else []
+    pgc = vts["pgcs"][(ptts[0][0] if ptts else 1) - 1]
+
+    audio = []
+    for i, control in enumerate(pgc["audio_control"]):
+        if control & 0x8000 and i < len(vts["audio"]):
+            audio.append(
+                {"ix": len(audio) + 1, "langcode": vts["audio"][i]["langcode"]}
+            )
+
+    # the substream number depends on the display mode: 4:3 or wide
+    subp_shift = 16 if vts["aspect"] == "16/9" else 24
+
+    subp = []
+    for i, control in enumerate(pgc["subp_control"]):
+        if control & 0x80000000 and i < len(vts["subp"]):
+            subp.append(
+                {
+                    "ix": len(subp) + 1,
+                    "langcode": vts["subp"][i]["langcode"],
+                    "streamid": 0x20 + ((control >> subp_shift) & 0x1F),
+                }
+            )
+
+    # like lsdvd, chapters are the programs of the title PGC
+    chapter = []
+    program_map = pgc["program_map"]
+    for i, startcell in enumerate(program_map):
+        if i + 1 < len(program_map):
+            endcell = program_map[i + 1]
+        else:
+            endcell = len(pgc["cells"]) + 1
+
+        length = sum(
+            cell["length"] for cell in pgc["cells"][startcell - 1 : endcell - 1]
+        )
+
+        chapter.append(
+            {"ix": i + 1, "length": round(length, 3), "startcell": startcell}
+        )
+
+    return {
+        "ix": ix,
+        "length": pgc["length"],
+        "vts": title["vts"],
+        "ttn": title["ttn"],
+        "vts_sector": title["vts_sector"],
+        "vobs_sector": vts["vobs_sector"],
+        "angles": title["angles"],
+        "format": vts["format"],
+        "aspect": vts["aspect"],
+        "width": vts["width"],
+        "height": vts["height"],
+        "palette": ["%06x" % (color) for color in pgc["palette"]],
+        "audio": audio,
+        "chapter": chapter,
+        "subp": subp,
+        "cell": pgc["cells"],
+    }
+
+
+def dvdtime_to_seconds(dvdtime: bytes) -> float:
+    hours, minutes, seconds = [bcd_to_int(byte) for byte in dvdtime[:3]]
+    frames = bcd_to_int(dvdtime[3] & 0x3F)
+
+    fps_bits = dvdtime[3] >> 6
+    fps = 25.0 if fps_bits == 1 else 29.97 if fps_bits == 3 else 0
+
+    ms = hours * 3600000 + minutes * 60000 + seconds * 1000
+    if fps:
+        ms += frames * 1000.0 / fps
+
+    return round(ms / 1000.0, 3)
+
+
+def decode_langcode(code: bytes) -> str:
+    langcode = bytes(code).decode("ascii", errors="ignore")
+
+    if len(langcode) != 2 or not langcode[0].isalpha():
+        return ""
+
+    return langcode
+
+
+def bcd_to_int(byte: int) -> int:
+    return (byte >> 4) * 10 + (byte & 0x0F)
+
+
+def u16be(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 2], "big")
+
+
+def u32be(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 4], "big")
+
+
+def u32le(data: bytes, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 4], "little")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import time
+from pathlib import Path
+
+from .disc import SECTOR_SIZE
+from .engine import format_seconds
+
+# 2 MiB reads keep the drive streaming
+IMAGE_BLOCK_SECTORS = 1024
+IMAGE_RETRIES = 2
+PROGRESS_INTERVAL = 2.0
+
+
+class ImageError(Exception):
+    pass
+
+
+class DiscImager:
+    # Copies a disc into an image file in one sequential pass. A block that
+    # cannot be read is read again sector by sector, sectors that still fail
+    # are filled with zeros and listed in bad_sectors.
+    def __init__(
+        self,
+        device: str,
+        outfile: Path,
+        block_sectors: int = IMAGE_BLOCK_SECTORS,
+        retries: int = IMAGE_RETRIES,
+        interval: float = PROGRESS_INTERVAL,
+    ):
+        self.device = device
+        self.outfile = Path(outfile)
+        self.block_size = block_sectors * SECTOR_SIZE
+        self.retries = retries
+        self.interval = interval
+        self.bad_sectors = []
+        self.size = None
+        # bytes of a partial image kept from an earlier run
+        self.resumed = 0
+        self.start = None
+        self.last_report = None
+
+    def run(self) -> float:
+        fd = os.open(self.device, os.O_RDONLY)
+
+        try:
+            self.size = os.lseek(fd, 0, os.SEEK_END)
+            if not self.size:
+                raise ImageError("%s is empty or not a disc" % (self.device))
+
+            tmp_file = self.outfile.with_name(self.outfile.name + ".part")
+            self.resumed = self._get_resume_offset(tmp_file)
+            needed = self.size - self.resumed
+
+            free = shutil.disk_usage(self.outfile.parent).free
+            if free < needed:
+                raise ImageError(
+                    "%.1f GiB needed for the image of %s, %.1f GiB free in %s"
+                    % (
+                        needed / 1073741824,
+                        self.device,
+                        free / 1073741824,
+                        self.outfile.parent,
+                    )
+                )
+
+            try:
+                self._copy(fd, tmp_file)
+            except BaseException:
+                self._remove_partial(tmp_file)
+                raise
+
+            tmp_file.replace(self.outfile)
+        finally:
+            os.close(fd)
+
+        seconds = time.monotonic() - self.start
+
+        print(
+            "imaged %.1f MiB in %s (%.1f MiB/s), %i unreadable sectors"
+            % (
+                (self.size - self.resumed) / 1048576,
+                format_seconds(seconds),
+                (self.size - self.resumed) / 1048576 / max(seconds, 0.001),
+                self.count_bad_sectors(),
+            )
+        )
+
+        return seconds
+
+    def count_bad_sectors(self) -> int:
+        return len(self.bad_sectors)
+
+    def _get_resume_offset(self, tmp_file: Path) -> int:
+        # bytes of a partial image that are kept, the copy starts from scratch
+        return 0
+
+    def _remove_partial(self, tmp_file: Path) -> None:
+        tmp_file.unlink(missing_ok=True)
+
+    def _copy(self, fd: int, outfile: Path) -> None:
+        self.start = time.monotonic()
+        self.last_report = self.start
+
+        with outfile.open(mode="wb") as out:
+            position = 0
+
+            while position < self.size:
+                length = min(self.block_size, self.size - position)
+                out.write(self._read_block(fd, position, length))
+                position += length
+                self._report(position)
+
+    def _read_block(self, fd: int, position: int, length: int) -> bytes:
+        try:
+            return self._read(fd, position, length)
+        except OSError:
+            pass
+
+        data = bytearray()
+
+        for offset in range(0, length, SECTOR_SIZE):
+            sector_length = min(SECTOR_SIZE, length - offset)
+
+            try:
+                data += self._read(fd, position + offset, sector_length)
+            except OSError:
+                self.bad_sectors.append((position + offset) // SECTOR_SIZE)
+                data += bytes(sector_length)
+
+        return bytes(data)
+
+    def _read(self, fd: int, position: int, length: int, retries: int = None) -> bytes:
+        if retries is None:
+            retries = self.retries
+
+        for attempt in range(retries + 1):
+            try:
+                data = self._pread(fd, length, position)
+            except OSError:
+                if attempt == retries:
+                    raise
+                continue
+
+            if len(data) == length:
+                return data
+
+            if attempt == retries:
+                raise OSError(errno.EIO, "short read at byte %i" % (position))
+
+    def _pread(self, fd: int, length: int, position: int) -> bytes:
+        return os.pread(fd, length, position)
+
+    def _report(self, position: int) -> None:
+        now = time.monotonic()
+
+        if position < self.size and now - self.last_report < self.interval:
+            return
+
+        self.last_report = now
+        elapsed = max(now - self.start, 0.001)
+        read = max(position - self.resumed, 1)
+        line = "image: %3i%% %.1f MiB (%.1f MiB/s)" % (
+            position * 100 // self.size,
+            position / 1048576,
+            read / 1048576 / elapsed,
+        )
+
+        if position < self.size:
+            eta = elapsed * (self.size - position) / read
+            line += " ETA %s" % (format_seconds(eta))
+
+        if self.count_bad_sectors():
+            line += ", %i unreadable sectors" % (self.count_bad_sectors())
+
+        print(line)
+
+
+def gen_image_filename(device: str, image_dir: Path, key: str = None) -> Path:
+    # with the disc fingerprint, another disc in the drive gets its own image
+    name = Path(device).name or "dvd"
+
+    if key:
+        name += "." + key[:12]
+
+    return Path(image_dir) / ("%s.image.iso" % (name))
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import mmap
+from pathlib import Path
+
+SECTOR_SIZE = 2048
+
+ISO9660_PVD_SECTOR = 16
+UDF_ANCHOR_SECTOR = 256
+
+# UDF descriptor tag identifiers
+TAG_PRIMARY_VOLUME = 1
+TAG_ANCHOR = 2
+TAG_PARTITION = 5
+TAG_LOGICAL_VOLUME = 6
+TAG_TERMINATING = 8
+TAG_FILE_SET = 256
+TAG_FILE_IDENTIFIER = 257
+TAG_FILE_ENTRY = 261
+TAG_EXTENDED_FILE_ENTRY = 266
+
+
+class IsoFsError(Exception):
+    pass
+
+
+class IsoImage:
+    # Reads VIDEO_TS of a DVD image: from UDF if it has one, from ISO 9660 if not.
+    # The image is mapped once and files are served as slices of the mapping.
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = self.path.open(mode="rb")
+
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self.file.close()
+            raise IsoFsError("%s can not be mapped" % (path))
+
+        self.view = memoryview(self.data)
+        self.volume_id = ""
+        # name: list of (offset, length) in bytes
+        self.files = {}
+
+        try:
+            if self._has_udf():
+                self.filesystem = "UDF"
+                UdfReader(self).read_video_ts()
+            elif self._has_iso9660():
+                self.filesystem = "ISO9660"
+                Iso9660Reader(self).read_video_ts()
+            else:
+                raise IsoFsError("%s is not an ISO 9660 or UDF image" % (path))
+        except IsoFsError:
+            self.close()
+            raise
+        except (IndexError, ValueError):
+            self.close()
+            raise IsoFsError("%s has a broken file system" % (path))
+
+    def sector(self, number: int, count: int = 1) -> memoryview:
+        offset = number * SECTOR_SIZE
+        if offset + count * SECTOR_SIZE > len(self.view):
+            raise IsoFsError("sector %i is out of the image" % (number))
+
+        return self.view[offset : offset + count * SECTOR_SIZE]
+
+    def extent_views(self, name: str) -> list:
+        return [
+            self.view[offset : offset + length] for offset, length in self.extents(name)
+        ]
+
+    def extents(self, name: str) -> list:
+        if name not in self.files:
+            raise IsoFsError("%s not found" % (name))
+
+        return self.files[name]
+
+    def read_file(self, name: str):
+        views = self.extent_views(name)
+
+        # a file of one extent needs no copy
+        if len(views) == 1:
+            return views[0]
+
+        return b"".join(views)
+
+    def file_extents(self, name: str) -> list:
+        if name not in self.files:
+            return []
+
+        return [(self.path, offset, length) for offset, length in self.files[name]]
+
+    def extract(self, name: str, outfile: Path) -> None:
+        with outfile.open(mode="wb") as f:
+            for view in self.extent_views(name):
+                f.write(view)
+
+    def get_volume_id(self) -> str:
+        return self.volume_id or "unknown"
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.view.release()
+            try:
+                self.data.close()
+            except BufferError:
+                # slices are still in use, the mapping is closed with the last one
+                pass
+            self.data = None
+        self.file.close()
+
+    def _has_udf(self) -> bool:
+        if len(self.view) < (UDF_ANCHOR_SECTOR + 1) * SECTOR_SIZE:
+            return False
+
+        return u16le(self.sector(UDF_ANCHOR_SECTOR), 0) == TAG_ANCHOR
+
+    def _has_iso9660(self) -> bool:
+        if len(self.view) < (ISO9660_PVD_SECTOR + 1) * SECTOR_SIZE:
+            return False
+
+        return self.sector(ISO9660_PVD_SECTOR)[1:6] == b"CD001"
+
+
+class Iso9660Reader:
+    def __init__(self, image: IsoImage):
+        self.image = image
+
+    def read_video_ts(self) -> None:
+        pvd = self.image.sector(ISO9660_PVD_SECTOR)
+        self.image.volume_id = decode_ascii(pvd[40:72])
+
+        root = pvd[156:190]
+        video_ts = self._find_dir((u32le(root, 2), u32le(root, 10)), "VIDEO_TS")
+        if video_ts is None:
+            raise IsoFsError("VIDEO_TS not found in %s" % (self.image.path))
+
+        for name, extent, size, flags in self._read_dir(*video_ts):
+            if flags & 0x02:
+                continue
+
+            # a file larger than 4 GiB is split into several records
+            self.image.files.setdefault(name, []).append(
+                (extent * SECTOR_SIZE, size)
+            )
+
+    def _find_dir(self, parent: tuple, name: str) -> tuple:
+        for entry_name, extent, size, flags in self._read_dir(*parent):
+            if entry_name == name and flags & 0x02:
+                return extent, size
+
+        return None
+
+    def _read_dir(self, extent: int, size: int):
+        data = self.image.sector(extent, -(-size // SECTOR_SIZE))[:size]
+        pos = 0
+
+        while pos < len(data):
+            length = data[pos]
+
+            if length == 0:
+                # records do not cross sector boundaries
+                pos = (pos // SECTOR_SIZE + 1) * SECTOR_SIZE
+                continue
+
+            record = data[pos : pos + length]
+            name = bytes(record[33 : 33 + record[32]])
+
+            if name not in (b"\x00", b"\x01"):
+                name = name.decode("ascii", errors="ignore").split(";")[0]
+                yield name.upper(), u32le(record, 2), u32le(record, 10), record[25]
+
+            pos += length
+
+
+class UdfReader:
+    def __init__(self, image: IsoImage):
+        self.image = image
+        self.partition_start = None
+
+    def read_video_ts(self) -> None:
+        anchor = self.image.sector(UDF_ANCHOR_SECTOR)
+        vds_length = u32le(anchor, 16)
+        vds_sector = u32le(anchor, 20)
+
+        file_set = None
+
+        for i in range(vds_length // SECTOR_SIZE):
+            descriptor = self.image.sector(vds_sector + i)
+            tag = u16le(descriptor, 0)
+
+            if tag == TAG_PRIMARY_VOLUME:
+                self.image.volume_id = decode_dstring(descriptor[24:56])
+            elif tag == TAG_PARTITION:
+                self.partition_start = u32le(descriptor, 188)
+            elif tag == TAG_LOGICAL_VOLUME:
+                # long_ad of the file set descriptor
+                file_set = u32le(descriptor, 252)
+            elif tag == TAG_TERMINATING:
+                break
+
+        if self.partition_start is None or file_set is None:
+            raise IsoFsError("UDF volume of %s is incomplete" % (self.image.path))
+
+        fsd = self._block(file_set)
+        if u16le(fsd, 0) != TAG_FILE_SET:
+            raise IsoFsError("UDF file set of %s not found" % (self.image.path))
+
+        root = self._read_dir(u32le(fsd, 404))
+        if "VIDEO_TS" not in root or not root["VIDEO_TS"][1]:
+            raise IsoFsError("VIDEO_TS not found in %s" % (self.image.path))
+
+        for name, (icb, is_dir) in self._read_dir(root["VIDEO_TS"][0]).items():
+            if not is_dir:
+                self.image.files[name] = self._file_extents(icb)
+
+    def _block(self, lbn: int) -> memoryview:
+        return self.image.sector(self.partition_start + lbn)
+
+    def _file_extents(self, icb: int) -> list:
+        entry = self._block(icb)
+        tag = u16le(entry, 0)
+
+        if tag == TAG_FILE_ENTRY:
+            ea_length, ad_length, ad_pos = u32le(entry, 168), u32le(entry, 172), 176
+        elif tag == TAG_EXTENDED_FILE_ENTRY:
+            ea_length, ad_length, ad_pos = u32le(entry, 208), u32le(entry, 212), 216
+        else:
+            raise IsoFsError("UDF file entry %i is not valid" % (icb))
+
+        size = u64le(entry, 56)
+        ad_type = u16le(entry, 34) & 0x07
+        ad_pos += ea_length
+
+        if ad_type == 3:
+            # the data is embedded in the file entry
+            offset = (self.partition_start + icb) * SECTOR_SIZE + ad_pos
+            return [(offset, size)]
+
+        ad_size = 8 if ad_type == 0 else 16
+        extents = []
+
+        for pos in range(ad_pos, ad_pos + ad_length, ad_size):
+            length = u32le(entry, pos) & 0x3FFFFFFF
+            if length == 0:
+                break
+
+            offset = (self.partition_start + u32le(entry, pos + 4)) * SECTOR_SIZE
+            extents.append((offset, length))
+
+        return extents
+
+    def _read_dir(self, icb: int) -> dict:
+        data = b"".join(
+            self.image.view[offset : offset + length]
+            for offset, length in self._file_extents(icb)
+        )
+        entries = {}
+        pos = 0
+
+        while pos + 38 <= len(data):
+            if u16le(data, pos) != TAG_FILE_IDENTIFIER:
+                break
+
+            characteristics = data[pos + 18]
+            id_length = data[pos + 19]
+            entry_icb = u32le(data, pos + 24)
+            iu_length = u16le(data, pos + 36)
+            name_pos = pos + 38 + iu_length
+
+            # skip the parent directory entry
+            if not characteristics & 0x08:
+                name = decode_dchars(data[name_pos : name_pos + id_length])
+                entries[name.upper()] = (entry_icb, bool(characteristics & 0x02))
+
+            pos += (38 + iu_length + id_length + 3) & ~3
+
+        return entries
+
+
+def decode_dchars(data) -> str:
+    if not data:
+        return ""
+
+    if data[0] == 16:
+        return bytes(data[1:]).decode("utf-16-be", errors="ignore")
+
+    return bytes(data[1:]).decode("latin-1")
+
+
+def decode_dstring(data) -> str:
+    # the last byte is the length of the string
+    length = data[-1]
+    return decode_dchars(data[:length]).strip() if length else ""
+
+
+def decode_ascii(data) -> str:
+    return bytes(data).decode("ascii", errors="ignore").strip()
+
+
+def u16le(data, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 2], "little")
+
+
+def u32le(data, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 4], "little")
+
+
+def u64le(data, offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 8], "little")
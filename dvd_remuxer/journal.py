@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+JOURNAL_VERSION = 1
+
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+
+def file_checksum(file: Path) -> str:
+    # Hash the size and blocks at the start, middle and end of the file.
+    # The exact size catches truncation, the sampled blocks catch a file
+    # replaced by other content, and verification stays cheap for 8 GB VOBs.
+    size = file.stat().st_size
+    digest = hashlib.blake2b(b"%i" % (size), digest_size=20)
+
+    offsets = {
+        0,
+        max(0, size // 2 - CHECKSUM_BLOCK_SIZE // 2),
+        max(0, size - CHECKSUM_BLOCK_SIZE),
+    }
+
+    with file.open(mode="rb") as f:
+        for offset in sorted(offsets):
+            f.seek(offset)
+            digest.update(f.read(CHECKSUM_BLOCK_SIZE))
+
+    return digest.hexdigest()
+
+
+class Journal:
+    def __init__(self, path: Path):
+        self.path = path
+        self.stages = {}
+        # subtitles are recorded from several threads with --sub-jobs
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with self.path.open(mode="r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == JOURNAL_VERSION:
+            self.stages = data.get("stages", {})
+
+    def save(self) -> None:
+        tmp_file = self.path.with_suffix(".tmp")
+
+        with self.lock:
+            with tmp_file.open(mode="w") as f:
+                json.dump(
+                    {"version": JOURNAL_VERSION, "stages": self.stages}, f, indent=2
+                )
+
+            # replace is atomic, a crash never leaves a half written journal
+            os.replace(tmp_file, self.path)
+
+    def is_done(self, stage: str, files: list) -> bool:
+        entry = self.stages.get(stage)
+
+        if not entry or [str(file) for file in files] != list(entry["files"]):
+            return False
+
+        for file in files:
+            record = entry["files"][str(file)]
+
+            try:
+                if file.stat().st_size != record["size"]:
+                    return False
+
+                if file_checksum(file) != record["checksum"]:
+                    return False
+            except OSError:
+                return False
+
+        return True
+
+    def record(self, stage: str, files: list, min_size: int = None) -> bool:
+        # min_size comes from the IFO sectors of the title, a smaller file is a
+        # dump that stopped early
+        records = {}
+
+        for file in files:
+            try:
+                size = file.stat().st_size
+            except OSError:
+                print("WARNING: %s is missing" % (file.name))
+                self.forget(stage)
+                return False
+
+            if min_size and size < min_size:
+                print(
+                    "WARNING: %s is incomplete: %i of at least %i bytes"
+                    % (file.name, size, min_size)
+                )
+                self.forget(stage)
+                return False
+
+            records[str(file)] = {
+                "size": size,
+                "min_size": min_size,
+                "checksum": file_checksum(file),
+            }
+
+        with self.lock:
+            self.stages[stage] = {"files": records}
+            self.save()
+
+        return True
+
+    def forget(self, stage: str) -> None:
+        with self.lock:
+            if self.stages.pop(stage, None) is not None:
+                self.save()
+
+    def remove(self) -> None:
+        with self.lock:
+            self.stages = {}
+            self.path.unlink(missing_ok=True)
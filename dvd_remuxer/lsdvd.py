@@ -5,22 +5,35 @@ from __future__ import annotations
 import subprocess
 import ast
 import re
-import json
 
+from . import ifo
+from .disc import Disc
+from .tools import get_tool_path
 
-class lsdvd:
-    def __init__(self, lsdvd_dict):
-        self.__dict__.update(lsdvd_dict)
+
+class lsdvd(Disc):
+    __slots__ = ()
+
+    @classmethod
+    def read(cls, device: str, tools_dir: str = None) -> lsdvd:
+        return cls.from_dict(cls.read_dict(device, tools_dir))
 
     @classmethod
-    def read(cls, device: str) -> lsdvd:
-        data_dict = cls.get_dvd_info(cls.get_lsdvd_output(device))
+    def read_dict(cls, device: str, tools_dir: str = None) -> dict:
+        data_dict = cls.get_native_dvd_info(device)
 
-        # using json.loads method and passing json.dumps
-        # method and custom object hook as arguments
-        lsdvd_obj = json.loads(json.dumps(data_dict), object_hook=cls)
+        if not data_dict:
+            data_dict = cls.get_dvd_info(cls.get_lsdvd_output(device, tools_dir))
 
-        return lsdvd_obj
+        return data_dict
+
+    @staticmethod
+    def get_native_dvd_info(device: str) -> dict:
+        # Read IFO files directly, lsdvd is used if it fails
+        try:
+            return ifo.read(device)
+        except Exception:
+            return None
 
     @staticmethod
     def get_dvd_info(lsdvd_output: str) -> dict:
@@ -38,16 +51,19 @@ class lsdvd:
         return lsdvd_data
 
     @staticmethod
-    def get_printable_dvd_info(device: str) -> str:
-        subprocess.run(["lsdvd", "-x", device])
+    def get_printable_dvd_info(device: str, tools_dir: str = None) -> str:
+        subprocess.run([get_tool_path("lsdvd", tools_dir), "-x", device])
 
     @staticmethod
     def clear_lsdvd_output(lsdvd_output: str) -> str:
         return re.sub("(?m)^libdvdread:.*\n?", "", lsdvd_output).replace("lsdvd = ", "")
 
     @staticmethod
-    def get_lsdvd_output(device: str) -> str:
-        data = subprocess.Popen(["lsdvd", "-x", "-Oy", device], stdout=subprocess.PIPE)
+    def get_lsdvd_output(device: str, tools_dir: str = None) -> str:
+        data = subprocess.Popen(
+            [get_tool_path("lsdvd", tools_dir), "-x", "-Oy", device],
+            stdout=subprocess.PIPE,
+        )
         return data.communicate()[0].decode("utf-8", errors="ignore")
 
     def all_titles_idx(self) -> list:
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+from .disc import Disc, Title
+
+# titles shorter than this share of the longest one are not candidates
+CANDIDATE_LENGTH_SHARE = 0.5
+
+REPEAT_PENALTY = 2.0
+BACKWARD_PENALTY = 1.0
+REUSE_WEIGHT = 0.5
+CHAPTERS_WEIGHT = 0.1
+MAX_SCORED_CHAPTERS = 10
+
+
+class TitleScore:
+    __slots__ = ("title", "score", "contiguous", "backward", "repeated", "reused")
+
+    def __init__(self, title: Title):
+        self.title = title
+        self.score = 0.0
+        self.contiguous = 0
+        self.backward = 0
+        self.repeated = 0
+        self.reused = 0.0
+
+    def describe(self) -> str:
+        return (
+            "title #%i: score %.2f, %i cells, %i contiguous, %i backward jumps,"
+            " %i repeated, %.0f%% shared"
+            % (
+                self.title.ix,
+                self.score,
+                len(cell_keys(self.title)),
+                self.contiguous,
+                self.backward,
+                self.repeated,
+                self.reused * 100,
+            )
+        )
+
+
+def cell_keys(title: Title) -> list:
+    return [
+        (title.vts, cell.first_sector, cell.last_sector)
+        for cell in title.playback_cells()
+        if cell.first_sector is not None and cell.last_sector is not None
+    ]
+
+
+def score_titles(titles: list) -> list:
+    # The real feature plays its cells once and in the order they are stored
+    # on the disc. Fake titles of obfuscated discs play the same cells in
+    # another order, repeat some of them or add cells no other title uses.
+    longest = max(title.length for title in titles)
+    candidates = [
+        title
+        for title in titles
+        if cell_keys(title) and title.length >= longest * CANDIDATE_LENGTH_SHARE
+    ]
+
+    usage = {}
+    for title in candidates:
+        for key in set(cell_keys(title)):
+            usage[key] = usage.get(key, 0) + 1
+
+    scores = []
+
+    for title in candidates:
+        keys = cell_keys(title)
+        result = TitleScore(title)
+
+        for prev, cur in zip(keys, keys[1:]):
+            if cur[0] != prev[0]:
+                continue
+
+            if cur[1] == prev[2] + 1:
+                result.contiguous += 1
+            elif cur[1] <= prev[2]:
+                result.backward += 1
+
+        transitions = max(len(keys) - 1, 1)
+        result.repeated = len(keys) - len(set(keys))
+
+        if len(candidates) > 1:
+            result.reused = sum(1 for key in keys if usage[key] > 1) / len(keys)
+
+        result.score = (
+            (result.contiguous / transitions if len(keys) > 1 else 1.0)
+            - BACKWARD_PENALTY * result.backward / transitions
+            - REPEAT_PENALTY * result.repeated / len(keys)
+            + REUSE_WEIGHT * result.reused
+            + CHAPTERS_WEIGHT
+            * min(len(title.chapter), MAX_SCORED_CHAPTERS)
+            / MAX_SCORED_CHAPTERS
+        )
+
+        scores.append(result)
+
+    # the longer title wins a tie, then the first one
+    return sorted(
+        scores,
+        key=lambda result: (
+            -round(result.score, 6),
+            -result.title.length,
+            result.title.ix,
+        ),
+    )
+
+
+def find_main_feature(disc: Disc, verbose=False) -> int:
+    scores = score_titles(disc.track) if disc.track else []
+
+    if not scores:
+        # no cell address table, e.g. from an old lsdvd
+        return disc.longest_track
+
+    if verbose:
+        for result in scores:
+            print(result.describe())
+
+    return scores[0].title.ix
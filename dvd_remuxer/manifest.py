@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+from .journal import file_checksum
+from .tools import get_tool_path, get_tools_dir
+
+MANIFEST_VERSION = 1
+
+# the first line printed by each tool names its version
+VERSION_CMDS = {
+    "mkvmerge": ["mkvmerge", "--version"],
+    "mplayer": ["mplayer"],
+    "mencoder": ["mencoder"],
+}
+VERSION_TIMEOUT = 10
+
+_tool_versions = {}
+_tool_versions_lock = threading.Lock()
+
+
+def get_tool_version(name: str, tools_dir: str = None) -> str:
+    # cached per tools directory, the tools do not change during a run
+    key = (name, get_tools_dir(tools_dir))
+
+    with _tool_versions_lock:
+        if key not in _tool_versions:
+            _tool_versions[key] = read_tool_version(name, tools_dir)
+
+        return _tool_versions[key]
+
+
+def read_tool_version(name: str, tools_dir: str = None) -> str:
+    cmd = VERSION_CMDS[name]
+
+    try:
+        result = subprocess.run(
+            [get_tool_path(cmd[0], tools_dir)] + cmd[1:],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            timeout=VERSION_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    for line in result.stdout.decode("utf-8", errors="ignore").splitlines():
+        if line.strip():
+            return line.strip()
+
+    return None
+
+
+def get_outputs(outfile: Path) -> list:
+    if outfile.exists():
+        return [outfile]
+
+    # mkvmerge --split numbers the files: NAME-001.mkv, NAME-002.mkv, ...
+    return sorted(
+        outfile.parent.glob("%s-[0-9][0-9][0-9]%s" % (outfile.stem, outfile.suffix))
+    )
+
+
+class OutputManifest:
+    # Stored next to the MKV, it describes everything the output was made from.
+    # A later job with the same inputs finds a valid output and skips the remux.
+    def __init__(self, outfile: Path, inputs: dict):
+        self.outfile = outfile
+        self.path = outfile.with_name(outfile.name + ".manifest.json")
+        self.inputs = inputs
+        self.key = hashlib.sha1(
+            json.dumps(inputs, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def is_current(self) -> bool:
+        try:
+            with self.path.open(mode="r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != MANIFEST_VERSION or data.get("key") != self.key:
+            return False
+
+        outputs = get_outputs(self.outfile)
+        records = data.get("outputs", {})
+
+        if not outputs or [file.name for file in outputs] != sorted(records):
+            return False
+
+        for file in outputs:
+            try:
+                if file.stat().st_size != records[file.name]["size"]:
+                    return False
+
+                if file_checksum(file) != records[file.name]["checksum"]:
+                    return False
+            except OSError:
+                return False
+
+        return True
+
+    def save(self) -> bool:
+        outputs = get_outputs(self.outfile)
+        if not outputs:
+            return False
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "key": self.key,
+            "inputs": self.inputs,
+            "outputs": {
+                file.name: {
+                    "size": file.stat().st_size,
+                    "checksum": file_checksum(file),
+                }
+                for file in outputs
+            },
+        }
+
+        tmp_file = self.path.with_suffix(".tmp%i" % (os.getpid()))
+        with tmp_file.open(mode="w") as f:
+            json.dump(data, f, indent=2)
+        tmp_file.replace(self.path)
+
+        return True
@@ -21,6 +21,18 @@ def get_int_list(parser, title_idx):
     return int_numbers
 
 
+def get_positive_int(parser, number_str):
+    try:
+        number = int(number_str)
+    except ValueError:
+        number = 0
+
+    if number < 1:
+        parser.error("%s is not a positive integer" % number_str)
+
+    return number
+
+
 def get_str_list(parser, langcodes):
     return langcodes.split(",")
 
@@ -60,6 +72,145 @@ def create_argparser():
         type=lambda path: is_valid_path(argparser, path),
     )
 
+    add_remux_arguments(argparser)
+
+    argparser.add_argument(
+        "--plan",
+        metavar="FILE",
+        help="write the stages of the selected titles to FILE as a JSON graph with"
+        + " the commands, files, dependencies and estimated bytes, and exit."
+        + " Not work with --use-sys-tmp-dir",
+    )
+
+    argparser.add_argument(
+        "--execute-plan",
+        dest="execute_plan",
+        metavar="FILE",
+        help="run the stages of a plan written by --plan, --jobs stages at once."
+        + " PATH replaces the disc path of the plan",
+    )
+
+    return argparser
+
+
+def create_batch_argparser():
+    argparser = argparse.ArgumentParser(
+        description="DVD Remuxer batch mode",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=textwrap.dedent(
+            """\
+            SOURCE is one of:
+            - directory with ISO images and/or VIDEO_TS folders
+            - glob pattern, e.g. '/media/archive/**/*.iso'
+            - manifest file with one disc path per line"""
+        ),
+    )
+
+    argparser.add_argument(
+        "source",
+        metavar="SOURCE",
+        help="discs to remux",
+    )
+
+    add_remux_arguments(argparser)
+
+    argparser.add_argument(
+        "--device-jobs",
+        dest="device_jobs",
+        metavar="N",
+        default=1,
+        type=lambda number_str: get_positive_int(argparser, number_str),
+        help="process at most N titles in parallel from one storage device"
+        + " (default: 1). --jobs sets the limit for all devices",
+    )
+
+    argparser.add_argument(
+        "--output-dir",
+        dest="output_dir",
+        metavar="DIR",
+        default=".",
+        help="store the output of each disc in a subdirectory of DIR",
+    )
+
+    argparser.add_argument(
+        "--summary",
+        metavar="FILE",
+        help="write a JSON summary of all jobs to FILE",
+    )
+
+    # the options of a single disc only
+    argparser.set_defaults(plan=None, execute_plan=None)
+
+    return argparser
+
+
+def create_daemon_argparser():
+    argparser = argparse.ArgumentParser(
+        description="DVD Remuxer daemon",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=textwrap.dedent(
+            """\
+            Requests are JSON objects, one per line:
+            - {"command": "submit", "args": ["--all", "/media/disc.iso"]}
+            - {"command": "status"} or {"command": "status", "job": 1}
+            - {"command": "cancel", "job": 1}
+            The remux options below apply to the discs of the watched folders."""
+        ),
+    )
+
+    argparser.add_argument(
+        "--socket",
+        metavar="PATH",
+        required=True,
+        help="accept jobs on the Unix domain socket PATH",
+    )
+
+    argparser.add_argument(
+        "--watch",
+        metavar="DIR",
+        action="append",
+        default=[],
+        help="remux new ISO images and VIDEO_TS folders put into DIR."
+        + " Can be given several times",
+    )
+
+    argparser.add_argument(
+        "--poll-interval",
+        dest="poll_interval",
+        metavar="SECONDS",
+        default=5.0,
+        type=float,
+        help="look for new discs every SECONDS (default: 5). A disc is taken"
+        + " when it did not change between two looks",
+    )
+
+    add_remux_arguments(argparser)
+
+    argparser.add_argument(
+        "--device-jobs",
+        dest="device_jobs",
+        metavar="N",
+        default=1,
+        type=lambda number_str: get_positive_int(argparser, number_str),
+        help="process at most N discs in parallel from one storage device"
+        + " (default: 1). --jobs sets the limit for all devices",
+    )
+
+    argparser.add_argument(
+        "--output-dir",
+        dest="output_dir",
+        metavar="DIR",
+        default=".",
+        help="store the output of each disc in a subdirectory of DIR",
+    )
+
+    # the options of a single disc only
+    argparser.set_defaults(plan=None, execute_plan=None)
+
+    return argparser
+
+
+def add_remux_arguments(argparser):
     argparser.add_argument(
         "--dvd-title",
         dest="title_idx",
@@ -72,6 +223,38 @@ def create_argparser():
         "--all", dest="all_titles", action="store_true", help="remux all titles"
     )
 
+    argparser.add_argument(
+        "--main-feature",
+        dest="main_feature",
+        action="store_true",
+        help="remux the main feature, found by the cell order of the titles instead"
+        + " of the length, for discs with many fake titles",
+    )
+
+    argparser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="with --all skip titles that play the same cells or the same content"
+        + " as a longer title",
+    )
+
+    argparser.add_argument(
+        "--sector-order",
+        dest="sector_order",
+        action="store_true",
+        help="process the titles in the order of their sectors on the disc instead"
+        + " of the given order, to save seeks of optical drives",
+    )
+
+    argparser.add_argument(
+        "--merge-reads",
+        dest="merge_reads",
+        action="store_true",
+        help="with --jobs run titles whose sectors follow each other in one worker,"
+        + " so their dumps read the disc without long seeks. mencoder still"
+        + " reads the title again for each subtitle",
+    )
+
     argparser.add_argument(
         "--action",
         choices=["remux_to_mkv", "stream", "subs", "chapters"],
@@ -108,6 +291,54 @@ def create_argparser():
         help="keep additional subtitles for language. Default 'ru', 'en'",
     )
 
+    argparser.add_argument(
+        "--image-first",
+        dest="image_first",
+        action="store_true",
+        help="copy the whole disc of a drive to an image in one sequential pass"
+        + " first and remux from the image, so the drive is read only once",
+    )
+
+    argparser.add_argument(
+        "--rescue",
+        action="store_true",
+        help="like --image-first for damaged discs: skip unreadable and slow areas"
+        + " in growing steps, fill them with zeros and keep a bad block map of the"
+        + " disc, so the next runs skip them at once. A slow read is noticed only"
+        + " after the drive returns it, its own retries can still take minutes."
+        + " An interrupted rescue resumes from its partial image",
+    )
+
+    argparser.add_argument(
+        "--recover",
+        action="store_true",
+        help="--rescue and read the sectors of the bad block map again, one by one",
+    )
+
+    argparser.add_argument(
+        "--native-dump",
+        dest="native_dump",
+        action="store_true",
+        help="copy the title cells from VIDEO_TS or an ISO image directly"
+        + " instead of running mplayer -dumpstream",
+    )
+
+    argparser.add_argument(
+        "--native-vobsub",
+        dest="native_vobsub",
+        action="store_true",
+        help="extract all subtitles from the dumped stream in one pass"
+        + " instead of running mencoder for each subtitle",
+    )
+
+    argparser.add_argument(
+        "--stream-mux",
+        dest="stream_mux",
+        action="store_true",
+        help="pipe the dumped stream straight into mkvmerge through a FIFO"
+        + " instead of writing a temp VOB file",
+    )
+
     argparser.add_argument(
         "--aspect-ratio",
         dest="aspect_ratio",
@@ -122,12 +353,84 @@ def create_argparser():
         help="split video by chapters",
     )
 
+    argparser.add_argument(
+        "--jobs",
+        metavar="N",
+        default=1,
+        type=lambda number_str: get_positive_int(argparser, number_str),
+        help="process N titles in parallel (default: 1)",
+    )
+
+    argparser.add_argument(
+        "--sub-jobs",
+        dest="sub_jobs",
+        metavar="N",
+        default=1,
+        type=lambda number_str: get_positive_int(argparser, number_str),
+        help="extract N subtitles in parallel with mencoder (default: 1)",
+    )
+
+    # both decide how the titles run
+    title_runner = argparser.add_mutually_exclusive_group()
+
+    title_runner.add_argument(
+        "--async",
+        dest="async_engine",
+        action="store_true",
+        help="run the tools of all titles from one event loop and show the progress"
+        + " and ETA of each title, --jobs sets how many titles run at once",
+    )
+
+    title_runner.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="dump the next title while the previous one is merged."
+        + " Not work with --async and --jobs",
+    )
+
+    argparser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write the timing of every stage to FILE in Chrome trace format",
+    )
+
     argparser.add_argument(
         "--info",
         action="store_true",
         help="show DVD info",
     )
 
+    argparser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="do not use the DVD info cache",
+    )
+
+    argparser.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        help="keep a journal of finished stages and skip them on the next run."
+        + " Not work with --use-sys-tmp-dir",
+    )
+
+    argparser.add_argument(
+        "--tools-dir",
+        dest="tools_dir",
+        metavar="DIR",
+        type=lambda path: is_valid_path(argparser, path),
+        help="run lsdvd, mplayer, mencoder and mkvmerge from DIR if they are there"
+        + " (default: $DVD_REMUXER_TOOLS_DIR or PATH)",
+    )
+
+    argparser.add_argument(
+        "--staging",
+        action="store_true",
+        help="keep the temp files of a title in tmpfs if they fit there, on the"
+        + " output file system if not, and check the free space before the dump",
+    )
+
     argparser.add_argument(
         "--use-sys-tmp-dir",
         dest="use_sys_tmp_dir",
@@ -144,7 +447,7 @@ def create_argparser():
     argparser.add_argument(
         "--rewrite",
         action="store_true",
-        help="rewrite files",
+        help="rewrite files, also remux titles whose output is up to date",
     )
 
     argparser.add_argument(
@@ -160,9 +463,29 @@ def create_argparser():
         help="only print commands that should be executed",
     )
 
-    return argparser
+
+def check_args(argparser, args):
+    # the titles of one disc run in a pool with --jobs, one by one with --pipeline
+    if args.pipeline and args.jobs > 1:
+        argparser.error("--pipeline does not work with --jobs %i" % args.jobs)
+
+    # the system temp directory is removed before the plan runs
+    if args.plan and args.use_sys_tmp_dir:
+        argparser.error("--plan does not work with --use-sys-tmp-dir")
+
+    return args
 
 
 def parse_args():
     argparser = create_argparser()
+    return check_args(argparser, argparser.parse_args())
+
+
+def parse_batch_args():
+    argparser = create_batch_argparser()
+    return argparser.parse_args()
+
+
+def parse_daemon_args():
+    argparser = create_daemon_argparser()
     return argparser.parse_args()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from pathlib import Path
+
+from .dvdremux import DVDRemuxer
+
+_end_of_titles = None
+
+
+class RemuxPipeline:
+    # The read lane dumps streams, subtitles and chapters from the disc, the
+    # write lane runs mkvmerge. A bounded queue between them limits how many
+    # dumped titles may wait for the merge.
+    def __init__(self, remuxer: DVDRemuxer, queue_size: int = 1, verbose=False):
+        self.remuxer = remuxer
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.verbose = verbose
+        self.errors = []
+        self.outfiles = []
+
+    def run(self, titles: list, outdir: Path) -> list:
+        # titles is a list of (title_idx, audio_params, subs_params)
+        reader = threading.Thread(
+            target=self._read_lane, args=(titles, outdir), daemon=True
+        )
+        reader.start()
+
+        self._write_lane()
+
+        reader.join()
+
+        if self.errors:
+            raise Exception(
+                "Failed titles: %s"
+                % (", ".join("#%i" % (idx) for idx, error in sorted(self.errors)))
+            )
+
+        return self.outfiles
+
+    def _read_lane(self, titles: list, outdir: Path) -> None:
+        for title_idx, audio_params, subs_params in titles:
+            self._log("read", title_idx, "dump started")
+            start = time.monotonic()
+
+            try:
+                job = self.remuxer.prepare_remux(
+                    title_idx, audio_params, subs_params, outdir
+                )
+            except Exception as inst:
+                self._fail("read", title_idx, inst)
+                continue
+
+            self._log(
+                "read",
+                title_idx,
+                "dump finished in %.1fs" % (time.monotonic() - start),
+            )
+
+            start = time.monotonic()
+            self.queue.put(job)
+            self._log(
+                "read",
+                title_idx,
+                "queued for merge, waited %.1fs" % (time.monotonic() - start),
+            )
+
+        self.queue.put(_end_of_titles)
+
+    def _write_lane(self) -> None:
+        while True:
+            start = time.monotonic()
+            job = self.queue.get()
+
+            if job is _end_of_titles:
+                return
+
+            self._log(
+                "write",
+                job.title_idx,
+                "merge started, waited %.1fs" % (time.monotonic() - start),
+            )
+            start = time.monotonic()
+
+            try:
+                self.outfiles.append(self.remuxer.merge_remux(job))
+            except Exception as inst:
+                self._fail("write", job.title_idx, inst)
+                continue
+
+            self._log(
+                "write",
+                job.title_idx,
+                "merge finished in %.1fs" % (time.monotonic() - start),
+            )
+
+    def _fail(self, lane: str, title_idx: int, error: Exception) -> None:
+        print("ERROR: [%s] title #%i: %s" % (lane, title_idx, error))
+        self.errors.append((title_idx, error))
+
+    def _log(self, lane: str, title_idx: int, message: str) -> None:
+        if self.verbose:
+            print("[%s] title #%i: %s" % (lane, title_idx, message))
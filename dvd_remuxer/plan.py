@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from .disc import SECTOR_SIZE
+from .dvdremux import DVDRemuxer
+from .staging import estimate_dump_size, estimate_subtitle_size
+from .trace import Tracer
+
+PLAN_VERSION = 1
+
+
+class PlanError(Exception):
+    pass
+
+
+def build_plan(service, titles_idx: list) -> dict:
+    # The stages of the selected titles as a graph: the tool commands, the
+    # files each stage reads and writes, and the estimated bytes it moves.
+    args = service.args
+    remuxer = service._create_remuxer()
+    stages = []
+    titles = []
+
+    if args.native_dump or args.native_vobsub:
+        print("WARNING: a plan runs mplayer and mencoder, native options are ignored")
+
+    for idx in titles_idx:
+        title = service.lsdvd.title_by_ix(idx)
+        size = estimate_dump_size(title)
+        tmp_dir = remuxer.get_tmp_dir(idx) if args.action == "remux_to_mkv" else None
+
+        titles.append(
+            {
+                "title": idx,
+                "length": title.length,
+                "sectors": title.dump_size // SECTOR_SIZE,
+                "estimated_bytes": size,
+                "estimated_by": "sectors" if title.dump_size else "length",
+            }
+        )
+
+        if args.action == "remux_to_mkv":
+            stages += plan_remux(
+                remuxer,
+                idx,
+                service.get_audio_params(idx),
+                service.get_subs_params(idx),
+                service.outdir,
+                tmp_dir,
+                size,
+            )
+        elif args.action == "stream":
+            stages.append(plan_stream(remuxer, idx, service.outdir, size))
+        elif args.action == "subs":
+            subs_params = [
+                (vobsub.ix, vobsub.langcode)
+                for vobsub in title.subp
+                if vobsub.langcode in remuxer.langcodes
+            ]
+            for sub_ix, langcode in subs_params:
+                stages.append(
+                    plan_vobsub(remuxer, idx, sub_ix, langcode, service.outdir, size)
+                )
+        elif args.action == "chapters":
+            stages.append(plan_chapters(remuxer, idx, service.outdir))
+
+    return {
+        "version": PLAN_VERSION,
+        "device": str(remuxer.device),
+        "action": args.action,
+        "titles": titles,
+        "stages": stages,
+        "totals": {
+            "stages": len(stages),
+            "read_bytes": sum(stage["read_bytes"] for stage in stages),
+            "write_bytes": sum(stage["write_bytes"] for stage in stages),
+        },
+    }
+
+
+def stage_node(
+    title_idx: int,
+    stage: str,
+    argv: list,
+    inputs: list,
+    outputs: list,
+    read_bytes: int,
+    write_bytes: int,
+    deps: list = None,
+    **extra,
+) -> dict:
+    node = {
+        "id": "title%i/%s" % (title_idx, stage),
+        "title": title_idx,
+        "stage": stage,
+        "argv": [str(arg) for arg in argv] if argv is not None else None,
+        "inputs": [str(file) for file in inputs],
+        "outputs": [str(file) for file in outputs],
+        "deps": deps or [],
+        "read_bytes": read_bytes,
+        "write_bytes": write_bytes,
+    }
+    node.update(extra)
+
+    return node
+
+
+def plan_stream(remuxer: DVDRemuxer, title_idx: int, outdir: Path, size: int) -> dict:
+    outfile, dump_args = remuxer.build_dumpstream_cmd(title_idx, outdir)
+
+    return stage_node(
+        title_idx, "stream", dump_args, [remuxer.device], [outfile], size, size
+    )
+
+
+def plan_vobsub(
+    remuxer: DVDRemuxer,
+    title_idx: int,
+    sub_ix: int,
+    langcode: str,
+    outdir: Path,
+    size: int,
+) -> dict:
+    outfile, outfile_idx, outfile_sub = remuxer.gen_vobsub_filenames(
+        title_idx, sub_ix, langcode, outdir
+    )
+
+    # mencoder plays the whole title to find the subpictures
+    return stage_node(
+        title_idx,
+        "vobsub_%i_%s" % (sub_ix, langcode),
+        remuxer.gen_dumpvobsub_cmd(outfile, title_idx, sub_ix),
+        [remuxer.device],
+        [outfile_idx, outfile_sub],
+        size,
+        estimate_subtitle_size(size),
+        langcode=langcode,
+    )
+
+
+def plan_chapters(remuxer: DVDRemuxer, title_idx: int, outdir: Path) -> dict:
+    chapters = remuxer.gen_chapters(title_idx)
+
+    return stage_node(
+        title_idx,
+        "chapters",
+        None,
+        [],
+        [remuxer.gen_chapters_filename(title_idx, outdir)],
+        0,
+        len(chapters),
+        content=chapters,
+    )
+
+
+def plan_remux(
+    remuxer: DVDRemuxer,
+    title_idx: int,
+    audio_params: list,
+    subs_params: list,
+    outdir: Path,
+    tmp_dir: Path,
+    size: int,
+) -> list:
+    stages = []
+    mkvmerge_cmd = remuxer.gen_mkvmerge_cmd(
+        title_idx, audio_params, subs_params, outdir
+    )
+    outfile = remuxer.gen_output_filename(title_idx, outdir)
+
+    if remuxer.stream_mux:
+        # the stream goes through a named pipe, mkvmerge runs at the same time
+        fifo, stream_argv = remuxer.build_dumpstream_cmd(title_idx, tmp_dir, fifo=True)
+        merge_inputs = [remuxer.device]
+        merge_read = size
+        extra = {"stream_argv": [str(arg) for arg in stream_argv]}
+    else:
+        stream = plan_stream(remuxer, title_idx, tmp_dir, size)
+        stages.append(stream)
+        merge_inputs = list(stream["outputs"])
+        merge_read = size
+        extra = {}
+
+    for sub_ix, langcode in subs_params:
+        vobsub = plan_vobsub(remuxer, title_idx, sub_ix, langcode, tmp_dir, size)
+        stages.append(vobsub)
+        merge_inputs += vobsub["outputs"]
+        merge_read += vobsub["write_bytes"]
+
+    chapters = plan_chapters(remuxer, title_idx, tmp_dir)
+    stages.append(chapters)
+
+    if len(remuxer.lsdvd.get_title(title_idx).chapter) > 1:
+        merge_inputs += chapters["outputs"]
+        merge_read += chapters["write_bytes"]
+
+    temp_files = []
+    if not remuxer.keep_temp_files:
+        temp_files = [file for stage in stages for file in stage["outputs"]]
+
+    stages.append(
+        stage_node(
+            title_idx,
+            "merge",
+            mkvmerge_cmd,
+            merge_inputs,
+            [outfile],
+            merge_read,
+            size,
+            [stage["id"] for stage in stages],
+            temp_files=temp_files,
+            **extra,
+        )
+    )
+
+    return stages
+
+
+def save_plan(plan: dict, path: str) -> None:
+    with open(path, mode="w") as f:
+        json.dump(plan, f, indent=2)
+
+
+def load_plan(path: str) -> dict:
+    with open(path, mode="r") as f:
+        plan = json.load(f)
+
+    if not isinstance(plan, dict) or plan.get("version") != PLAN_VERSION:
+        raise PlanError("%s is not a plan of version %i" % (path, PLAN_VERSION))
+
+    check_plan(plan["stages"])
+
+    return plan
+
+
+def check_plan(stages: list) -> None:
+    ids = {stage["id"] for stage in stages}
+    visited = set()
+
+    for stage in stages:
+        for dep in stage["deps"]:
+            if dep not in ids:
+                raise PlanError("%s depends on unknown stage %s" % (stage["id"], dep))
+
+    # the dependencies have to form a DAG
+    remaining = {stage["id"]: set(stage["deps"]) for stage in stages}
+    while remaining:
+        ready = [stage_id for stage_id, deps in remaining.items() if deps <= visited]
+        if not ready:
+            raise PlanError("cyclic dependencies: %s" % (", ".join(sorted(remaining))))
+
+        for stage_id in ready:
+            visited.add(stage_id)
+            del remaining[stage_id]
+
+
+def get_ready_stages(stages: list, done: set, started: set) -> list:
+    # stages whose dependencies are done, in the order of the plan
+    return [
+        stage
+        for stage in stages
+        if stage["id"] not in started and all(dep in done for dep in stage["deps"])
+    ]
+
+
+class PlanExecutor:
+    # Runs the stages of a saved plan. run() uses a thread pool, other
+    # schedulers call get_ready_stages() and run_stage() themselves.
+    def __init__(self, remuxer: DVDRemuxer, plan: dict, device: str = None):
+        self.remuxer = remuxer
+        self.plan = plan
+        self.stages = plan["stages"]
+        # a plan made for one path of the disc runs on another one
+        self.devices = {}
+        if device and str(device) != plan["device"]:
+            self.devices[plan["device"]] = str(device)
+
+    def run(self, jobs: int = 1) -> list:
+        done = set()
+        started = set()
+        failed = []
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while True:
+                for stage in get_ready_stages(self.stages, done, started):
+                    if len(running) >= jobs:
+                        break
+
+                    started.add(stage["id"])
+                    running[executor.submit(self.run_stage, stage)] = stage
+
+                if not running:
+                    break
+
+                finished, not_finished = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    stage = running.pop(future)
+
+                    try:
+                        future.result()
+                        done.add(stage["id"])
+                    except Exception as inst:
+                        print("ERROR: %s: %s" % (stage["id"], inst))
+                        failed.append(stage["id"])
+
+        skipped = [stage["id"] for stage in self.stages if stage["id"] not in started]
+        for stage_id in skipped:
+            print("skip %s: a dependency failed" % (stage_id))
+
+        if failed or skipped:
+            raise Exception("Failed stages: %s" % (", ".join(failed + skipped)))
+
+        return [stage["id"] for stage in self.stages]
+
+    def run_stage(self, stage: dict) -> None:
+        outputs = [Path(file) for file in stage["outputs"]]
+
+        print("run %s" % (stage["id"]))
+
+        exist = outputs and all(file.exists() for file in outputs)
+        if exist and not self.remuxer.rewrite:
+            print("%s: already done" % (stage["id"]))
+            return
+
+        self.remuxer._perform_stage(
+            stage["title"],
+            stage["stage"],
+            outputs,
+            lambda: self._perform(stage, outputs),
+            stage["write_bytes"],
+        )
+
+        if self.remuxer.dry_run:
+            return
+
+        missing = [str(file) for file in outputs if not file.exists()]
+        if missing:
+            raise Exception("%s did not write %s" % (stage["id"], ", ".join(missing)))
+
+        if stage.get("temp_files") and not self.remuxer.keep_temp_files:
+            self.remuxer._rm_temp_files(
+                [Path(file) for file in stage["temp_files"] if Path(file).exists()]
+            )
+
+    def _perform(self, stage: dict, outputs: list) -> None:
+        if stage["argv"] is None:
+            self.remuxer._save_to_file(outputs[0], stage["content"])
+            return
+
+        argv = self._get_argv(stage["argv"])
+
+        if stage.get("stream_argv"):
+            stream_argv = self._get_argv(stage["stream_argv"])
+            # the named pipe and the output are the last arguments
+            stream_argv[-1] = Path(stream_argv[-1])
+            argv[argv.index("--output") + 1] = outputs[0]
+            self.remuxer._perform_stream_mux(stream_argv, argv)
+        elif stage["stage"].startswith("vobsub_"):
+            self.remuxer._perform_dumpvobsub(
+                argv, outputs[0], outputs[1], stage["langcode"]
+            )
+        elif stage["stage"] == "merge":
+            self.remuxer._run_mkvmerge(argv)
+        else:
+            self.remuxer._run_checked(argv)
+
+    def _get_argv(self, argv: list) -> list:
+        return [self.devices.get(arg, arg) for arg in argv]
+
+
+def execute_plan(remuxer_cls, args) -> None:
+    plan = load_plan(args.execute_plan)
+    tracer = Tracer(args.trace)
+    remuxer = remuxer_cls(
+        args.dvd,
+        dry_run=args.dry_run,
+        keep_temp_files=args.keep,
+        rewrite=args.rewrite,
+        verbose=args.verbose,
+        tracer=tracer,
+        tools_dir=args.tools_dir,
+    )
+
+    print(
+        "running %i stages of %s with %i jobs"
+        % (len(plan["stages"]), args.execute_plan, args.jobs)
+    )
+
+    try:
+        PlanExecutor(remuxer, plan, args.dvd).run(args.jobs)
+    finally:
+        tracer.save()
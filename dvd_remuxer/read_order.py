@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+from .disc import SECTOR_SIZE, Title
+
+# titles closer than this run in one worker with --merge-reads, 8 MiB
+MERGE_GAP_SECTORS = 4096
+
+
+def get_position(title: Title, sector: int) -> tuple:
+    # (0, sector on the disc) with the addresses of the title set,
+    # (vts, sector in the title VOB set) without them
+    if title.vts_sector is not None and title.vobs_sector is not None:
+        return 0, title.vts_sector + title.vobs_sector + sector
+
+    return title.vts or 0, sector
+
+
+def title_extents(title: Title) -> list:
+    # (first, last) positions of the played cells in playback order
+    extents = []
+
+    for cell in title.playback_cells():
+        if cell.first_sector is None or cell.last_sector is None:
+            return []
+
+        extents.append(
+            (
+                get_position(title, cell.first_sector),
+                get_position(title, cell.last_sector),
+            )
+        )
+
+    return extents
+
+
+def get_sector_key(title: Title) -> tuple:
+    extents = title_extents(title)
+
+    first = min(first for first, last in extents)
+    last = max(last for first, last in extents)
+
+    # the lowest sector first, then the title set
+    return first, title.vts or 0, last
+
+
+def order_titles(titles: list) -> list:
+    # titles without a cell address table keep their place at the end
+    located = [title for title in titles if title_extents(title)]
+    unknown = [title for title in titles if not title_extents(title)]
+
+    return sorted(located, key=get_sector_key) + unknown
+
+
+def group_adjacent(titles: list, max_gap: int = MERGE_GAP_SECTORS) -> list:
+    # consecutive titles whose sectors overlap or follow each other within
+    # max_gap on either side of the group are dumped one after another
+    groups = []
+    start = end = None
+
+    for title in titles:
+        extents = title_extents(title)
+
+        if not extents:
+            groups.append([title])
+            start = end = None
+            continue
+
+        first = min(first for first, last in extents)
+        last = max(last for first, last in extents)
+
+        if (
+            end is not None
+            and first[0] == end[0]
+            and max(first[1] - end[1], start[1] - last[1]) <= max_gap
+        ):
+            groups[-1].append(title)
+            start = min(start, first)
+            end = max(end, last)
+        else:
+            groups.append([title])
+            start = first
+            end = last
+
+    return groups
+
+
+def estimate_seeks(titles: list) -> tuple:
+    # (seeks, bytes of head travel) to read the titles in this order,
+    # the travel between title sets is unknown without their addresses
+    seeks = 0
+    distance = 0
+    last = None
+
+    for title in titles:
+        for first, end in title_extents(title):
+            if last is not None and first[1] != last[1] + 1:
+                seeks += 1
+
+                if first[0] == last[0]:
+                    distance += abs(first[1] - last[1] - 1)
+
+            last = end
+
+    return seeks, distance * SECTOR_SIZE
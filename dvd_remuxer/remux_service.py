@@ -2,29 +2,100 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import multiprocessing
 import sys
+import io
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, redirect_stdout
 from pathlib import Path
 from pprint import pprint
 
+from . import ifo
+from .cache import DVDInfoCache, fingerprint
+from .dedup import find_duplicate_titles
+from .disc import Title
+from .main_feature import find_main_feature
 from .lsdvd import lsdvd
 from .dvdremux import DVDRemuxer
+from .engine import AsyncEngine
+from .imaging import DiscImager, gen_image_filename
+from .pipeline import RemuxPipeline
+from .plan import build_plan, save_plan
+from .read_order import estimate_seeks, group_adjacent, order_titles
+from .rescue import BadBlockMap, RescueImager, get_bad_block_map_path
+from .staging import StagingPlanner, find_tmpfs, get_staging_name
+from .trace import Tracer
 
 wrong_lang_codes = ["", None]
 
 
 class RemuxService:
-    def __init__(self, dvd_info_reader_cls: lsdvd, remuxer_cls: DVDRemuxer, args):
+    def __init__(
+        self,
+        dvd_info_reader_cls: lsdvd,
+        remuxer_cls: DVDRemuxer,
+        args,
+        tracer: Tracer = None,
+    ):
         self.args = args
         self.dvd_info_reader_cls = dvd_info_reader_cls
         self.remuxer_cls = remuxer_cls
         self.langcodes = []
         self.outdir = Path.cwd()
+        self.tmp_dir = None
+        self.staging = None
+        # shared with the other discs of a batch or of the daemon
+        self.staging_pool = None
+        self.cancel_event = None
+        self.image = None
+        self.tracer = tracer or Tracer(args.trace)
+
+        with self.tracer.span("read DVD info", "disc", device=args.dvd):
+            self.lsdvd = self._read_dvd_info()
 
-        self.lsdvd = self.dvd_info_reader_cls.read(self.args.dvd)
         if not self.lsdvd:
             raise Exception("Path is not valid video DVD")
 
+    def _read_dvd_info(self) -> lsdvd:
+        if self.args.no_cache:
+            return self.dvd_info_reader_cls.read(self.args.dvd, self.args.tools_dir)
+
+        key = fingerprint(self.args.dvd)
+        if not key:
+            return self.dvd_info_reader_cls.read(self.args.dvd, self.args.tools_dir)
+
+        cache = DVDInfoCache()
+        data_dict = cache.get(key)
+
+        if data_dict:
+            if self.args.verbose:
+                print("DVD info from cache: %s" % (key))
+
+            data_dict["device"] = self.args.dvd
+        else:
+            data_dict = self.dvd_info_reader_cls.read_dict(
+                self.args.dvd, self.args.tools_dir
+            )
+            cache.put(key, data_dict)
+
+        return self.dvd_info_reader_cls.from_dict(data_dict)
+
     def run(self) -> None:
+        try:
+            self._run()
+        finally:
+            if self.staging:
+                self.staging.cleanup()
+
+            if not self.args.keep:
+                self.remove_image()
+
+            self.tracer.save()
+
+    def _run(self) -> None:
         if self.args.verbose:
             print("Run with arguments:")
             pprint(vars(self.args))
@@ -36,6 +107,112 @@ class RemuxService:
         if self.args.verbose:
             self.dvd_info()
 
+        if self.args.image_first or self.args.rescue or self.args.recover:
+            self._image_disc()
+
+        remuxer = self._create_remuxer()
+
+        self.langcodes = remuxer.langcodes
+
+        pprint(remuxer.langcodes)
+
+        titles_idx = self._get_titles()
+
+        if self.args.plan:
+            self._save_plan(titles_idx)
+        elif self.args.async_engine:
+            self._run_titles_async(remuxer, titles_idx)
+        elif self.args.jobs > 1 and len(titles_idx) > 1:
+            self._run_titles_in_pool(titles_idx)
+        elif self.args.pipeline and self.args.action == "remux_to_mkv":
+            self._run_titles_in_pipeline(remuxer, titles_idx)
+        else:
+            for idx in titles_idx:
+                self._run_title(remuxer, idx)
+
+    def _image_disc(self) -> None:
+        device = Path(self.args.dvd)
+
+        if device.is_dir() or device.is_file():
+            print("WARNING: %s is not a drive, it is read directly" % (device))
+            return
+
+        if self.args.plan:
+            # the image would be removed before the plan runs
+            print("WARNING: --plan does not image %s, the plan reads it" % (device))
+            return
+
+        if self.args.use_sys_tmp_dir:
+            image_dir = Path(tempfile.gettempdir())
+        else:
+            image_dir = self.tmp_dir or self.outdir
+
+        # a dry run does not read the drive
+        key = None if self.args.dry_run else fingerprint(self.args.dvd)
+        image = gen_image_filename(self.args.dvd, image_dir, key)
+
+        if self.args.dry_run:
+            print("image %s to %s" % (device, image))
+            return
+
+        imager = None
+
+        # an image of an unidentified disc may be of another disc
+        if image.exists() and key and not self.args.rewrite:
+            print("use the disc image %s" % (image))
+        else:
+            print("image %s to %s" % (device, image))
+            imager = self._create_imager(image, key)
+
+            with self.tracer.span("image disc", "disc", device=self.args.dvd):
+                imager.run()
+
+            self.image = image
+
+        if self.args.recover:
+            imager = imager or self._create_imager(image, key)
+
+            with self.tracer.span("recover bad sectors", "disc", device=self.args.dvd):
+                imager.recover()
+
+        # the drive is not read after this
+        self.args.dvd = str(image)
+
+    def _create_imager(self, image: Path, key: str) -> DiscImager:
+        if not self.args.rescue and not self.args.recover:
+            return DiscImager(self.args.dvd, image)
+
+        if not key:
+            print(
+                "WARNING: %s cannot be identified, its bad blocks are not kept"
+                % (self.args.dvd)
+            )
+
+        bad_blocks = BadBlockMap.load(get_bad_block_map_path(key) if key else None)
+
+        # the partial image of an unidentified disc may be of another disc
+        return RescueImager(self.args.dvd, image, bad_blocks, resume=bool(key))
+
+    def remove_image(self) -> None:
+        if self.image:
+            self.image.unlink(missing_ok=True)
+            self.image = None
+
+    def _save_plan(self, titles_idx: list) -> None:
+        plan = build_plan(self, titles_idx)
+        save_plan(plan, self.args.plan)
+
+        print(
+            "Plan of %i stages written to %s: %.1f MiB to read, %.1f MiB to write"
+            % (
+                plan["totals"]["stages"],
+                self.args.plan,
+                plan["totals"]["read_bytes"] / 1048576,
+                plan["totals"]["write_bytes"] / 1048576,
+            )
+        )
+
+    def _create_remuxer(self) -> DVDRemuxer:
         remuxer = self.remuxer_cls(
             self.args.dvd,
             lsdvd=self.lsdvd,
@@ -46,38 +223,140 @@ class RemuxService:
             aspect_ratio=self.args.aspect_ratio,
             split_chapters=self.args.split_chapters,
             verbose=self.args.verbose,
+            native_vobsub=self.args.native_vobsub,
+            stream_mux=self.args.stream_mux,
+            resume=self.args.resume,
+            native_dump=self.args.native_dump,
+            sub_jobs=self.args.sub_jobs,
+            tracer=self.tracer,
+            staging=self._create_staging_planner(),
+            cancel_event=self.cancel_event,
+            tmp_dir=self.tmp_dir,
             file_prefix=self._get_file_prefix(),
+            tools_dir=self.args.tools_dir,
         )
 
         if self.args.add_sub_langcode:
             remuxer.langcodes += self.args.add_sub_langcode
 
-        self.langcodes = remuxer.langcodes
-
-        pprint(remuxer.langcodes)
+        return remuxer
+
+    def _create_staging_planner(self) -> StagingPlanner:
+        # one planner for all titles, also in the worker processes
+        if self.args.staging and not self.staging:
+            self.staging = StagingPlanner(
+                self.outdir,
+                self.tmp_dir or self.outdir,
+                find_tmpfs(),
+                get_staging_name(self._get_file_prefix(), self.args.dvd, self.outdir),
+                self.staging_pool,
+            )
 
-        titles_idx = self._get_titles()
+        return self.staging
 
+    def _run_title(self, remuxer: DVDRemuxer, idx: int) -> None:
         if self.args.action == "remux_to_mkv":
-            for idx in titles_idx:
-                remuxer.remux_to_mkv(
-                    idx,
-                    self.get_audio_params(idx),
-                    self.get_subs_params(idx),
-                    self.outdir,
-                )
+            remuxer.remux_to_mkv(
+                idx,
+                self.get_audio_params(idx),
+                self.get_subs_params(idx),
+                self.outdir,
+            )
         elif self.args.action == "stream":
-            for idx in titles_idx:
-                remuxer.dumpstream(idx, self.outdir)
+            remuxer.dumpstream(idx, self.outdir)
         elif self.args.action == "subs":
-            for idx in titles_idx:
-                remuxer.dumpvobsubs(idx, self.outdir)
+            remuxer.dumpvobsubs(idx, self.outdir)
         elif self.args.action == "chapters":
-            for idx in titles_idx:
-                remuxer.dumpchapters(idx, self.outdir)
+            remuxer.dumpchapters(idx, self.outdir)
+
+    def _run_titles_in_pool(self, titles_idx: list) -> None:
+        groups = self._get_title_groups(titles_idx)
+        jobs = min(self.args.jobs, len(groups))
+
+        if self.args.verbose:
+            print("Run %i titles with %i workers" % (len(titles_idx), jobs))
+
+        with ExitStack() as stack:
+            if self._create_staging_planner() and not self.staging.pool.shared:
+                # the workers reserve the free space against each other
+                self.staging.pool.share(stack.enter_context(multiprocessing.Manager()))
+
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            futures = [
+                executor.submit(_run_title_group_job, self, group) for group in groups
+            ]
+
+            # print results in the order of titles, not in order of completion
+            results = [result for future in futures for result in future.result()]
+
+        errors = []
+
+        for idx, output, error, events in results:
+            print(output, end="")
+            self.tracer.add_events(events)
+
+            if error:
+                print("ERROR: title #%i: %s" % (idx, error))
+                errors.append(idx)
+
+        if errors:
+            raise Exception(
+                "Failed titles: %s" % (", ".join("#%i" % (idx) for idx in errors))
+            )
+
+    def _run_titles_async(self, remuxer: DVDRemuxer, titles_idx: list) -> None:
+        engine = AsyncEngine(verbose=self.args.verbose)
+        calls = [
+            (group[0], functools.partial(self._run_title_group, remuxer, group))
+            for group in self._get_title_groups(titles_idx)
+        ]
+
+        asyncio.run(engine.run_titles(remuxer, calls, self.args.jobs))
+
+    def _run_title_group(self, remuxer: DVDRemuxer, group: list) -> None:
+        errors = []
+
+        for idx in group:
+            try:
+                self._run_title(remuxer, idx)
+            except Exception as inst:
+                if len(group) == 1:
+                    raise
+
+                print("ERROR: title #%i: %s" % (idx, inst))
+                errors.append(idx)
+
+        if errors:
+            raise Exception(
+                "Failed titles: %s" % (", ".join("#%i" % (idx) for idx in errors))
+            )
+
+    def _get_title_groups(self, titles_idx: list) -> list:
+        if not self.args.merge_reads:
+            return [[idx] for idx in titles_idx]
+
+        groups = group_adjacent(self._get_located_titles(titles_idx))
+
+        for group in groups:
+            if len(group) > 1 and self.args.verbose:
+                print(
+                    "read titles %s in one pass"
+                    % (", ".join("#%i" % (title.ix) for title in group))
+                )
+
+        return [[title.ix for title in group] for group in groups]
+
+    def _run_titles_in_pipeline(self, remuxer: DVDRemuxer, titles_idx: list) -> None:
+        titles = [
+            (idx, self.get_audio_params(idx), self.get_subs_params(idx))
+            for idx in titles_idx
+        ]
+
+        RemuxPipeline(remuxer, verbose=self.args.verbose).run(titles, self.outdir)
 
     def dvd_info(self) -> None:
-        self.dvd_info_reader_cls.get_printable_dvd_info(self.args.dvd)
+        # the info is already read or cached, lsdvd is not run again
+        print(self.lsdvd.format_info())
 
     def _get_titles(self) -> list:
         titles_idx = []
@@ -87,6 +366,13 @@ class RemuxService:
         elif self.args.all_titles:
             print("Remuxing all titles")
             titles_idx = self.lsdvd.all_titles_idx()
+
+            if self.args.dedup:
+                titles_idx = self._dedup_titles(titles_idx)
+        elif self.args.main_feature:
+            idx = find_main_feature(self.lsdvd, self.args.verbose)
+            print("Use main feature title #%i." % (idx))
+            titles_idx.append(idx)
         else:
             print(
                 "No titles specified. Use longest title #%i."
@@ -94,8 +380,56 @@ class RemuxService:
             )
             titles_idx.append(self.lsdvd.longest_title_idx())
 
+        if self.args.sector_order and len(titles_idx) > 1:
+            titles_idx = self._order_titles(titles_idx)
+
         return titles_idx
 
+    def _get_located_titles(self, titles_idx: list) -> list:
+        # a title missing on the disc fails later, with its own error
+        return [self.lsdvd.title_by_ix(idx) or Title(idx, 0.0) for idx in titles_idx]
+
+    def _order_titles(self, titles_idx: list) -> list:
+        titles = self._get_located_titles(titles_idx)
+        ordered = order_titles(titles)
+
+        if self.args.verbose:
+            seeks, distance = estimate_seeks(titles)
+            ordered_seeks, ordered_distance = estimate_seeks(ordered)
+            print(
+                "sector order: %i seeks over %.1f MiB instead of %i seeks over %.1f MiB"
+                % (
+                    ordered_seeks,
+                    ordered_distance / 1048576,
+                    seeks,
+                    distance / 1048576,
+                )
+            )
+
+        return [title.ix for title in ordered]
+
+    def _dedup_titles(self, titles_idx: list) -> list:
+        try:
+            source = ifo.open_video_ts(self.args.dvd)
+        except (OSError, ifo.IfoError):
+            # only the cell addresses are compared
+            source = None
+
+        try:
+            duplicates = find_duplicate_titles(
+                [self.lsdvd.title_by_ix(idx) for idx in titles_idx], source
+            )
+        finally:
+            if source:
+                source.close()
+
+        for idx, kept_idx, reason in duplicates:
+            print("skip title #%i: %s title #%i" % (idx, reason, kept_idx))
+
+        skipped = [idx for idx, kept_idx, reason in duplicates]
+
+        return [idx for idx in titles_idx if idx not in skipped]
+
     def _get_file_prefix(self) -> str:
         if self.lsdvd.title and self.lsdvd.title != "unknown":
             return self.lsdvd.title
@@ -111,7 +445,7 @@ class RemuxService:
 
         # or all audio from DVD title
         else:
-            for audio in self.lsdvd.track[title_idx - 1].audio:
+            for audio in self.lsdvd.get_title(title_idx).audio:
                 audio_params.append([audio.ix, audio.langcode])
 
         for i in range(len(audio_params)):
@@ -128,9 +462,10 @@ class RemuxService:
         if self.args.subs_params:
             subs_params = self.args.subs_params
         else:
-            for vobsub in self.lsdvd.track[title_idx - 1].subp:
-                if vobsub.langcode in self.langcodes:
-                    subs_params.append([vobsub.ix, vobsub.langcode])
+            title = self.lsdvd.get_title(title_idx)
+
+            for vobsub in title.subp_by_langcodes(self.langcodes):
+                subs_params.append([vobsub.ix, vobsub.langcode])
 
         for i in range(len(subs_params)):
             vobp_idx, langcode = subs_params[i]
@@ -144,7 +479,7 @@ class RemuxService:
         self, type: str, title_idx: int, idx: int, langcode: str
     ) -> str:
         if langcode == "undefined":
-            langcode = getattr(self.lsdvd.track[title_idx - 1], type)[idx - 1].langcode
+            langcode = self.lsdvd.get_title(title_idx).get_stream(type, idx).langcode
 
         if langcode == "xx":
             langcode = "mul"  # Multiple languages
@@ -152,3 +487,24 @@ class RemuxService:
             langcode = "und"
 
         return langcode
+
+
+def _run_title_group_job(service: RemuxService, group: list) -> list:
+    # titles whose sectors follow each other run one after another
+    return [_run_title_job(service, idx) for idx in group]
+
+
+def _run_title_job(service: RemuxService, idx: int) -> tuple:
+    # Each worker gets its own remuxer, so temp files are not shared.
+    output = io.StringIO()
+    error = None
+    # only the events of this title go back, not those of the group before it
+    first_event = len(service.tracer.events)
+
+    with redirect_stdout(output):
+        try:
+            service._run_title(service._create_remuxer(), idx)
+        except Exception as inst:
+            error = str(inst) or inst.__class__.__name__
+
+    return idx, output.getvalue(), error, service.tracer.events[first_event:]
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+from .cache import default_cache_dir
+from .disc import SECTOR_SIZE
+from .imaging import PROGRESS_INTERVAL, DiscImager
+
+BAD_BLOCK_MAP_VERSION = 1
+
+# 64 KiB reads, so a scratch costs little data in the first pass
+RESCUE_BLOCK_SECTORS = 32
+# the skipped area doubles after each failed read, up to 128 MiB
+MAX_SKIP_SECTORS = 65536
+# a read slower than this means the drive is retrying
+STALL_SECONDS = 5.0
+RECOVERY_RETRIES = 3
+
+
+def get_bad_block_map_path(key: str) -> Path:
+    return default_cache_dir() / "badblocks" / ("%s.json" % (key))
+
+
+class BadBlockMap:
+    # Sorted, merged [first sector, sectors] ranges of a disc that could not
+    # be read. Without a path the map is kept for this run only.
+    def __init__(self, path: Path = None, ranges: list = None):
+        self.path = path
+        self.ranges = []
+
+        for first, sectors in ranges or []:
+            self.add(first, sectors)
+
+    @classmethod
+    def load(cls, path: Path = None) -> BadBlockMap:
+        if not path:
+            return cls()
+
+        try:
+            data = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError) as error:
+            print("WARNING: bad block map %s is not readable: %s" % (path, error))
+            return cls(path)
+
+        if data.get("version") != BAD_BLOCK_MAP_VERSION:
+            return cls(path)
+
+        return cls(path, data.get("ranges"))
+
+    def save(self) -> None:
+        if not self.path:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_name(self.path.name + ".tmp")
+        tmp_file.write_text(
+            json.dumps(
+                {"version": BAD_BLOCK_MAP_VERSION, "ranges": self.ranges}, indent=2
+            )
+        )
+        tmp_file.replace(self.path)
+
+    @property
+    def sectors(self) -> int:
+        return sum(sectors for first, sectors in self.ranges)
+
+    def add(self, first: int, sectors: int) -> None:
+        last = first + sectors
+        ranges = []
+
+        for range_first, range_sectors in self.ranges:
+            range_last = range_first + range_sectors
+
+            # overlapping and touching ranges are merged
+            if range_last < first or range_first > last:
+                ranges.append([range_first, range_sectors])
+            else:
+                first = min(first, range_first)
+                last = max(last, range_last)
+
+        ranges.append([first, last - first])
+        self.ranges = sorted(ranges)
+
+    def remove(self, first: int, sectors: int) -> None:
+        last = first + sectors
+        ranges = []
+
+        for range_first, range_sectors in self.ranges:
+            range_last = range_first + range_sectors
+
+            if range_first < first:
+                ranges.append([range_first, min(range_last, first) - range_first])
+
+            if range_last > last:
+                start = max(range_first, last)
+                ranges.append([start, range_last - start])
+
+        self.ranges = ranges
+
+    def find(self, first: int, sectors: int) -> list:
+        # the known bad ranges overlapping first .. first + sectors
+        return [
+            [range_first, range_sectors]
+            for range_first, range_sectors in self.ranges
+            if range_first < first + sectors and range_first + range_sectors > first
+        ]
+
+
+class RescueImager(DiscImager):
+    # Images a damaged disc like ddrescue. Failed and stalled reads are not
+    # retried: the area after them is skipped in growing steps, filled with
+    # zeros and added to the bad block map. Areas known from earlier runs are
+    # skipped without reading them, only recover() reads them again.
+    # An interrupted run keeps its partial image, the next one resumes it.
+    # A stalled read is only noticed when it returns, the drive decides when.
+    def __init__(
+        self,
+        device: str,
+        outfile: Path,
+        bad_blocks: BadBlockMap,
+        block_sectors: int = RESCUE_BLOCK_SECTORS,
+        max_skip_sectors: int = MAX_SKIP_SECTORS,
+        stall_seconds: float = STALL_SECONDS,
+        interval: float = PROGRESS_INTERVAL,
+        resume: bool = True,
+    ):
+        super().__init__(device, outfile, block_sectors, 0, interval)
+        self.bad_blocks = bad_blocks
+        self.block_sectors = block_sectors
+        self.max_skip_sectors = max_skip_sectors
+        self.stall_seconds = stall_seconds
+        self.resume = resume
+
+    def count_bad_sectors(self) -> int:
+        return self.bad_blocks.sectors
+
+    def _get_resume_offset(self, tmp_file: Path) -> int:
+        if not self.resume or not tmp_file.exists():
+            return 0
+
+        # the sectors are written in order, a torn last sector is read again
+        size = min(tmp_file.stat().st_size, self.size)
+        return size // SECTOR_SIZE * SECTOR_SIZE
+
+    def _remove_partial(self, tmp_file: Path) -> None:
+        if self.resume and tmp_file.exists():
+            print("keep the partial image %s for the next run" % (tmp_file))
+        else:
+            super()._remove_partial(tmp_file)
+
+    def _copy(self, fd: int, outfile: Path) -> None:
+        self.start = time.monotonic()
+        self.last_report = self.start
+        total = self.size // SECTOR_SIZE
+        skip = self.block_sectors
+
+        if self.bad_blocks.ranges:
+            print("skip %i known bad sectors" % (self.bad_blocks.sectors))
+
+        sector = self.resumed // SECTOR_SIZE
+
+        if sector:
+            print("resume %s at sector %i of %i" % (outfile, sector, total))
+
+        with outfile.open(mode="r+b" if sector else "wb") as out:
+            out.truncate(sector * SECTOR_SIZE)
+            out.seek(sector * SECTOR_SIZE)
+
+            while sector < total:
+                sectors = min(self.block_sectors, total - sector)
+                known = self.bad_blocks.find(sector, sectors)
+
+                if known and known[0][0] <= sector:
+                    # padding, the recovery pass reads it again
+                    end = min(known[0][0] + known[0][1], total)
+                    out.write(bytes((end - sector) * SECTOR_SIZE))
+                    sector = end
+                    self._report(sector * SECTOR_SIZE)
+                    continue
+
+                if known:
+                    sectors = known[0][0] - sector
+
+                start = time.monotonic()
+
+                try:
+                    data = self._read(fd, sector * SECTOR_SIZE, sectors * SECTOR_SIZE)
+                except OSError:
+                    data = None
+
+                stalled = time.monotonic() - start > self.stall_seconds
+
+                if data is not None:
+                    out.write(data)
+                    sector += sectors
+
+                    if not stalled:
+                        skip = self.block_sectors
+                        self._report(sector * SECTOR_SIZE)
+                        continue
+
+                skipped = min(skip, total - sector)
+                if skipped:
+                    out.write(bytes(skipped * SECTOR_SIZE))
+                    self.bad_blocks.add(sector, skipped)
+                    self.bad_blocks.save()
+                    sector += skipped
+
+                skip = min(skip * 2, self.max_skip_sectors)
+                self._report(sector * SECTOR_SIZE)
+
+    def recover(self) -> int:
+        # reads the known bad sectors one by one into the image
+        if not self.bad_blocks.ranges:
+            return 0
+
+        recovered = 0
+        sectors = self.bad_blocks.sectors
+        print(
+            "recover %i bad sectors of %s into %s"
+            % (sectors, self.device, self.outfile)
+        )
+
+        fd = os.open(self.device, os.O_RDONLY)
+
+        try:
+            with self.outfile.open(mode="r+b") as out:
+                for first, count in list(self.bad_blocks.ranges):
+                    for sector in range(first, first + count):
+                        try:
+                            data = self._read(
+                                fd, sector * SECTOR_SIZE, SECTOR_SIZE, RECOVERY_RETRIES
+                            )
+                        except OSError:
+                            continue
+
+                        out.seek(sector * SECTOR_SIZE)
+                        out.write(data)
+                        self.bad_blocks.remove(sector, 1)
+                        recovered += 1
+
+                    self.bad_blocks.save()
+        finally:
+            os.close(fd)
+
+        print(
+            "recovered %i of %i bad sectors, %i left"
+            % (recovered, sectors, self.bad_blocks.sectors)
+        )
+
+        return recovered
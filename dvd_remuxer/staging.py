@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from .disc import Title
+
+TMPFS_DIR = Path("/dev/shm")
+
+# DVD video is muxed at 10.08 Mbit/s at most, used for titles without cells
+DVD_MAX_BYTES_PER_SECOND = 10080000 // 8
+
+# a VobSub stream takes about 1% of the title
+SUBTITLE_SHARE = 0.01
+MIN_SUBTITLE_SIZE = 1024 * 1024
+
+# left free on disks for everything else
+DISK_RESERVE = 256 * 1024 * 1024
+# the part of a RAM backed tmpfs left for the system
+TMPFS_RESERVE = 0.25
+
+GIB = 1024 * 1024 * 1024
+
+
+class StagingError(Exception):
+    pass
+
+
+def estimate_dump_size(title: Title) -> int:
+    if title.dump_size:
+        return title.dump_size
+
+    return int(title.length * DVD_MAX_BYTES_PER_SECOND)
+
+
+def estimate_subtitle_size(dump_size: int) -> int:
+    return max(MIN_SUBTITLE_SIZE, int(dump_size * SUBTITLE_SHARE))
+
+
+def estimate_title_space(title: Title, subs: int, stream_mux=False) -> tuple:
+    # bytes of temp files and of the output file
+    dump_size = estimate_dump_size(title)
+    subs_size = subs * estimate_subtitle_size(dump_size)
+
+    if stream_mux:
+        return subs_size, dump_size
+
+    return dump_size + subs_size, dump_size
+
+
+def find_tmpfs() -> Path:
+    if TMPFS_DIR.is_dir() and os.access(TMPFS_DIR, os.W_OK | os.X_OK):
+        return TMPFS_DIR
+
+    return None
+
+
+def get_staging_name(prefix: str, device: str, outdir: Path) -> str:
+    # the same name on each run, so --resume finds the journals, but discs with
+    # the same label or written to other directories do not share temp files
+    key = "%s\n%s" % (Path(device).resolve(), Path(outdir).resolve())
+
+    return "%s-%s" % (prefix, hashlib.sha1(key.encode()).hexdigest()[:8])
+
+
+class StagingPool:
+    # The reservations of all planners running at the same time, the discs of
+    # a batch or of the daemon share one pool.
+    # After share() the worker processes of --jobs reserve against each other.
+    def __init__(self):
+        # (name, title_idx):
+        #     {"needs": {device: bytes}, "files": [[device, dir, prefix]]}
+        self.reservations = {}
+        self.condition = threading.Condition()
+        self.shared = False
+
+    def share(self, manager) -> None:
+        # multiprocessing.Manager proxies are sent to the worker processes
+        with self.condition:
+            self.reservations = manager.dict(self.reservations)
+
+        self.condition = manager.Condition()
+        self.shared = True
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+
+        if not self.shared:
+            # a pool is sent to worker processes without the reservations
+            state["reservations"] = {}
+            del state["condition"]
+
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+
+        if "condition" not in state:
+            self.condition = threading.Condition()
+
+
+class StagingPlanner:
+    # Chooses the temp directory of each title by its size: a RAM backed tmpfs
+    # if the title fits there, a directory on the output file system if not.
+    # Titles running at the same time reserve their space, a title that does
+    # not fit waits until others release theirs, or is refused if none runs.
+    # The temp files of a disc are in its own directory on tmpfs, named by name.
+    def __init__(
+        self,
+        outdir: Path,
+        disk_dir: Path = None,
+        tmpfs: Path = None,
+        name: str = None,
+        pool: StagingPool = None,
+    ):
+        self.outdir = Path(outdir)
+        self.disk_dir = self._get_disk_dir(Path(disk_dir or outdir))
+        self.tmpfs = tmpfs
+        self.name = name
+        self.tmpfs_dir = None
+
+        if tmpfs:
+            self.tmpfs_dir = tmpfs / ("dvdremux_%i" % (os.getuid()))
+
+            if name:
+                self.tmpfs_dir = self.tmpfs_dir / name
+
+        self.pool = pool or StagingPool()
+
+        # device: a path on it for disk_usage
+        self.paths = {}
+        for path in self._get_candidates() + [self.outdir]:
+            self.paths.setdefault(get_device(path), path)
+
+    def _get_disk_dir(self, disk_dir: Path) -> Path:
+        # only the output file system is used besides tmpfs
+        if get_device(disk_dir) == get_device(self.outdir):
+            return disk_dir
+
+        return self.outdir
+
+    def reserve(
+        self, title_idx: int, temp_size: int, output_size: int, prefix: str = None
+    ) -> Path:
+        # the files of the title start with prefix, their size counts as written
+        waiting = False
+
+        with self.pool.condition:
+            while True:
+                tmp_dir, needs = self._plan(temp_size, output_size)
+
+                if tmp_dir:
+                    self.pool.reservations[(self.name, title_idx)] = {
+                        "needs": needs,
+                        "files": self._get_title_files(tmp_dir, prefix),
+                    }
+                    break
+
+                if not self.pool.reservations:
+                    raise StagingError(
+                        "title #%i needs %.1f GiB of temp files and %.1f GiB"
+                        " for the output, not enough free space in %s"
+                        % (
+                            title_idx,
+                            temp_size / GIB,
+                            output_size / GIB,
+                            self.outdir,
+                        )
+                    )
+
+                if not waiting:
+                    print("title #%i waits for free space" % (title_idx))
+                    waiting = True
+
+                self.pool.condition.wait()
+
+        if tmp_dir != self.disk_dir:
+            tmp_dir = self.tmpfs_dir
+            tmp_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+        print(
+            "staging title #%i in %s (%.1f GiB)" % (title_idx, tmp_dir, temp_size / GIB)
+        )
+
+        return tmp_dir
+
+    def release(self, title_idx: int) -> None:
+        with self.pool.condition:
+            if self.pool.reservations.pop((self.name, title_idx), None) is not None:
+                self.pool.condition.notify_all()
+
+    def cleanup(self) -> None:
+        if self.tmpfs_dir is None:
+            return
+
+        # the directory of the disc, then the one of all discs
+        dirs = [self.tmpfs_dir]
+        if self.name:
+            dirs.append(self.tmpfs_dir.parent)
+
+        for tmp_dir in dirs:
+            try:
+                tmp_dir.rmdir()
+            except OSError:
+                # kept temp files, or the directories of other discs
+                return
+
+    def _get_title_files(self, candidate: Path, prefix: str) -> list:
+        if prefix is None:
+            return []
+
+        # the temp files of the tmpfs candidate are in tmpfs_dir
+        tmp_dir = self.tmpfs_dir if candidate != self.disk_dir else candidate
+        files = []
+
+        for device, path in (
+            (get_device(candidate), tmp_dir),
+            (get_device(self.outdir), self.outdir),
+        ):
+            if [device, str(path), prefix] not in files:
+                files.append([device, str(path), prefix])
+
+        return files
+
+    def _plan(self, temp_size: int, output_size: int) -> tuple:
+        for candidate in self._get_candidates():
+            needs = {}
+            for path, size in ((candidate, temp_size), (self.outdir, output_size)):
+                device = get_device(path)
+                needs[device] = needs.get(device, 0) + size
+
+            if all(
+                self.get_available(device) >= size for device, size in needs.items()
+            ):
+                return candidate, needs
+
+        return None, None
+
+    def _get_candidates(self) -> list:
+        if self.tmpfs:
+            return [self.tmpfs, self.disk_dir]
+
+        return [self.disk_dir]
+
+    def get_available(self, device: int) -> int:
+        usage = shutil.disk_usage(self.paths[device])
+
+        if self.tmpfs and device == get_device(self.tmpfs):
+            available = usage.free - int(usage.total * TMPFS_RESERVE)
+        else:
+            available = usage.free - DISK_RESERVE
+
+        # the written part of running titles is already used, not the rest
+        reserved = 0
+        for reservation in self.pool.reservations.values():
+            needs = reservation["needs"].get(device, 0)
+            if needs:
+                reserved += max(0, needs - get_written(reservation["files"], device))
+
+        return available - reserved
+
+
+def get_written(files: list, device: int) -> int:
+    written = 0
+
+    for file_device, path, prefix in files:
+        if file_device != device:
+            continue
+
+        # <prefix>.DVDRemux.mkv, <prefix>_video.vob, ... not <prefix>0_video.vob
+        for file in Path(path).glob(glob.escape(prefix) + "[._]*"):
+            try:
+                written += file.stat().st_size
+            except OSError:
+                # removed meanwhile
+                pass
+
+    return written
+
+
+def get_device(path: Path) -> int:
+    return os.stat(path).st_dev
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+TOOLS_DIR_ENV = "DVD_REMUXER_TOOLS_DIR"
+
+
+def get_tools_dir(tools_dir: str = None) -> str:
+    # --tools-dir of the job, then the environment of the process
+    tools_dir = tools_dir or os.environ.get(TOOLS_DIR_ENV)
+
+    return str(Path(tools_dir).resolve()) if tools_dir else None
+
+
+def get_tool_path(name: str, tools_dir: str = None) -> str:
+    tools_dir = get_tools_dir(tools_dir)
+
+    if tools_dir:
+        tool = Path(tools_dir) / name
+        if os.access(tool, os.X_OK):
+            return str(tool)
+
+    return name
+
+
+def resolve_cmd(cmd: list, tools_dir: str = None) -> list:
+    return [get_tool_path(cmd[0], tools_dir)] + list(cmd[1:])
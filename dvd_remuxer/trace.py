@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def children_cpu_time() -> tuple:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime, usage.ru_stime
+
+
+class Tracer:
+    # Spans are saved in the Chrome trace event format, the file can be opened
+    # in chrome://tracing or https://ui.perfetto.dev
+    def __init__(self, path: str = None):
+        self.path = path
+        self.events = []
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @contextmanager
+    def span(self, name: str, category: str, files: list = None, **args):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.time()
+        start_monotonic = time.monotonic()
+        start_cpu = children_cpu_time()
+
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - start_monotonic
+            cpu = children_cpu_time()
+
+            # children of all threads are counted, spans running at the same
+            # time share their CPU time
+            args["wall_seconds"] = round(seconds, 6)
+            args["children_user_seconds"] = round(cpu[0] - start_cpu[0], 6)
+            args["children_system_seconds"] = round(cpu[1] - start_cpu[1], 6)
+
+            if files is not None:
+                size = files_size(files)
+                args["bytes_written"] = size
+                args["mib_per_second"] = round(size / 1048576 / max(seconds, 1e-6), 3)
+
+            self.add_events(
+                [
+                    {
+                        "name": name,
+                        "cat": category,
+                        "ph": "X",
+                        "ts": int(start * 1000000),
+                        "dur": int(seconds * 1000000),
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    }
+                ]
+            )
+
+    def add_events(self, events: list) -> None:
+        with self.lock:
+            self.events += events
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+
+        with self.lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+        with Path(self.path).open(mode="w") as f:
+            json.dump(data, f, indent=1)
+
+    def __getstate__(self) -> dict:
+        # a tracer is sent to worker processes without the recorded events
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"])
+
+
+def files_size(files: list) -> int:
+    size = 0
+
+    for file in files:
+        try:
+            size += os.stat(file).st_size
+        except OSError:
+            pass
+
+    return size
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import errno
+import os
+import time
+from pathlib import Path
+
+from .disc import Title
+
+SECTOR_SIZE = 2048
+
+# a title VOB set is split into files of up to 1 GiB: VTS_xx_1.VOB .. VTS_xx_9.VOB
+VOB_PARTS = range(1, 10)
+
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+# the first sectors of a title are enough to see whether it is CSS protected
+CSS_PROBE_SECTORS = 256
+
+SCRAMBLED_STREAM_IDS = set([0xBD] + list(range(0xC0, 0xF0)))
+
+# copy_file_range does not work across file systems on older kernels
+NO_KERNEL_COPY_ERRORS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+class VobCopyError(Exception):
+    pass
+
+
+def vob_extents(source, vts: int) -> list:
+    extents = []
+    sector = 0
+
+    for part in VOB_PARTS:
+        file_extents = source.file_extents("VTS_%02i_%i.VOB" % (vts, part))
+        if not file_extents:
+            break
+
+        for path, offset, size in file_extents:
+            extents.append((sector, size // SECTOR_SIZE, path, offset))
+            sector += size // SECTOR_SIZE
+
+    return extents
+
+
+def is_scrambled(sector) -> bool:
+    if sector[:4] != b"\x00\x00\x01\xba":
+        return False
+
+    if sector[4] & 0xC0 == 0x40:
+        pes_pos = 14 + (sector[13] & 0x07)
+    else:
+        pes_pos = 12
+
+    pes = sector[pes_pos : pes_pos + 7]
+
+    if len(pes) < 7 or pes[:3] != b"\x00\x00\x01":
+        return False
+
+    # PES_scrambling_control is non zero in CSS encrypted packs
+    return pes[3] in SCRAMBLED_STREAM_IDS and bool(pes[6] & 0x30)
+
+
+class VobCopier:
+    def __init__(self, source, title: Title):
+        if not title.cell or title.cell[0].first_sector is None:
+            raise VobCopyError("title #%i has no cell address table" % (title.ix))
+
+        # The cell of the first angle also holds the interleaved units of the
+        # other angles, only the NAV packs tell them apart.
+        if (title.angles or 1) > 1 or title.has_angle_blocks:
+            raise VobCopyError("title #%i has several angles" % (title.ix))
+
+        self.title = title
+        self.extents = vob_extents(source, title.vts)
+
+        if not self.extents:
+            raise VobCopyError("VOB files of title set %i not found" % (title.vts))
+
+        self.ranges = self.gen_ranges()
+
+    def gen_ranges(self) -> list:
+        ranges = []
+
+        for cell in self.title.cell:
+            first = cell.first_sector
+            last = cell.last_sector + 1
+
+            # a cell may span two VOB files
+            for sector, sectors, path, offset in self.extents:
+                start = max(first, sector)
+                stop = min(last, sector + sectors)
+                if start >= stop:
+                    continue
+
+                first_byte = offset + (start - sector) * SECTOR_SIZE
+                length = (stop - start) * SECTOR_SIZE
+
+                # merge continuous cells into one copy
+                if (
+                    ranges
+                    and ranges[-1][0] == path
+                    and ranges[-1][1] + ranges[-1][2] == first_byte
+                ):
+                    ranges[-1] = (path, ranges[-1][1], ranges[-1][2] + length)
+                else:
+                    ranges.append((path, first_byte, length))
+
+                first = stop
+
+            if first < last:
+                raise VobCopyError(
+                    "cell %i of title #%i is out of the VOB files"
+                    % (cell.ix, self.title.ix)
+                )
+
+        return ranges
+
+    @property
+    def size(self) -> int:
+        return sum(length for path, offset, length in self.ranges)
+
+    def is_scrambled(self) -> bool:
+        path, offset, length = self.ranges[0]
+
+        with open(path, mode="rb") as f:
+            f.seek(offset)
+            data = f.read(min(length, CSS_PROBE_SECTORS * SECTOR_SIZE))
+
+        for pos in range(0, len(data), SECTOR_SIZE):
+            if is_scrambled(data[pos : pos + SECTOR_SIZE]):
+                return True
+
+        return False
+
+    def copy(self, outfile: Path) -> float:
+        start = time.monotonic()
+
+        with outfile.open(mode="wb") as out:
+            for path, offset, length in self.ranges:
+                with open(path, mode="rb") as f:
+                    copy_range(f.fileno(), out.fileno(), offset, length)
+
+        return time.monotonic() - start
+
+
+def copy_range(src_fd: int, dst_fd: int, offset: int, length: int) -> None:
+    end = offset + length
+
+    while offset < end:
+        copied = copy_chunk(src_fd, dst_fd, offset, min(COPY_CHUNK_SIZE, end - offset))
+
+        if copied == 0:
+            raise VobCopyError("unexpected end of VOB file")
+
+        offset += copied
+
+
+def copy_chunk(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    # let the kernel copy the data without passing it through user space
+    try:
+        if hasattr(os, "copy_file_range"):
+            return os.copy_file_range(src_fd, dst_fd, count, offset)
+
+        if hasattr(os, "sendfile"):
+            return os.sendfile(dst_fd, src_fd, offset, count)
+    except OSError as error:
+        if error.errno not in NO_KERNEL_COPY_ERRORS:
+            raise
+
+    return copy_chunk_with_buffer(src_fd, dst_fd, offset, count)
+
+
+def copy_chunk_with_buffer(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    data = os.pread(src_fd, count, offset)
+    view = memoryview(data)
+
+    while view:
+        written = os.write(dst_fd, view)
+        view = view[written:]
+
+    return len(data)
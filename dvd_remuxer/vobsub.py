@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import mmap
+from pathlib import Path
+
+SECTOR_SIZE = 2048
+
+SYSTEM_HEADER_CODE = 0xBB
+PROGRAM_END_CODE = 0xB9
+PRIVATE_STREAM_1 = 0xBD
+PADDING_STREAM = 0xBE
+
+SUBPICTURE_FIRST_ID = 0x20
+SUBPICTURE_LAST_ID = 0x3F
+
+PTS_CLOCK = 90000
+
+default_palette = [
+    0x000000,
+    0xF0F0F0,
+    0xCCCCCC,
+    0x999999,
+    0x3333FA,
+    0x1111BB,
+    0xFA3333,
+    0xBB1111,
+    0x33FA33,
+    0x11BB11,
+    0xFAFA33,
+    0xBBBB11,
+    0xFA33FA,
+    0xBB11BB,
+    0x33FAFA,
+    0x11BBBB,
+]
+
+
+class VobSubWriter:
+    def __init__(
+        self,
+        outfile_idx: Path,
+        outfile_sub: Path,
+        langcode: str,
+        index: int,
+        size: tuple = (720, 576),
+        palette: list = None,
+    ):
+        self.outfile_idx = outfile_idx
+        self.outfile_sub = outfile_sub
+        self.langcode = langcode
+        self.index = index
+        self.size = size
+        self.palette = palette or default_palette
+        self.timestamps = []
+        self.sub_file = None
+
+    def open(self) -> None:
+        self.sub_file = self.outfile_sub.open(mode="wb")
+
+    def write_packet(self, packet: bytes, pts: int) -> None:
+        if pts is not None:
+            self.timestamps.append((pts, self.sub_file.tell()))
+
+        self.sub_file.write(packet)
+
+    def close(self) -> None:
+        if self.sub_file:
+            self.sub_file.close()
+            self.sub_file = None
+
+        with self.outfile_idx.open(mode="w") as f:
+            f.write(self.gen_idx_content())
+
+    def gen_idx_content(self) -> str:
+        lines = [
+            "# VobSub index file, v7 (do not modify this line!)",
+            "#",
+            "size: %ix%i" % tuple(self.size),
+            "palette: %s" % ", ".join("%06x" % (color) for color in self.palette),
+            "# ON: displays only forced subtitles, OFF: shows everything",
+            "forced subs: OFF",
+            "",
+            "# Language index in use",
+            "langidx: %i" % (self.index),
+            "id: %s, index: %i" % (self.langcode, self.index),
+        ]
+
+        for pts, filepos in self.timestamps:
+            lines.append(
+                "timestamp: %s, filepos: %09x" % (format_timestamp(pts), filepos)
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+class VobSubDemuxer:
+    def __init__(self, writers: dict):
+        # writers keyed by subpicture substream id (0x20..0x3F)
+        self.writers = writers
+        self.start_pts = None
+
+    def demux(self, vob_file: Path) -> None:
+        for writer in self.writers.values():
+            writer.open()
+
+        try:
+            with vob_file.open(mode="rb") as f:
+                if vob_file.stat().st_size == 0:
+                    return
+
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self.demux_buffer(data)
+        finally:
+            for writer in self.writers.values():
+                writer.close()
+
+    def demux_buffer(self, data) -> None:
+        for pack_header, pes, stream_id, substream_id, pts in iter_pes_packets(data):
+            if pts is not None and self.start_pts is None:
+                self.start_pts = pts
+
+            if stream_id != PRIVATE_STREAM_1 or substream_id not in self.writers:
+                continue
+
+            if pts is not None:
+                pts = max(0, pts - self.start_pts)
+
+            self.writers[substream_id].write_packet(
+                pad_to_sector(pack_header, pes), pts
+            )
+
+
+def iter_pes_packets(data):
+    size = len(data)
+    pos = 0
+    pack_header = b""
+
+    while pos + 4 <= size:
+        if data[pos : pos + 3] != b"\x00\x00\x01":
+            # resync to the next start code
+            next_pos = data.find(b"\x00\x00\x01", pos + 1)
+            if next_pos < 0:
+                return
+            pos = next_pos
+            continue
+
+        code = data[pos + 3]
+
+        if code == 0xBA:
+            header_len = pack_header_length(data, pos)
+            pack_header = bytes(data[pos : pos + header_len])
+            pos += header_len
+            continue
+
+        if code == PROGRAM_END_CODE:
+            pos += 4
+            continue
+
+        if code < SYSTEM_HEADER_CODE:
+            pos += 4
+            continue
+
+        if pos + 6 > size:
+            return
+
+        pes_len = 6 + (data[pos + 4] << 8 | data[pos + 5])
+
+        if code == PRIVATE_STREAM_1:
+            pes = data[pos : pos + pes_len]
+            payload_pos = pes_payload_offset(pes)
+            substream_id = pes[payload_pos] if payload_pos < len(pes) else None
+
+            yield pack_header, pes, code, substream_id, parse_pes_pts(pes)
+        elif code >= 0xC0:
+            # audio and video packets are only needed for the start time
+            yield pack_header, None, code, None, parse_pes_pts(data[pos : pos + 14])
+
+        pos += pes_len
+
+
+def pack_header_length(data, pos: int) -> int:
+    if data[pos + 4] & 0xC0 == 0x40:
+        # MPEG-2 pack header with stuffing
+        return 14 + (data[pos + 13] & 0x07)
+
+    # MPEG-1 pack header
+    return 12
+
+
+def pes_payload_offset(pes) -> int:
+    if len(pes) > 8 and pes[6] & 0xC0 == 0x80:
+        return 9 + pes[8]
+
+    return 6
+
+
+def parse_pes_pts(pes):
+    if len(pes) < 14 or pes[6] & 0xC0 != 0x80 or not pes[7] & 0x80:
+        return None
+
+    return (
+        ((pes[9] >> 1) & 0x07) << 30
+        | pes[10] << 22
+        | (pes[11] >> 1) << 15
+        | pes[12] << 7
+        | pes[13] >> 1
+    )
+
+
+def pad_to_sector(pack_header: bytes, pes: bytes) -> bytes:
+    packet = pack_header + pes
+    padding = SECTOR_SIZE - len(packet)
+
+    if padding >= 6:
+        packet += bytes([0x00, 0x00, 0x01, PADDING_STREAM])
+        packet += (padding - 6).to_bytes(2, "big")
+        packet += b"\xff" * (padding - 6)
+    elif padding > 0:
+        packet += b"\xff" * padding
+
+    return packet
+
+
+def format_timestamp(pts: int) -> str:
+    ms = pts * 1000 // PTS_CLOCK
+
+    return "%02d:%02d:%02d:%03d" % (
+        ms // 3600000,
+        ms // 60000 % 60,
+        ms // 1000 % 60,
+        ms % 1000,
+    )
+
+
+def ycrcb_to_rgb(color: int) -> int:
+    y = (color >> 16) & 0xFF
+    cr = (color >> 8) & 0xFF
+    cb = color & 0xFF
+
+    r = y + 1.402 * (cr - 128)
+    g = y - 0.344136 * (cb - 128) - 0.714136 * (cr - 128)
+    b = y + 1.772 * (cb - 128)
+
+    r, g, b = [min(255, max(0, int(round(c)))) for c in (r, g, b)]
+
+    return r << 16 | g << 8 | b
+
+
+def convert_palette(palette: list) -> list:
+    if not palette:
+        return default_palette
+
+    colors = []
+    for color in palette:
+        if isinstance(color, str):
+            color = int(color, 16)
+        colors.append(ycrcb_to_rgb(color))
+
+    return colors
@@ -16,10 +16,19 @@ class DVDRemuxerTest(DVDRemuxer):
     def _clear_file(self, file: Path) -> None:
         pass
 
+    def _move_file(self, file: Path, target: Path) -> None:
+        pass
+
     def _fix_vobsub_file_content(self, idx_file: Path, langcode: str):
         pass
 
-    def _rm_temp_files(self) -> None:
+    def _perform_extract_vobsubs(self, file_stream: Path, writers: dict) -> None:
+        pass
+
+    def _perform_stream_mux(self, dump_args: list, mkvmerge_cmd: list) -> None:
+        pass
+
+    def _rm_temp_files(self, temp_files: list = None) -> None:
         pass
 
     def _unlink_empty_file(self, file: Path) -> None:
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from benchmarks.discgen import (
+    SECTOR_SIZE,
+    build_vmg_ifo,
+    build_vts_ifo,
+    create_ifo_tree,
+    pad,
+    pad_to_sectors,
+)
+
+# The same disc as lsdvd_otput in lsdvd_test.py
+ifo_titles = [
+    {
+        "length": 3600.000,
+        "audio": ["en", "ru"],
+        "subp": ["ru", "fr"],
+        "chapters": [100.880, 69.160, 78.000],
+    },
+    {"length": 600.000, "audio": [], "subp": [], "chapters": []},
+    {"length": 300.000, "audio": [], "subp": [], "chapters": []},
+    {"length": 0.100, "audio": [], "subp": [], "chapters": []},
+]
+
+
+def create_video_ts(path: Path, titles: list = ifo_titles) -> Path:
+    return create_ifo_tree(path, titles)
+
+
+def build_vob_sector(sector: int, scrambled: bool = False) -> bytes:
+    pack_header = b"\x00\x00\x01\xba" + bytes([0x44]) + b"\x00" * 8 + bytes([0xF8])
+    pes_flags = 0xA0 if scrambled else 0x80
+    pes = b"\x00\x00\x01\xe0\x07\xec" + bytes([pes_flags, 0, 0])
+
+    return pad(pack_header + pes + sector.to_bytes(4, "big"), SECTOR_SIZE)
+
+
+def build_vob(first_sector: int, sectors: int) -> bytes:
+    return b"".join(
+        build_vob_sector(sector)
+        for sector in range(first_sector, first_sector + sectors)
+    )
+
+
+def title_sectors(titles: list = ifo_titles) -> int:
+    return sum(int(length * 10) for title in titles for length in title["chapters"])
+
+
+def build_vobs(titles: list = ifo_titles, part_sectors: int = 1500) -> dict:
+    sectors = title_sectors(titles)
+    vobs = {}
+
+    for part, first_sector in enumerate(range(0, sectors, part_sectors), start=1):
+        vobs["VTS_01_%i.VOB" % (part)] = build_vob(
+            first_sector, min(part_sectors, sectors - first_sector)
+        )
+
+    return vobs
+
+
+def create_vobs(video_ts: Path, titles: list = ifo_titles) -> dict:
+    vobs = build_vobs(titles)
+
+    for name, content in vobs.items():
+        (video_ts / name).write_bytes(content)
+
+    return vobs
+
+
+def build_dir_record(name: bytes, extent: int, size: int, is_dir: bool) -> bytes:
+    name_pad = b"\x00" if len(name) % 2 == 0 else b""
+    length = 33 + len(name) + len(name_pad)
+    record = bytes([length, 0])
+    record += extent.to_bytes(4, "little") + extent.to_bytes(4, "big")
+    record += size.to_bytes(4, "little") + size.to_bytes(4, "big")
+    record += b"\x00" * 7 + bytes([0x02 if is_dir else 0, 0, 0])
+    record += (1).to_bytes(2, "little") + (1).to_bytes(2, "big")
+    record += bytes([len(name)]) + name + name_pad
+
+    return record
+
+
+def build_iso(files: dict, volume_id: str = "TEST_DVD") -> bytes:
+    # root directory at sector 18, VIDEO_TS directory at sector 19,
+    # file data from sector 20
+    data_sector = 20
+    records = []
+    data = b""
+    for name, content in files.items():
+        records.append(
+            build_dir_record(
+                name.encode("ascii") + b";1",
+                data_sector + len(data) // SECTOR_SIZE,
+                len(content),
+                False,
+            )
+        )
+        data += pad_to_sectors(content)
+
+    video_ts_dir = build_dir_record(b"\x00", 19, SECTOR_SIZE, True)
+    video_ts_dir += build_dir_record(b"\x01", 18, SECTOR_SIZE, True)
+    video_ts_dir += b"".join(records)
+
+    root_dir = build_dir_record(b"\x00", 18, SECTOR_SIZE, True)
+    root_dir += build_dir_record(b"\x01", 18, SECTOR_SIZE, True)
+    root_dir += build_dir_record(b"VIDEO_TS", 19, SECTOR_SIZE, True)
+
+    pvd = bytes([1]) + b"CD001" + bytes([1, 0])
+    pvd = pad(pvd, 40) + volume_id.encode("ascii").ljust(32, b" ")
+    pvd = pad(pvd, 156) + build_dir_record(b"\x00", 18, SECTOR_SIZE, True)
+
+    terminator = bytes([255]) + b"CD001" + bytes([1])
+
+    return (
+        b"\x00" * 16 * SECTOR_SIZE
+        + pad(pvd, SECTOR_SIZE)
+        + pad(terminator, SECTOR_SIZE)
+        + pad(root_dir, SECTOR_SIZE)
+        + pad(video_ts_dir, SECTOR_SIZE)
+        + data
+    )
+
+
+def u16le(number: int) -> bytes:
+    return number.to_bytes(2, "little")
+
+
+def u32le(number: int) -> bytes:
+    return number.to_bytes(4, "little")
+
+
+def udf_tag(tag: int) -> bytes:
+    # checksum, CRC and location are not checked by the reader
+    return pad(u16le(tag) + u16le(2), 16)
+
+
+def udf_dstring(text: str, size: int) -> bytes:
+    data = b"\x08" + text.encode("latin-1")
+    return pad(data, size - 1) + bytes([len(data)])
+
+
+def udf_file_entry(size: int, extents: list) -> bytes:
+    entry = pad(udf_tag(261), 56) + size.to_bytes(8, "little")
+    entry = pad(entry, 168) + u32le(0) + u32le(len(extents) * 8)
+    for lbn, length in extents:
+        entry += u32le(length) + u32le(lbn)
+
+    return pad(entry, SECTOR_SIZE)
+
+
+def udf_fid(name: str, icb: int, characteristics: int) -> bytes:
+    file_id = b"\x08" + name.encode("latin-1") if name else b""
+    fid = udf_tag(257) + u16le(1) + bytes([characteristics, len(file_id)])
+    fid += u32le(SECTOR_SIZE) + u32le(icb) + b"\x00" * 8 + u16le(0) + file_id
+
+    return pad(fid, (len(fid) + 3) & ~3)
+
+
+def build_udf(
+    files: dict, volume_id: str = "TEST_DVD", extent_sectors: int = None
+) -> bytes:
+    # Partition blocks: 0 file set, 1 root entry, 2 root directory,
+    # 3 VIDEO_TS entry, 4 VIDEO_TS directory, then the file entries and data.
+    partition_start = 257
+    data_lbn = 5 + len(files)
+    fids = udf_fid("", 1, 0x0A)
+    entries = b""
+    data = b""
+
+    for i, (name, content) in enumerate(files.items()):
+        extents = []
+        chunk_size = (extent_sectors or len(content) or 1) * SECTOR_SIZE
+        for pos in range(0, len(content), chunk_size):
+            chunk = content[pos : pos + chunk_size]
+            if data:
+                # a gap sector makes the extents non contiguous
+                data += b"\xff" * SECTOR_SIZE
+            extents.append((data_lbn + len(data) // SECTOR_SIZE, len(chunk)))
+            data += pad_to_sectors(chunk)
+
+        entries += udf_file_entry(len(content), extents)
+        fids += udf_fid(name, 5 + i, 0)
+
+    root_fids = udf_fid("", 1, 0x0A) + udf_fid("VIDEO_TS", 3, 0x02)
+
+    partition = pad(udf_tag(256), 404) + u32le(1)
+    partition = pad(partition, SECTOR_SIZE)
+    partition += udf_file_entry(len(root_fids), [(2, len(root_fids))])
+    partition += pad(root_fids, SECTOR_SIZE)
+    partition += udf_file_entry(len(fids), [(4, len(fids))])
+    partition += pad(fids, SECTOR_SIZE)
+    partition += entries + data
+
+    pvd = pad(udf_tag(1), 24) + udf_dstring(volume_id, 32)
+    pd = pad(udf_tag(5), 188) + u32le(partition_start)
+    lvd = pad(udf_tag(6), 248) + u32le(SECTOR_SIZE) + u32le(0)
+    anchor = pad(udf_tag(2), 16) + u32le(4 * SECTOR_SIZE) + u32le(32)
+
+    image = b"\x00" * 16 * SECTOR_SIZE
+    for identifier in (b"BEA01", b"NSR02", b"TEA01"):
+        image += pad(b"\x00" + identifier + b"\x01", SECTOR_SIZE)
+    image = pad(image, 32 * SECTOR_SIZE)
+    for descriptor in (pvd, pd, lvd, udf_tag(8)):
+        image += pad(descriptor, SECTOR_SIZE)
+    image = pad(image, 256 * SECTOR_SIZE) + pad(anchor, SECTOR_SIZE)
+
+    return image + partition
+
+
+def create_iso(
+    path: Path, titles: list = ifo_titles, with_vobs=False, udf=False
+) -> Path:
+    files = {
+        "VIDEO_TS.IFO": build_vmg_ifo(titles),
+        "VTS_01_0.IFO": build_vts_ifo(titles),
+    }
+
+    if with_vobs:
+        files.update(build_vobs(titles))
+
+    iso_file = path / "TEST_DVD.iso"
+    iso_file.write_bytes(build_udf(files) if udf else build_iso(files))
+
+    return iso_file
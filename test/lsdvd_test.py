@@ -84,9 +84,9 @@ incorrect_lsdvd_otput = """{
 
 class lsdvd_test(lsdvd):
     @staticmethod
-    def get_lsdvd_output(device: str) -> str:
+    def get_lsdvd_output(device: str, tools_dir: str = None) -> str:
         return lsdvd_otput
 
     @staticmethod
-    def get_printable_dvd_info(device: str) -> str:
+    def get_printable_dvd_info(device: str, tools_dir: str = None) -> str:
         return "Disc Title: TEST_DVD"
@@ -0,0 +1,193 @@
+import json
+import threading
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from dvd_remuxer import batch, options
+from dvd_remuxer.batch import BatchRunner
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+
+class TestFindDiscs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+
+        (self.tmp_dir / "disc1" / "VIDEO_TS").mkdir(parents=True)
+        (self.tmp_dir / "shelf" / "disc2" / "VIDEO_TS").mkdir(parents=True)
+        (self.tmp_dir / "shelf" / "disc3.iso").write_bytes(b"")
+        (self.tmp_dir / "shelf" / "notes.txt").write_text("")
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_find_discs_dir(self):
+        self.assertListEqual(
+            batch.find_discs(str(self.tmp_dir)),
+            [
+                str(self.tmp_dir / "disc1"),
+                str(self.tmp_dir / "shelf" / "disc2"),
+                str(self.tmp_dir / "shelf" / "disc3.iso"),
+            ],
+        )
+
+    def test_find_discs_glob(self):
+        self.assertListEqual(
+            batch.find_discs(str(self.tmp_dir / "**" / "*.iso")),
+            [str(self.tmp_dir / "shelf" / "disc3.iso")],
+        )
+
+    def test_find_discs_manifest(self):
+        manifest = self.tmp_dir / "manifest.txt"
+        manifest.write_text("# archive\n/media/disc1.iso\n\n/media/disc2\n")
+
+        self.assertListEqual(
+            batch.find_discs(str(manifest)), ["/media/disc1.iso", "/media/disc2"]
+        )
+
+    def test_find_discs_single_iso(self):
+        iso_file = str(self.tmp_dir / "shelf" / "disc3.iso")
+        self.assertListEqual(batch.find_discs(iso_file), [iso_file])
+
+
+class TestDiscName(unittest.TestCase):
+    def test_get_disc_name(self):
+        self.assertEqual(batch.get_disc_name("/media/a/MOVIE.iso"), "MOVIE")
+        self.assertEqual(batch.get_disc_name("/media/b/MOVIE/VIDEO_TS"), "MOVIE")
+
+    def test_get_unique_disc_name(self):
+        names = {}
+
+        first = batch.get_unique_disc_name("/media/a/MOVIE.iso", names)
+        other = batch.get_unique_disc_name("/media/b/MOVIE/VIDEO_TS", names)
+
+        self.assertEqual(first, "MOVIE")
+        self.assertRegex(other, "^MOVIE-[0-9a-f]{8}$")
+        # the same disc gets the same name again
+        self.assertEqual(batch.get_unique_disc_name("/media/a/MOVIE.iso", names), first)
+        self.assertEqual(batch.get_unique_disc_name("/media/b/MOVIE", names), other)
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.argparser = options.create_batch_argparser()
+
+        for name in ["disc1", "disc2"]:
+            (self.tmp_dir / "discs" / name / "VIDEO_TS").mkdir(parents=True)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def parse_args(self, *args):
+        return self.argparser.parse_args(
+            [
+                str(self.tmp_dir / "discs"),
+                "--output-dir",
+                str(self.tmp_dir / "out"),
+                "--no-cache",
+            ]
+            + list(args)
+        )
+
+    def test_run(self):
+        summary_file = self.tmp_dir / "summary.json"
+        args = self.parse_args(
+            "--all", "--jobs", "3", "--device-jobs", "2", "--summary", str(summary_file)
+        )
+
+        summary = BatchRunner(lsdvd_test, DVDRemuxerTest, args).run()
+
+        self.assertEqual(summary["succeeded"], 6)
+        self.assertEqual(summary["failed"], 0)
+        self.assertListEqual(
+            [(Path(job["disc"]).name, job["title"]) for job in summary["jobs"]],
+            [
+                ("disc1", 1),
+                ("disc1", 2),
+                ("disc1", 3),
+                ("disc2", 1),
+                ("disc2", 2),
+                ("disc2", 3),
+            ],
+        )
+        self.assertDictEqual(json.loads(summary_file.read_text()), summary)
+        self.assertTrue((self.tmp_dir / "out" / "disc1").is_dir())
+
+    def test_run_staging(self):
+        args = self.parse_args("--dvd-title", "1", "--staging", "--jobs", "2")
+        runner = BatchRunner(lsdvd_test, DVDRemuxerTest, args)
+
+        with mock.patch(
+            "dvd_remuxer.dvdremux.estimate_title_space", return_value=(1024, 1024)
+        ):
+            summary = runner.run()
+
+        self.assertEqual(summary["succeeded"], 2)
+
+        # the discs reserve against each other, each in its own directories
+        planners = [job.service.staging for job in runner.jobs]
+        self.assertIs(planners[0].pool, runner.staging_pool)
+        self.assertIs(planners[1].pool, runner.staging_pool)
+        self.assertNotEqual(planners[0].name, planners[1].name)
+
+    def test_run_errors(self):
+        args = self.parse_args("--dvd-title", "1,5", "--action", "chapters")
+
+        summary = BatchRunner(lsdvd_test, DVDRemuxerTest, args).run()
+
+        self.assertEqual(summary["succeeded"], 2)
+        self.assertEqual(summary["failed"], 2)
+        self.assertListEqual(
+            [job["status"] for job in summary["jobs"]],
+            ["success", "failed", "success", "failed"],
+        )
+
+    def test_run_jobs_device_limit(self):
+        args = self.parse_args("--jobs", "3", "--device-jobs", "1")
+        runner = BatchRunner(lsdvd_test, DVDRemuxerTest, args)
+        runner.jobs = [CountingJob(device) for device in ["a", "a", "a", "b", "b"]]
+
+        runner.run_jobs()
+
+        self.assertEqual(CountingJob.max_running, {"a": 1, "b": 1})
+        self.assertTrue(all(job.status == "success" for job in runner.jobs))
+
+    def test_run_no_discs(self):
+        args = self.argparser.parse_args([str(self.tmp_dir / "none" / "*.iso")])
+
+        with self.assertRaises(Exception):
+            BatchRunner(lsdvd_test, DVDRemuxerTest, args).run()
+
+
+class CountingJob:
+    lock = threading.Lock()
+    running = {}
+    max_running = {}
+
+    def __init__(self, device: str):
+        self.device = device
+        self.status = "pending"
+
+    def run(self) -> None:
+        with self.lock:
+            self.running[self.device] = self.running.get(self.device, 0) + 1
+            self.max_running[self.device] = max(
+                self.max_running.get(self.device, 0), self.running[self.device]
+            )
+
+        time.sleep(0.01)
+
+        with self.lock:
+            self.running[self.device] -= 1
+
+        self.status = "success"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from benchmarks import __main__ as bench
+from benchmarks import fixtures, loadtest
+from dvd_remuxer.lsdvd import lsdvd
+from dvd_remuxer.vobsub import SECTOR_SIZE, iter_pes_packets
+
+
+class TestFixtures(unittest.TestCase):
+    def test_gen_lsdvd_output(self):
+        titles = fixtures.gen_titles(3, 20, audio=2, subp=4)
+        dvd = lsdvd.from_dict(lsdvd.get_dvd_info(fixtures.gen_lsdvd_output(titles)))
+
+        self.assertEqual(len(dvd.track), 3)
+        self.assertEqual(len(dvd.track[2].chapter), 20)
+        self.assertEqual(dvd.track[0].subp[3].streamid, 0x23)
+
+    def test_gen_vob(self):
+        vob = fixtures.gen_vob(100, subp_streams=2, subp_every=10)
+        packets = list(iter_pes_packets(vob))
+
+        self.assertEqual(len(vob), 100 * SECTOR_SIZE)
+        self.assertEqual(len(packets), 100)
+        self.assertListEqual(
+            sorted(set(packet[3] for packet in packets if packet[2] == 0xBD)),
+            [0x20, 0x21],
+        )
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_quick_run(self):
+        with TemporaryDirectory() as tmp_dir:
+            output = Path(tmp_dir) / "bench_output.json"
+
+            with redirect_stdout(io.StringIO()):
+                code = bench.main(
+                    ["--quick", "--repeat", "1", "--output", str(output)]
+                )
+                compare_code = bench.main(
+                    ["--quick", "--repeat", "1", "--compare", str(output)]
+                )
+
+            results = json.loads(output.read_text())["results"]
+
+        self.assertEqual(code, 0)
+        self.assertEqual(compare_code, 0)
+        self.assertEqual(len(results), len(bench.benchmarks))
+        self.assertIn("mib_per_second", results["VobCopier.copy 256 MiB"])
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_run(self):
+        with mock.patch.dict(os.environ), redirect_stdout(io.StringIO()):
+            code = loadtest.main(["--titles", "2", "--title-size", "0.5", "--keep"])
+            failed_code = loadtest.main(
+                ["--titles", "2", "--title-size", "0.5", "--fail-rate", "1"]
+            )
+
+        self.assertEqual(code, 0)
+        self.assertEqual(failed_code, 1)
+
+    def test_stream_mux(self):
+        args, remux_args = loadtest.create_argparser_load().parse_known_args(
+            ["--titles", "1", "--title-size", "0.5", "--stream-mux"]
+        )
+
+        with mock.patch.dict(os.environ), redirect_stdout(io.StringIO()):
+            result = loadtest.run_load_test(args, remux_args)
+
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["remuxed"], 1)
+        self.assertGreater(result["bytes"], 512 * 1024)
@@ -0,0 +1,113 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from dvd_remuxer import cache
+from dvd_remuxer.cache import DVDInfoCache
+from dvd_remuxer.remux_service import RemuxService
+from .dvdremux_test import DVDRemuxerTest
+from .ifo_test import create_iso, create_video_ts
+from .lsdvd_test import lsdvd_test
+from .test_remux_service import Args
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_fingerprint_video_ts(self):
+        video_ts = create_video_ts(self.tmp_dir)
+        key = cache.fingerprint(str(self.tmp_dir))
+
+        self.assertEqual(key, cache.fingerprint(str(video_ts)))
+
+        ifo_file = video_ts / "VTS_01_0.IFO"
+        ifo_file.write_bytes(ifo_file.read_bytes() + b"\x00")
+
+        self.assertNotEqual(key, cache.fingerprint(str(self.tmp_dir)))
+
+    def test_fingerprint_iso(self):
+        iso_file = create_iso(self.tmp_dir)
+        key = cache.fingerprint(str(iso_file))
+
+        self.assertEqual(len(key), 40)
+        self.assertEqual(key, cache.fingerprint(str(iso_file)))
+
+    def test_fingerprint_not_dvd(self):
+        self.assertIsNone(cache.fingerprint(str(self.tmp_dir)))
+        self.assertIsNone(cache.fingerprint(str(self.tmp_dir / "none.iso")))
+
+    def test_default_cache_dir(self):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": "/some/cache"}):
+            self.assertEqual(cache.default_cache_dir(), Path("/some/cache/dvdremuxer"))
+
+
+class TestDVDInfoCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.cache = DVDInfoCache(self.tmp_dir / "cache")
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get("0123"))
+
+    def test_put_get(self):
+        self.cache.put("0123", {"title": "TEST_DVD"})
+        self.assertDictEqual(self.cache.get("0123"), {"title": "TEST_DVD"})
+
+    def test_evict(self):
+        self.cache.max_size = 50
+
+        for i, key in enumerate(["aa", "bb", "cc"]):
+            self.cache.put(key, {"title": "TEST_DVD_%i" % (i)})
+            os.utime(self.cache.cache_dir / (key + ".json"), (i, i))
+
+        self.cache.evict()
+
+        self.assertIsNone(self.cache.get("aa"))
+        self.assertIsNotNone(self.cache.get("cc"))
+
+
+class TestRemuxServiceCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        create_video_ts(self.tmp_dir)
+        self.env = patch.dict(
+            os.environ, {"XDG_CACHE_HOME": str(self.tmp_dir / "cache")}
+        )
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp_dir_obj.cleanup()
+
+    def test_cache_hit(self):
+        args = Args(dvd=str(self.tmp_dir))
+        RemuxService(lsdvd_test, DVDRemuxerTest, args)
+
+        with patch.object(lsdvd_test, "read_dict") as mock_read_dict:
+            remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+
+        mock_read_dict.assert_not_called()
+        self.assertEqual(remux_service.lsdvd.longest_title_idx(), 1)
+        self.assertEqual(remux_service.lsdvd.device, str(self.tmp_dir))
+
+    def test_no_cache(self):
+        args = Args(dvd=str(self.tmp_dir), no_cache=True)
+        RemuxService(lsdvd_test, DVDRemuxerTest, args)
+
+        self.assertFalse((self.tmp_dir / "cache").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+import io
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer import options
+from dvd_remuxer.daemon import DaemonError, RemuxDaemon, parse_job_args, send_request
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+
+class BlockingRemuxer(DVDRemuxerTest):
+    started = threading.Event()
+    released = threading.Event()
+
+    def _subprocess_run(self, cmd: list, **kwargs) -> None:
+        self.started.set()
+        self.released.wait(5)
+
+
+class TestRemuxDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.inbox = self.tmp_dir / "inbox"
+        self.inbox.mkdir()
+        self.disc = self.tmp_dir / "disc1"
+        (self.disc / "VIDEO_TS").mkdir(parents=True)
+
+        BlockingRemuxer.started.clear()
+        BlockingRemuxer.released.clear()
+
+    def tearDown(self):
+        BlockingRemuxer.released.set()
+        self.tmp_dir_obj.cleanup()
+
+    def create_daemon(self, remuxer_cls=DVDRemuxerTest, *args):
+        args = options.create_daemon_argparser().parse_args(
+            [
+                "--socket",
+                str(self.tmp_dir / "daemon.sock"),
+                "--watch",
+                str(self.inbox),
+                "--output-dir",
+                str(self.tmp_dir / "out"),
+                "--no-cache",
+                "--action",
+                "chapters",
+            ]
+            + list(args)
+        )
+
+        return RemuxDaemon(lsdvd_test, remuxer_cls, args)
+
+    def start(self, daemon: RemuxDaemon) -> threading.Thread:
+        thread = threading.Thread(target=daemon.run)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(daemon.stop)
+
+        for i in range(100):
+            if (self.tmp_dir / "daemon.sock").exists():
+                break
+            time.sleep(0.01)
+
+        return thread
+
+    def wait_for_job(self, daemon: RemuxDaemon, job_id: int) -> dict:
+        for i in range(500):
+            job = daemon.status(job_id)[0]
+            if job["status"] not in ("pending", "running", "cancelling"):
+                return job
+            time.sleep(0.01)
+
+        self.fail("job #%i is not finished" % (job_id))
+
+    def test_parse_job_args(self):
+        args = parse_job_args(["--all", str(self.disc)])
+
+        self.assertTrue(args.all_titles)
+        self.assertEqual(args.dvd, str(self.disc))
+
+        with self.assertRaises(DaemonError):
+            parse_job_args(["--all", str(self.tmp_dir / "missing")])
+
+        with self.assertRaises(DaemonError):
+            parse_job_args("--all")
+
+        with self.assertRaises(DaemonError):
+            parse_job_args(["--jobs", "2", "--pipeline", str(self.disc)])
+
+    def test_parse_job_args_help(self):
+        output = io.StringIO()
+
+        with redirect_stdout(output), self.assertRaises(DaemonError) as cm:
+            parse_job_args(["--help"])
+
+        self.assertIn("--dvd-title", str(cm.exception))
+        self.assertEqual(output.getvalue(), "")
+
+    def test_socket(self):
+        daemon = self.create_daemon()
+        thread = self.start(daemon)
+        socket_path = self.tmp_dir / "daemon.sock"
+
+        response = send_request(
+            socket_path,
+            {
+                "command": "submit",
+                "args": ["--all", "--no-cache", "--action", "chapters", str(self.disc)],
+            },
+        )
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["job"]["origin"], "socket")
+
+        job = self.wait_for_job(daemon, response["job"]["job"])
+        self.assertEqual(job["status"], "success")
+        self.assertTrue((self.tmp_dir / "out" / "disc1").is_dir())
+
+        response = send_request(socket_path, {"command": "status"})
+        self.assertEqual([job["status"] for job in response["jobs"]], ["success"])
+
+        response = send_request(socket_path, {"command": "cancel", "job": 1})
+        self.assertFalse(response["ok"])
+
+        response = send_request(socket_path, {"command": "eject"})
+        self.assertEqual(response, {"ok": False, "error": "unknown command: eject"})
+
+        daemon.stop()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(socket_path.exists())
+
+    def test_submit_invalid_args(self):
+        daemon = self.create_daemon()
+
+        response = daemon.handle_request(
+            {"command": "submit", "args": ["--jobs", "0", str(self.disc)]}
+        )
+
+        self.assertFalse(response["ok"])
+        self.assertEqual(daemon.jobs, [])
+
+    def test_cancel_pending(self):
+        daemon = self.create_daemon()
+        job = daemon.submit(str(self.disc), daemon.args, "socket")
+
+        self.assertEqual(daemon.cancel(job.job_id).status, "cancelled")
+
+        with self.assertRaises(DaemonError):
+            daemon.cancel(job.job_id)
+
+        with self.assertRaises(DaemonError):
+            daemon.cancel(42)
+
+    def test_cancel_running(self):
+        daemon = self.create_daemon(
+            BlockingRemuxer, "--action", "stream", "--dvd-title", "1,2"
+        )
+        self.start(daemon)
+        job = daemon.submit(str(self.disc), daemon.args, "socket")
+
+        self.assertTrue(BlockingRemuxer.started.wait(5))
+        daemon.cancel(job.job_id)
+        self.assertEqual(daemon.status(job.job_id)[0]["status"], "cancelling")
+        BlockingRemuxer.released.set()
+
+        job_dict = self.wait_for_job(daemon, job.job_id)
+
+        self.assertEqual(job_dict["status"], "cancelled")
+        self.assertIn("title #2 is cancelled", job_dict["error"])
+
+    def test_device_limit(self):
+        disc2 = self.tmp_dir / "disc2"
+        (disc2 / "VIDEO_TS").mkdir(parents=True)
+        daemon = self.create_daemon(
+            BlockingRemuxer, "--action", "stream", "--jobs", "2"
+        )
+        self.start(daemon)
+
+        jobs = [
+            daemon.submit(str(disc), daemon.args, "socket")
+            for disc in (self.disc, disc2)
+        ]
+
+        self.assertTrue(BlockingRemuxer.started.wait(5))
+        time.sleep(0.05)
+
+        # both discs are on one file system
+        self.assertEqual(
+            [job["status"] for job in daemon.status()], ["running", "pending"]
+        )
+
+        BlockingRemuxer.released.set()
+
+        for job in jobs:
+            self.assertEqual(self.wait_for_job(daemon, job.job_id)["status"], "success")
+
+    def test_scan_inbox(self):
+        daemon = self.create_daemon()
+        iso_file = self.inbox / "disc2.iso"
+        iso_file.write_bytes(b"\x00" * 2048)
+
+        # the first scan only sees the disc
+        self.assertEqual(daemon.scan_inbox(), [])
+
+        iso_file.write_bytes(b"\x00" * 4096)
+        self.assertEqual(daemon.scan_inbox(), [])
+
+        jobs = daemon.scan_inbox()
+        self.assertEqual([job.disc for job in jobs], [str(iso_file)])
+        self.assertEqual(jobs[0].origin, "inbox")
+        self.assertEqual(jobs[0].outdir, self.tmp_dir / "out" / "disc2")
+
+        # taken once while unchanged
+        self.assertEqual(daemon.scan_inbox(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
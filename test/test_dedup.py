@@ -0,0 +1,81 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer import ifo
+from dvd_remuxer.dedup import find_duplicate_titles, is_contained, title_ranges
+from dvd_remuxer.disc import Cell, Title
+from .ifo_test import build_vob
+
+
+def cells(*ranges) -> list:
+    return [
+        Cell(ix, 1.0, first_sector=first, last_sector=last)
+        for ix, (first, last) in enumerate(ranges, start=1)
+    ]
+
+
+def title(ix: int, *ranges, vts: int = 1) -> Title:
+    return Title(ix, 1.0, vts=vts, cell=cells(*ranges))
+
+
+class TestTitleRanges(unittest.TestCase):
+    def test_title_ranges(self):
+        self.assertListEqual(
+            title_ranges(title(1, (100, 199), (0, 49), (50, 99), (300, 399))),
+            [(1, 0, 199), (1, 300, 399)],
+        )
+
+    def test_title_ranges_without_sectors(self):
+        self.assertIsNone(title_ranges(Title(1, 1.0, cell=[Cell(1, 1.0)])))
+        self.assertIsNone(title_ranges(Title(1, 1.0)))
+
+    def test_is_contained(self):
+        other = [(1, 0, 199), (1, 300, 399)]
+
+        self.assertTrue(is_contained([(1, 10, 20), (1, 300, 399)], other))
+        self.assertFalse(is_contained([(1, 150, 250)], other))
+        self.assertFalse(is_contained([(2, 10, 20)], other))
+
+
+class TestFindDuplicateTitles(unittest.TestCase):
+    def test_find_duplicate_titles(self):
+        titles = [
+            title(1, (0, 99)),
+            title(2, (0, 499)),
+            title(3, (0, 99)),
+            title(4, (0, 99), vts=2),
+            title(5, (500, 599)),
+            Title(6, 1.0),
+        ]
+
+        self.assertListEqual(
+            find_duplicate_titles(titles),
+            [(1, 2, "cells contained in"), (3, 2, "cells contained in")],
+        )
+
+    def test_same_cells(self):
+        self.assertListEqual(
+            find_duplicate_titles([title(1, (0, 99)), title(2, (0, 49), (50, 99))]),
+            [(2, 1, "same cells as")],
+        )
+
+    def test_same_content(self):
+        with TemporaryDirectory() as tmp_dir:
+            # the VOB holds the same 100 sectors twice, then other 100 sectors
+            vob = build_vob(0, 100)
+            (Path(tmp_dir) / "VTS_01_1.VOB").write_bytes(
+                vob + vob + build_vob(100, 100)
+            )
+            source = ifo.open_video_ts(tmp_dir)
+
+            duplicates = find_duplicate_titles(
+                [title(1, (0, 99)), title(2, (100, 199)), title(3, (200, 299))],
+                source,
+            )
+
+        self.assertListEqual(duplicates, [(2, 1, "same content as")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import pickle
+import unittest
+
+from dvd_remuxer.disc import Disc, Title
+from .lsdvd_test import lsdvd_test, lsdvd_otput
+
+
+class TestDisc(unittest.TestCase):
+    def setUp(self):
+        self.disc = Disc.from_dict(lsdvd_test.get_dvd_info(lsdvd_otput))
+
+    def test_from_dict(self):
+        self.assertEqual(self.disc.title, "TEST_DVD")
+        self.assertEqual(self.disc.longest_track, 1)
+        self.assertEqual(len(self.disc.track), 4)
+        self.assertIsInstance(self.disc.track[0], Title)
+        self.assertEqual(self.disc.track[0].audio[1].langcode, "ru")
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            self.disc.track[0].unknown_attr = 1
+
+    def test_title_by_ix(self):
+        self.assertIs(self.disc.title_by_ix(2), self.disc.track[1])
+        self.assertIsNone(self.disc.title_by_ix(99))
+
+    def test_chapter_start(self):
+        self.assertListEqual(
+            [chapter.start for chapter in self.disc.track[0].chapter],
+            [0.0, 100.88, 170.04],
+        )
+
+    def test_format_info(self):
+        info = self.disc.format_info().split("\n")
+
+        self.assertEqual(info[0], "Disc Title: TEST_DVD")
+        self.assertEqual(
+            info[1],
+            "Title: 01, Length: 01:00:00.000 Chapters: 03, Cells: 00,"
+            " Audio streams: 02, Subpictures: 02",
+        )
+        self.assertIn("\tChapter: 02, Length: 00:01:09.160, Start Cell: 02", info)
+        self.assertIn("\tSubtitle: 02, Language: fr", info)
+        self.assertEqual(info[-1], "Longest track: 01")
+
+    def test_streams_by_langcode(self):
+        title = self.disc.track[0]
+
+        self.assertListEqual([audio.ix for audio in title.audio_by_langcode("ru")], [2])
+        self.assertListEqual([subp.ix for subp in title.subp_by_langcode("fr")], [2])
+        self.assertListEqual(title.subp_by_langcode("jp"), [])
+
+    def test_subp_by_langcodes(self):
+        title = self.disc.track[0]
+
+        # in the order of the disc
+        self.assertListEqual(
+            [subp.ix for subp in title.subp_by_langcodes(["fr", "ru", "fr", "jp"])],
+            [1, 2],
+        )
+
+    def test_get_title(self):
+        self.assertIs(self.disc.get_title(2), self.disc.track[1])
+
+        with self.assertRaisesRegex(Exception, "title #9 is not on the disc"):
+            self.disc.get_title(9)
+
+    def test_get_stream(self):
+        title = self.disc.track[0]
+
+        self.assertEqual(title.get_stream("subp", 2).langcode, "fr")
+        self.assertIsNone(title.get_stream("audio", 3))
+
+    def test_streamid_from_hex_string(self):
+        title = Title.from_dict(
+            {
+                "ix": 1,
+                "length": 1.0,
+                "subp": [{"ix": 1, "langcode": "en", "streamid": "0x21"}],
+            }
+        )
+
+        self.assertEqual(title.subp[0].streamid, 0x21)
+
+    def test_cell_sectors(self):
+        title = Title.from_dict(
+            {
+                "ix": 1,
+                "length": 1.0,
+                "cell": [
+                    {"ix": 1, "first_sector": 0, "last_sector": 99},
+                    {"ix": 2, "first_sector": 100, "last_sector": 149},
+                ],
+            }
+        )
+
+        self.assertEqual(title.sectors, 150)
+
+    def test_min_dump_size(self):
+        title = Title.from_dict(
+            {
+                "ix": 1,
+                "length": 1.0,
+                "cell": [
+                    {"ix": 1, "first_sector": 0, "last_sector": 99},
+                    # two angles interleaved in sectors 100-299
+                    {
+                        "ix": 2,
+                        "block_mode": 1,
+                        "block_type": 1,
+                        "first_sector": 100,
+                        "last_sector": 279,
+                    },
+                    {
+                        "ix": 3,
+                        "block_mode": 3,
+                        "block_type": 1,
+                        "first_sector": 120,
+                        "last_sector": 299,
+                    },
+                    {"ix": 4, "first_sector": 300, "last_sector": 349},
+                ],
+            }
+        )
+
+        self.assertEqual(title.min_dump_size, 150 * 2048)
+
+    def test_pickle(self):
+        disc = pickle.loads(pickle.dumps(self.disc))
+        self.assertEqual(disc.track[0].chapter[2].start, 170.04)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -51,7 +51,7 @@ class TestDumpstream(TestDumpstreamBase):
 
 class Test_perform_dumpstream(TestDumpstreamBase):
     def test_outfile_exists(self):
-        self.remuxer._subprocess_run = MagicMock()
+        self.remuxer._subprocess_run = MagicMock(return_value=0)
 
         with patch.object(Path, "exists", return_value=True) as mock_method:
             self.remuxer._perform_dumpstream(self.outfile, [])
@@ -59,7 +59,7 @@ class Test_perform_dumpstream(TestDumpstreamBase):
         self.remuxer._subprocess_run.assert_not_called
 
     def test_outfile_exists_and_rewrite(self):
-        self.remuxer._subprocess_run = MagicMock()
+        self.remuxer._subprocess_run = MagicMock(return_value=0)
         self.remuxer.rewrite = True
         dump_cmd = ["binary", "arg1", "arg2"]
 
@@ -69,7 +69,7 @@ class Test_perform_dumpstream(TestDumpstreamBase):
         self.remuxer._subprocess_run.assert_called_with(dump_cmd, stdout=-3, stderr=-3)
 
     def test_outfile_not_exists(self):
-        self.remuxer._subprocess_run = MagicMock()
+        self.remuxer._subprocess_run = MagicMock(return_value=0)
         self.remuxer.rewrite = False
         dump_cmd = ["binary", "arg1", "arg2"]
 
@@ -1,7 +1,11 @@
+import threading
+import time
 import unittest
 
 from unittest.mock import MagicMock, patch
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from dvd_remuxer.dvdremux import DVDRemuxer
 from .dvdremux_test import DVDRemuxerTest
 from .lsdvd_test import lsdvd_test
 
@@ -140,6 +144,115 @@ timestamp: 00:13:18:239, filepos: 000000000
             },
         )
 
+    def test_extract_vobsubs(self):
+        self.remuxer._perform_extract_vobsubs = MagicMock()
+        file_stream = self.outdir / "TEST_DVD_1_video.vob"
+
+        with patch.object(Path, "exists", return_value=False) as mock_method:
+            output_files = self.remuxer.extract_vobsubs(
+                1, [[1, "ru"], [2, "fr"]], file_stream, self.outdir
+            )
+
+        self.assertListEqual(
+            output_files,
+            [
+                (
+                    self.outfile.with_suffix(".idx"),
+                    self.outfile.with_suffix(".sub"),
+                ),
+                (
+                    self.outdir / "TEST_DVD_1_vobsub_2_fr.idx",
+                    self.outdir / "TEST_DVD_1_vobsub_2_fr.sub",
+                ),
+            ],
+        )
+
+        file_stream_arg, writers = self.remuxer._perform_extract_vobsubs.call_args[0]
+        self.assertEqual(file_stream_arg, file_stream)
+        self.assertListEqual(sorted(writers.keys()), [0x20, 0x21])
+        self.assertEqual(writers[0x21].langcode, "fr")
+        self.assertEqual(writers[0x21].size, (720, 576))
+
+    def test_extract_vobsubs_outfile_exists(self):
+        self.remuxer._perform_extract_vobsubs = MagicMock()
+        file_stream = self.outdir / "TEST_DVD_1_video.vob"
+
+        with patch.object(Path, "exists", return_value=True) as mock_method:
+            self.remuxer.extract_vobsubs(1, [[1, "ru"]], file_stream, self.outdir)
+
+        self.remuxer._perform_extract_vobsubs.assert_not_called()
+
+
+class Test_dumpvobsub_list(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.outdir = Path(self.tmp_dir_obj.name)
+        self.remuxer = DVDRemuxer(
+            ".",
+            lsdvd=lsdvd_test.read("."),
+            dry_run=False,
+            rewrite=False,
+            use_sys_tmp_dir=False,
+            verbose=False,
+            file_prefix="TEST_DVD",
+            sub_jobs=2,
+        )
+        self.remuxer._subprocess_run = self.fake_mencoder
+        self.vobsubouts = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def fake_mencoder(self, cmd: list, **kwargs) -> None:
+        vobsubout = cmd[cmd.index("-vobsubout") + 1]
+
+        with self.lock:
+            self.vobsubouts.append(vobsubout)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        time.sleep(0.05)
+        Path("%s.idx" % (vobsubout)).write_text("id: , index: 0\n")
+        Path("%s.sub" % (vobsubout)).write_bytes(b"\x00" * 2048)
+
+        with self.lock:
+            self.running -= 1
+
+    def test_dumpvobsub_list(self):
+        subs_params = [[1, "ru"], [2, "fr"], [3, "en"]]
+        output_files = self.remuxer.dumpvobsub_list(1, subs_params, self.outdir)
+
+        self.assertListEqual(
+            [idx_file.name for idx_file, sub_file in output_files],
+            [
+                "TEST_DVD_1_vobsub_1_ru.idx",
+                "TEST_DVD_1_vobsub_2_fr.idx",
+                "TEST_DVD_1_vobsub_3_en.idx",
+            ],
+        )
+        self.assertEqual(output_files[1][0].read_text(), "id: fr, index: 0\n")
+        self.assertTrue(output_files[2][1].exists())
+        # the runs overlap, but not more than --sub-jobs
+        self.assertEqual(self.max_running, 2)
+        self.assertEqual(len(set(self.vobsubouts)), 3)
+        self.assertTrue(all(out.name.endswith(".part") for out in self.vobsubouts))
+        self.assertListEqual(sorted(self.outdir.glob("*.part*")), [])
+
+    def test_dumpvobsub_list_sequential(self):
+        self.remuxer.sub_jobs = 1
+        output_files = self.remuxer.dumpvobsub_list(
+            1, [[1, "ru"], [2, "fr"]], self.outdir
+        )
+
+        self.assertEqual(self.max_running, 1)
+        self.assertListEqual(
+            self.vobsubouts,
+            [idx_file.with_suffix("") for idx_file, sub_file in output_files],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -29,6 +29,29 @@ class TestDVDRemuxRemuxToMKV(unittest.TestCase):
             "TEST_DVD_1.DVDRemux.mkv",
         )
 
+    def test_remux_to_mkv_with_native_vobsub(self):
+        self.remuxer.native_vobsub = True
+
+        job = self.remuxer.prepare_remux(1, [[1, "ru"]], [[1, "ru"]], self.outdir)
+
+        self.assertIn(self.outdir / "TEST_DVD_1_vobsub_1_ru.idx", job.temp_files)
+
+    def test_prepare_remux(self):
+        job = self.remuxer.prepare_remux(1, [[1, "ru"]], [[1, "ru"]], self.outdir)
+
+        self.assertEqual(job.title_idx, 1)
+        self.assertEqual(job.outfile.name, "TEST_DVD_1.DVDRemux.mkv")
+        self.assertEqual(job.mkvmerge_cmd[0], "mkvmerge")
+        self.assertListEqual(
+            job.temp_files,
+            [
+                self.outdir / "TEST_DVD_1_video.vob",
+                self.outdir / "TEST_DVD_1_vobsub_1_ru.idx",
+                self.outdir / "TEST_DVD_1_vobsub_1_ru.sub",
+                self.outdir / "TEST_DVD_1_chapters.txt",
+            ],
+        )
+
     def test_remux_to_mkv_with_tmp_dir_obj(self):
         remuxer = DVDRemuxerTest(
             ".",
@@ -0,0 +1,142 @@
+import os
+import signal
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer.dvdremux import DVDRemuxer
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+
+class TestStreamMux(unittest.TestCase):
+    def setUp(self):
+        self.remuxer = DVDRemuxerTest(
+            ".",
+            lsdvd=lsdvd_test.read("."),
+            stream_mux=True,
+            file_prefix="TEST_DVD",
+        )
+        self.outdir = Path.cwd()
+
+    def test_gen_dumpstream_filename(self):
+        self.assertEqual(
+            self.remuxer.gen_dumpstream_filename(1, self.outdir, fifo=True),
+            self.outdir / "TEST_DVD_1_video.fifo.vob",
+        )
+        # --action stream writes an ordinary file
+        self.assertEqual(
+            self.remuxer.gen_dumpstream_filename(1, self.outdir),
+            self.outdir / "TEST_DVD_1_video.vob",
+        )
+
+    def test_prepare_remux(self):
+        job = self.remuxer.prepare_remux(1, [[1, "ru"]], [[1, "ru"]], self.outdir)
+
+        self.assertEqual(job.dump_args[-1], self.outdir / "TEST_DVD_1_video.fifo.vob")
+        self.assertIn(self.outdir / "TEST_DVD_1_video.fifo.vob", job.mkvmerge_cmd)
+        self.assertNotIn(self.outdir / "TEST_DVD_1_video.fifo.vob", job.temp_files)
+
+    def test_prepare_remux_native_vobsub_fallback(self):
+        self.remuxer.native_vobsub = True
+        job = self.remuxer.prepare_remux(1, [[1, "ru"]], [[1, "ru"]], self.outdir)
+
+        self.assertIn(self.outdir / "TEST_DVD_1_vobsub_1_ru.idx", job.temp_files)
+
+
+class TestRunStreamMux(unittest.TestCase):
+    def setUp(self):
+        self.remuxer = DVDRemuxer(
+            ".",
+            lsdvd=lsdvd_test.read("."),
+            stream_mux=True,
+            file_prefix="TEST_DVD",
+        )
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.fifo = self.tmp_dir / "TEST_DVD_1_video.fifo.vob"
+        self.outfile = self.tmp_dir / "TEST_DVD_1.DVDRemux.mkv"
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_stream_mux(self):
+        self.remuxer._perform_stream_mux(
+            ["sh", "-c", 'echo stream > "$0"', self.fifo],
+            ["sh", "-c", 'cat "$2" > "$1"', "--output", self.outfile, self.fifo],
+        )
+
+        self.assertEqual(self.outfile.read_text(), "stream\n")
+        self.assertFalse(self.fifo.exists())
+
+    def test_stream_mux_merge_failed(self):
+        with self.assertRaises(Exception) as cm:
+            self.remuxer._perform_stream_mux(
+                ["sh", "-c", 'echo stream > "$0"', self.fifo],
+                ["sh", "-c", 'echo > "$1"; exit 2', "--output", self.outfile],
+            )
+
+        self.assertEqual(str(cm.exception), "mkvmerge exited with code 2")
+        self.assertFalse(self.fifo.exists())
+        self.assertFalse(self.outfile.exists())
+
+    def test_stream_mux_dump_failed(self):
+        pid_file = self.tmp_dir / "cat.pid"
+
+        with self.assertRaises(Exception) as cm:
+            self.remuxer._perform_stream_mux(
+                ["sh", "-c", "exit 3", self.fifo],
+                # cat is a child of the shell, it is stopped with the shell
+                [
+                    "sh",
+                    "-c",
+                    'cat "$2" > "$1" & echo $! > "$3"; wait',
+                    "--output",
+                    self.outfile,
+                    self.fifo,
+                    pid_file,
+                ],
+            )
+
+        self.assertEqual(str(cm.exception), "mplayer exited with code 3")
+        self.assertFalse(self.fifo.exists())
+        self.assertFalse(self.outfile.exists())
+        wait_for_exit(int(pid_file.read_text()))
+
+    def test_stream_mux_dump_without_output(self):
+        # mplayer exits without opening the pipe, mkvmerge gets the end of file
+        self.remuxer._perform_stream_mux(
+            ["sh", "-c", "exit 0", self.fifo],
+            [
+                "sh",
+                "-c",
+                'echo > "$1"; cat "$2" >> "$1"',
+                "--output",
+                self.outfile,
+                self.fifo,
+            ],
+        )
+
+        self.assertEqual(self.outfile.read_text(), "\n")
+        self.assertFalse(self.fifo.exists())
+
+
+def wait_for_exit(pid: int, timeout: float = 5.0) -> None:
+    # the stopped grandchild is reaped by init
+    end = time.monotonic() + timeout
+
+    while time.monotonic() < end:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return
+
+        time.sleep(0.05)
+
+    os.kill(pid, signal.SIGKILL)
+    raise AssertionError("process %i is still running" % (pid))
+
+
+if __name__ == "__main__":
+    unittest.main()
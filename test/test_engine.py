@@ -0,0 +1,226 @@
+import asyncio
+import io
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer.engine import (
+    AsyncEngine,
+    TitleProgress,
+    parse_mencoder_progress,
+    parse_mkvmerge_progress,
+    parse_mplayer_dump,
+)
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+
+class TestProgressParsers(unittest.TestCase):
+    def test_parse_mkvmerge_progress(self):
+        self.assertEqual(parse_mkvmerge_progress(b"#GUI#progress 42%"), 0.42)
+        self.assertEqual(parse_mkvmerge_progress(b"Progress: 100%"), 1.0)
+        self.assertIsNone(parse_mkvmerge_progress(b"#GUI#begin_scanning_playlists"))
+
+    def test_parse_mencoder_progress(self):
+        self.assertEqual(
+            parse_mencoder_progress(b"Pos:  12.3s    308f ( 7%) 80.12fps Trem:   2min"),
+            0.07,
+        )
+        self.assertIsNone(parse_mencoder_progress(b"VobSub: 1 subtitles"))
+
+    def test_parse_mplayer_dump(self):
+        self.assertEqual(
+            parse_mplayer_dump(b"dump: 1048576 bytes written (~2.5%)"), 1048576
+        )
+        self.assertIsNone(parse_mplayer_dump(b"Playing dvd://1."))
+
+
+class TestTitleProgress(unittest.TestCase):
+    def test_progress(self):
+        progress = TitleProgress(1, "stream", 4 * 1048576)
+        progress.start -= 10
+        progress.update_bytes(1048576)
+
+        self.assertEqual(progress.fraction, 0.25)
+        self.assertAlmostEqual(progress.eta, 30, delta=0.5)
+        self.assertRegex(
+            progress.format(), r"^title #1 stream:  25% 1\.0 MiB \(.+\) ETA 0:00:3"
+        )
+
+    def test_unknown_size(self):
+        progress = TitleProgress(1, "stream")
+        progress.update_bytes(1048576)
+
+        self.assertIsNone(progress.fraction)
+        self.assertIsNone(progress.eta)
+
+
+class TestAsyncEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.updates = []
+        self.engine = AsyncEngine(
+            on_progress=lambda progress: self.updates.append(
+                (progress.title_idx, progress.stage, progress.fraction)
+            )
+        )
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def create_tool(self, name: str, script: str) -> Path:
+        tool = self.tmp_dir / name
+        tool.write_text("#!/bin/sh\n" + script)
+        tool.chmod(0o755)
+        return tool
+
+    def test_run(self):
+        mkvmerge = self.create_tool(
+            "mkvmerge",
+            '[ "$1" = --gui-mode ] || exit 2\n'
+            + "printf '#GUI#progress 50%%\\n#GUI#progress 100%%\\n'\n",
+        )
+
+        code = asyncio.run(self.engine.run([mkvmerge, "--output", "x"], 2, "merge"))
+
+        self.assertEqual(code, 0)
+        self.assertListEqual(
+            self.updates, [(2, "merge", 0.5), (2, "merge", 1.0), (2, "merge", 1.0)]
+        )
+        self.assertDictEqual(self.engine.progress, {})
+
+    def test_run_mplayer_status_line(self):
+        mplayer = self.create_tool(
+            "mplayer", "printf 'dump: 1024 bytes written\\rdump: 4096 bytes written'\n"
+        )
+
+        asyncio.run(self.engine.run([mplayer], 1, "stream", 4096, quiet=True))
+
+        self.assertListEqual(
+            self.updates,
+            [(1, "stream", 0.25), (1, "stream", 1.0), (1, "stream", 1.0)],
+        )
+
+    def test_remux_titles(self):
+        remuxer = DVDRemuxerTest(
+            ".", lsdvd=lsdvd_test.read("."), file_prefix="TEST_DVD"
+        )
+        commands = []
+        remuxer._subprocess_run = lambda cmd, **kwargs: commands.append(cmd[0])
+
+        with redirect_stdout(io.StringIO()):
+            outfiles = asyncio.run(
+                self.engine.remux_titles(
+                    remuxer, [(1, [[1, "en"]], []), (2, [[1, "en"]], [])], Path("."), 2
+                )
+            )
+
+        self.assertIs(remuxer.engine, self.engine)
+        self.assertListEqual(
+            outfiles,
+            [Path("TEST_DVD_1.DVDRemux.mkv"), Path("TEST_DVD_2.DVDRemux.mkv")],
+        )
+        self.assertListEqual(
+            sorted(commands), ["mkvmerge", "mkvmerge", "mplayer", "mplayer"]
+        )
+
+    def test_remux_titles_failed(self):
+        remuxer = DVDRemuxerTest(
+            ".", lsdvd=lsdvd_test.read("."), file_prefix="TEST_DVD"
+        )
+
+        with redirect_stdout(io.StringIO()), self.assertRaises(Exception) as cm:
+            asyncio.run(
+                self.engine.remux_titles(
+                    remuxer, [(1, [], []), (99, [], [])], Path(".")
+                )
+            )
+
+        self.assertEqual(str(cm.exception), "Failed titles: #99")
+
+    def test_subprocess_run(self):
+        remuxer = DVDRemuxerTest(".", lsdvd=lsdvd_test.read("."))
+        remuxer._subprocess_run = lambda cmd, **kwargs: super(
+            DVDRemuxerTest, remuxer
+        )._subprocess_run(cmd, **kwargs)
+        outfile = self.tmp_dir / "out"
+
+        def run():
+            remuxer._perform_stage(
+                3,
+                "merge",
+                [outfile],
+                lambda: remuxer._subprocess_run(["sh", "-c", 'echo 1 > "$0"', outfile]),
+            )
+
+        asyncio.run(self.engine.run_blocking(remuxer, run))
+
+        self.assertEqual(outfile.read_text(), "1\n")
+
+
+class TestAsyncStreamMux(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.fifo = self.tmp_dir / "TEST_DVD_1_video.fifo.vob"
+        self.outfile = self.tmp_dir / "TEST_DVD_1.DVDRemux.mkv"
+        self.remuxer = DVDRemuxerTest(
+            ".", lsdvd=lsdvd_test.read("."), stream_mux=True, file_prefix="TEST_DVD"
+        )
+        self.engine = AsyncEngine()
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def perform_stream_mux(self, dump_args: list, mkvmerge_cmd: list) -> None:
+        asyncio.run(
+            self.engine.run_blocking(
+                self.remuxer,
+                super(DVDRemuxerTest, self.remuxer)._perform_stream_mux,
+                dump_args,
+                mkvmerge_cmd,
+            )
+        )
+
+    def test_stream_mux(self):
+        self.perform_stream_mux(
+            ["sh", "-c", 'echo stream > "$0"', self.fifo],
+            ["sh", "-c", 'cat "$2" > "$1"', "--output", self.outfile, self.fifo],
+        )
+
+        self.assertEqual(self.outfile.read_text(), "stream\n")
+        self.assertFalse(self.fifo.exists())
+
+    def test_stream_mux_dump_failed(self):
+        with self.assertRaises(Exception) as cm:
+            self.perform_stream_mux(
+                ["sh", "-c", "exit 3", self.fifo],
+                # without exec cat would keep the output pipe of the stopped shell
+                [
+                    "sh",
+                    "-c",
+                    'exec cat "$2" > "$1"',
+                    "--output",
+                    self.outfile,
+                    self.fifo,
+                ],
+            )
+
+        self.assertEqual(str(cm.exception), "mplayer exited with code 3")
+        self.assertFalse(self.fifo.exists())
+        self.assertFalse(self.outfile.exists())
+
+    def test_stream_mux_dump_without_output(self):
+        self.perform_stream_mux(
+            ["sh", "-c", "exit 0", self.fifo],
+            ["sh", "-c", 'cat "$2" > "$1"', "--output", self.outfile, self.fifo],
+        )
+
+        self.assertEqual(self.outfile.read_text(), "")
+        self.assertFalse(self.fifo.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from benchmarks.discgen import encode_dvdtime
+from dvd_remuxer import ifo
+from dvd_remuxer.lsdvd import lsdvd
+from .ifo_test import create_iso, create_video_ts
+from .lsdvd_test import lsdvd_test, lsdvd_otput
+
+
+def select_keys(data, template):
+    # keep only the keys lsdvd output has, the IFO reader adds some more
+    if isinstance(template, dict):
+        return {key: select_keys(data[key], value) for key, value in template.items()}
+
+    if isinstance(template, list):
+        return [select_keys(item, value) for item, value in zip(data, template)]
+
+    return data
+
+
+class TestIfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.lsdvd_info = lsdvd_test.get_dvd_info(lsdvd_otput)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_read_iso_equals_lsdvd(self):
+        iso_file = create_iso(self.tmp_dir)
+        dvd_info = ifo.read(str(iso_file))
+
+        self.lsdvd_info["device"] = str(iso_file)
+
+        self.assertEqual(len(dvd_info["track"]), len(self.lsdvd_info["track"]))
+        self.assertDictEqual(select_keys(dvd_info, self.lsdvd_info), self.lsdvd_info)
+
+    def test_read_video_ts_equals_lsdvd(self):
+        create_video_ts(self.tmp_dir)
+        dvd_info = ifo.read(str(self.tmp_dir))
+
+        self.lsdvd_info["device"] = str(self.tmp_dir)
+        self.lsdvd_info["title"] = "unknown"
+
+        self.assertDictEqual(select_keys(dvd_info, self.lsdvd_info), self.lsdvd_info)
+
+    def test_read_cells(self):
+        create_video_ts(self.tmp_dir)
+        track = ifo.read(str(self.tmp_dir))["track"][0]
+
+        self.assertListEqual(
+            [(cell["first_sector"], cell["last_sector"]) for cell in track["cell"]],
+            [(0, 1007), (1008, 1698), (1699, 2478)],
+        )
+        self.assertListEqual([subp["streamid"] for subp in track["subp"]], [0x20, 0x21])
+        self.assertEqual(track["format"], "PAL")
+
+    def test_read_not_dvd(self):
+        with self.assertRaises(ifo.IfoError):
+            ifo.read(str(self.tmp_dir))
+
+    def test_read_not_iso(self):
+        not_iso = self.tmp_dir / "file.iso"
+        not_iso.write_bytes(b"\x00" * 40000)
+
+        with self.assertRaises(ifo.IfoError):
+            ifo.read(str(not_iso))
+
+    def test_lsdvd_read_native(self):
+        iso_file = create_iso(self.tmp_dir)
+        dvd = lsdvd.read(str(iso_file))
+
+        self.assertEqual(dvd.title, "TEST_DVD")
+        self.assertEqual(dvd.longest_title_idx(), 1)
+        self.assertListEqual(dvd.all_titles_idx(), [1, 2, 3])
+        self.assertEqual(dvd.track[0].chapter[1].length, 69.16)
+
+    def test_dvdtime_to_seconds(self):
+        self.assertEqual(ifo.dvdtime_to_seconds(encode_dvdtime(100.88)), 100.88)
+        self.assertEqual(
+            ifo.dvdtime_to_seconds(bytes([0x01, 0x02, 0x03, 0xC0 | 0x15])), 3723.501
+        )
+
+    def test_decode_langcode(self):
+        self.assertEqual(ifo.decode_langcode(b"en"), "en")
+        self.assertEqual(ifo.decode_langcode(b"\x00\x00"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
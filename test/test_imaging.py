@@ -0,0 +1,166 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from dvd_remuxer.disc import SECTOR_SIZE
+from dvd_remuxer.imaging import DiscImager, ImageError, gen_image_filename
+from dvd_remuxer.remux_service import RemuxService
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+from .test_remux_service import Args
+
+
+class FailingImager(DiscImager):
+    # fails on the given sectors, retries included
+    def __init__(self, device: str, outfile: Path, bad_sectors: set, **options):
+        super().__init__(device, outfile, **options)
+        self.failing = bad_sectors
+        self.reads = 0
+
+    def _pread(self, fd: int, length: int, position: int) -> bytes:
+        self.reads += 1
+        first = position // SECTOR_SIZE
+        last = (position + length - 1) // SECTOR_SIZE
+
+        if any(first <= sector <= last for sector in self.failing):
+            raise OSError(5, "Input/output error")
+
+        return super()._pread(fd, length, position)
+
+
+def write_image(outfile: Path) -> None:
+    outfile.write_bytes(b"\x01" * SECTOR_SIZE)
+
+
+class TestImaging(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.disc = self.tmp_dir / "disc"
+        self.disc.write_bytes(
+            b"".join(bytes([sector]) * SECTOR_SIZE for sector in range(10))
+        )
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_run(self):
+        image = self.tmp_dir / "disc.iso"
+
+        with redirect_stdout(io.StringIO()):
+            DiscImager(str(self.disc), image, block_sectors=4).run()
+
+        self.assertEqual(image.read_bytes(), self.disc.read_bytes())
+        self.assertFalse(image.with_name("disc.iso.part").exists())
+
+    def test_run_bad_sectors(self):
+        image = self.tmp_dir / "disc.iso"
+        imager = FailingImager(str(self.disc), image, {5}, block_sectors=4, retries=1)
+
+        with redirect_stdout(io.StringIO()) as output:
+            imager.run()
+
+        data = image.read_bytes()
+        self.assertEqual(imager.bad_sectors, [5])
+        self.assertEqual(len(data), 10 * SECTOR_SIZE)
+        self.assertEqual(data[5 * SECTOR_SIZE : 6 * SECTOR_SIZE], bytes(SECTOR_SIZE))
+        self.assertEqual(data[4 * SECTOR_SIZE : 5 * SECTOR_SIZE], b"\x04" * SECTOR_SIZE)
+        self.assertIn("1 unreadable sectors", output.getvalue())
+
+        # 3 blocks, a retry of the bad block and of the bad sector, 4 sectors
+        self.assertEqual(imager.reads, 3 + 1 + 1 + 4)
+
+    def test_run_empty(self):
+        empty = self.tmp_dir / "empty"
+        empty.touch()
+
+        with self.assertRaises(ImageError):
+            DiscImager(str(empty), self.tmp_dir / "empty.iso").run()
+
+    def test_gen_image_filename(self):
+        self.assertEqual(
+            gen_image_filename("/dev/sr0", Path("/tmp")), Path("/tmp/sr0.image.iso")
+        )
+        self.assertEqual(
+            gen_image_filename("/dev/sr0", Path("/tmp"), "0123456789abcdef"),
+            Path("/tmp/sr0.0123456789ab.image.iso"),
+        )
+
+    def test_service_image_first(self):
+        args = Args(dvd="/dev/sr0", action="chapters", image_first=True)
+        service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+        service.outdir = self.tmp_dir
+
+        with mock.patch("dvd_remuxer.remux_service.DiscImager") as imager_cls:
+            imager_cls.return_value.run.side_effect = lambda: write_image(
+                self.tmp_dir / "sr0.image.iso"
+            )
+            service.run()
+
+        imager_cls.assert_called_once_with("/dev/sr0", self.tmp_dir / "sr0.image.iso")
+        self.assertEqual(args.dvd, str(self.tmp_dir / "sr0.image.iso"))
+        # the image is removed without --keep
+        self.assertFalse((self.tmp_dir / "sr0.image.iso").exists())
+
+    def run_image_first(self, key: str, **args) -> mock.MagicMock:
+        args = Args(dvd="/dev/sr0", action="chapters", image_first=True, **args)
+        service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+        service.outdir = self.tmp_dir
+
+        with mock.patch(
+            "dvd_remuxer.remux_service.fingerprint", return_value=key
+        ), mock.patch("dvd_remuxer.remux_service.DiscImager") as imager_cls:
+            with redirect_stdout(io.StringIO()):
+                service.run()
+
+        return imager_cls
+
+    def test_service_image_first_reuse(self):
+        write_image(self.tmp_dir / "sr0.abc.image.iso")
+
+        imager_cls = self.run_image_first("abc", keep=True)
+
+        imager_cls.assert_not_called()
+        self.assertTrue((self.tmp_dir / "sr0.abc.image.iso").exists())
+
+    def test_service_image_first_other_disc(self):
+        write_image(self.tmp_dir / "sr0.abc.image.iso")
+
+        imager_cls = self.run_image_first("def", keep=True)
+
+        imager_cls.assert_called_once_with(
+            "/dev/sr0", self.tmp_dir / "sr0.def.image.iso"
+        )
+
+    def test_service_image_first_unidentified(self):
+        # the image may be of another disc
+        write_image(self.tmp_dir / "sr0.image.iso")
+
+        imager_cls = self.run_image_first(None, keep=True)
+
+        imager_cls.assert_called_once_with("/dev/sr0", self.tmp_dir / "sr0.image.iso")
+
+    def test_service_image_first_plan(self):
+        imager_cls = self.run_image_first("abc", plan=str(self.tmp_dir / "plan.json"))
+
+        imager_cls.assert_not_called()
+        # the plan reads the drive, no image that is removed at the end
+        plan = json.loads((self.tmp_dir / "plan.json").read_text())
+        self.assertEqual(plan["device"], "/dev/sr0")
+
+    def test_service_image_first_directory(self):
+        args = Args(dvd=".", action="chapters", image_first=True)
+
+        with redirect_stdout(io.StringIO()) as output:
+            RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+        self.assertEqual(args.dvd, ".")
+        self.assertIn("WARNING: . is not a drive", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
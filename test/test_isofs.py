@@ -0,0 +1,126 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from benchmarks.discgen import build_vmg_ifo
+from dvd_remuxer import ifo
+from dvd_remuxer.disc import Disc
+from dvd_remuxer.isofs import IsoFsError, IsoImage
+from dvd_remuxer.vobcopy import VobCopier
+from .ifo_test import build_iso, build_udf, build_vob, create_iso, title_sectors
+
+
+class TestIsoImage(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.iso_file = self.tmp_dir / "TEST_DVD.iso"
+        self.files = {
+            "VIDEO_TS.IFO": build_vmg_ifo([]),
+            "VTS_01_1.VOB": build_vob(0, 10),
+        }
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_iso9660(self):
+        self.iso_file.write_bytes(build_iso(self.files, "ISO_DVD"))
+        image = IsoImage(self.iso_file)
+
+        try:
+            self.assertEqual(image.filesystem, "ISO9660")
+            self.assertEqual(image.get_volume_id(), "ISO_DVD")
+            self.assertEqual(image.read_file("VTS_01_1.VOB"), build_vob(0, 10))
+            self.assertIsInstance(image.read_file("VTS_01_1.VOB"), memoryview)
+        finally:
+            image.close()
+
+    def test_udf(self):
+        self.iso_file.write_bytes(build_udf(self.files, "UDF_DVD"))
+        image = IsoImage(self.iso_file)
+
+        try:
+            self.assertEqual(image.filesystem, "UDF")
+            self.assertEqual(image.get_volume_id(), "UDF_DVD")
+            self.assertListEqual(sorted(image.files), sorted(self.files))
+            self.assertEqual(
+                image.read_file("VIDEO_TS.IFO"), self.files["VIDEO_TS.IFO"]
+            )
+        finally:
+            image.close()
+
+    def test_udf_extents(self):
+        self.iso_file.write_bytes(build_udf(self.files, extent_sectors=4))
+        image = IsoImage(self.iso_file)
+
+        try:
+            self.assertEqual(len(image.extents("VTS_01_1.VOB")), 3)
+            self.assertEqual(image.read_file("VTS_01_1.VOB"), build_vob(0, 10))
+        finally:
+            image.close()
+
+    def test_extract(self):
+        self.iso_file.write_bytes(build_udf(self.files, extent_sectors=4))
+        outfile = self.tmp_dir / "VTS_01_1.VOB"
+        image = IsoImage(self.iso_file)
+
+        try:
+            image.extract("VTS_01_1.VOB", outfile)
+        finally:
+            image.close()
+
+        self.assertEqual(outfile.read_bytes(), build_vob(0, 10))
+
+    def test_file_not_found(self):
+        self.iso_file.write_bytes(build_iso(self.files))
+        image = IsoImage(self.iso_file)
+
+        try:
+            with self.assertRaisesRegex(IsoFsError, "VTS_01_0.IFO not found"):
+                image.read_file("VTS_01_0.IFO")
+        finally:
+            image.close()
+
+    def test_close_with_views_in_use(self):
+        self.iso_file.write_bytes(build_iso(self.files))
+        image = IsoImage(self.iso_file)
+        data = image.read_file("VTS_01_1.VOB")
+
+        image.close()
+
+        self.assertEqual(data, build_vob(0, 10))
+
+    def test_not_an_image(self):
+        self.iso_file.write_bytes(b"\x00" * 600 * 2048)
+
+        with self.assertRaises(IsoFsError):
+            IsoImage(self.iso_file)
+
+
+class TestUdfDvd(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_read_udf(self):
+        iso_file = create_iso(self.tmp_dir, udf=True)
+        dvd_info = ifo.read(str(iso_file))
+
+        self.assertEqual(dvd_info["title"], "TEST_DVD")
+        self.assertEqual(dvd_info["longest_track"], 1)
+
+    def test_copy_from_udf(self):
+        iso_file = create_iso(self.tmp_dir, with_vobs=True, udf=True)
+        outfile = self.tmp_dir / "TEST_DVD_1_video.vob"
+        source = ifo.open_video_ts(str(iso_file))
+
+        try:
+            disc = Disc.from_dict(ifo.read_dvd_info(source, str(iso_file)))
+            VobCopier(source, disc.track[0]).copy(outfile)
+        finally:
+            source.close()
+
+        self.assertEqual(outfile.read_bytes(), build_vob(0, title_sectors()))
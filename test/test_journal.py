@@ -0,0 +1,260 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock
+
+from dvd_remuxer.disc import Cell
+from dvd_remuxer.journal import Journal, file_checksum
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.journal_file = self.tmp_dir / "TEST_DVD_1.journal.json"
+        self.file = self.tmp_dir / "TEST_DVD_1_video.vob"
+        self.file.write_bytes(b"\x01" * 4096)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_record(self):
+        journal = Journal(self.journal_file)
+
+        self.assertFalse(journal.is_done("stream", [self.file]))
+        self.assertTrue(journal.record("stream", [self.file]))
+        self.assertTrue(journal.is_done("stream", [self.file]))
+
+        self.assertTrue(Journal(self.journal_file).is_done("stream", [self.file]))
+
+    def test_record_missing_file(self):
+        journal = Journal(self.journal_file)
+
+        self.assertFalse(journal.record("stream", [self.tmp_dir / "missing.vob"]))
+        self.assertNotIn("stream", journal.stages)
+
+    def test_changed_file(self):
+        journal = Journal(self.journal_file)
+        journal.record("stream", [self.file])
+
+        self.file.write_bytes(b"\x02" * 4096)
+
+        self.assertFalse(journal.is_done("stream", [self.file]))
+
+    def test_truncated_file(self):
+        journal = Journal(self.journal_file)
+        journal.record("stream", [self.file])
+
+        self.file.write_bytes(b"\x01" * 2048)
+
+        self.assertFalse(journal.is_done("stream", [self.file]))
+
+    def test_record_incomplete_file(self):
+        journal = Journal(self.journal_file)
+
+        with redirect_stdout(io.StringIO()):
+            self.assertFalse(journal.record("stream", [self.file], 8192))
+
+        self.assertNotIn("stream", journal.stages)
+
+        self.assertTrue(journal.record("stream", [self.file], 4096))
+        record = journal.stages["stream"]["files"][str(self.file)]
+        self.assertEqual(record["min_size"], 4096)
+
+    def test_forget(self):
+        journal = Journal(self.journal_file)
+        journal.record("stream", [self.file])
+        journal.forget("stream")
+
+        self.assertFalse(Journal(self.journal_file).is_done("stream", [self.file]))
+
+    def test_remove(self):
+        journal = Journal(self.journal_file)
+        journal.record("stream", [self.file])
+        journal.remove()
+
+        self.assertFalse(self.journal_file.exists())
+        self.assertFalse(journal.is_done("stream", [self.file]))
+
+    def test_broken_journal(self):
+        self.journal_file.write_text("{")
+
+        self.assertDictEqual(Journal(self.journal_file).stages, {})
+
+    def test_file_checksum(self):
+        checksum = file_checksum(self.file)
+
+        self.assertEqual(checksum, file_checksum(self.file))
+
+        self.file.write_bytes(b"\x01" * 4095 + b"\x02")
+
+        self.assertNotEqual(checksum, file_checksum(self.file))
+
+
+class TestRemuxerResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.remuxer = self.create_remuxer()
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def create_remuxer(self) -> DVDRemuxerTest:
+        remuxer = DVDRemuxerTest(
+            ".",
+            lsdvd=lsdvd_test.read("."),
+            dry_run=False,
+            keep_temp_files=False,
+            rewrite=False,
+            use_sys_tmp_dir=False,
+            tmp_dir=self.tmp_dir,
+            verbose=False,
+            file_prefix="TEST_DVD",
+            resume=True,
+        )
+        remuxer._perform_dumpstream = MagicMock(
+            side_effect=lambda outfile, dump_args: outfile.write_bytes(b"\x01" * 4096)
+        )
+
+        remuxer._save_to_file = lambda outfile, data: outfile.write_text(data)
+
+        return remuxer
+
+    def test_dumpstream_skipped_on_resume(self):
+        outfile = self.remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer = self.create_remuxer()
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        self.assertEqual(self.remuxer._perform_dumpstream.call_count, 1)
+        remuxer._perform_dumpstream.assert_not_called()
+        self.assertTrue((self.tmp_dir / "TEST_DVD_1.journal.json").exists())
+        self.assertEqual(outfile.stat().st_size, 4096)
+
+    def test_dumpstream_repeated_when_file_changed(self):
+        outfile = self.remuxer.dumpstream(1, self.tmp_dir)
+        outfile.write_bytes(b"\x01" * 1024)
+
+        remuxer = self.create_remuxer()
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_called_once()
+        self.assertEqual(outfile.stat().st_size, 4096)
+
+    def test_dumpstream_repeated_on_rewrite(self):
+        self.remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer = self.create_remuxer()
+        remuxer.rewrite = True
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_called_once()
+
+    def test_dumpstream_shorter_than_angle_block(self):
+        # the cells have 4 sectors but the dump of an angle block is shorter
+        self.remuxer.lsdvd.track[0].cell = [
+            Cell(1, 1.0, block_mode=1, block_type=1, first_sector=0, last_sector=3),
+            Cell(2, 1.0, block_mode=3, block_type=1, first_sector=1, last_sector=3),
+        ]
+        self.remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer = self.create_remuxer()
+        remuxer.lsdvd.track[0].cell = self.remuxer.lsdvd.track[0].cell
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_not_called()
+
+    def test_dumpstream_shorter_than_cells(self):
+        self.remuxer.lsdvd.track[0].cell = [Cell(1, 1.0, first_sector=0, last_sector=3)]
+
+        with redirect_stdout(io.StringIO()) as output:
+            with self.assertRaisesRegex(Exception, "stream stage is incomplete"):
+                self.remuxer.dumpstream(1, self.tmp_dir)
+
+        self.assertIn("4096 of at least 8192 bytes", output.getvalue())
+        self.assertNotIn("stream", self.remuxer.get_journal(1, self.tmp_dir).stages)
+
+    def test_dumpstream_failed(self):
+        # mplayer stopped by a read error leaves a truncated dump behind
+        def run_mplayer(cmd, **kwargs):
+            cmd[-1].write_bytes(b"\x01" * 2048)
+            return 1
+
+        remuxer = self.create_remuxer()
+        del remuxer._perform_dumpstream
+        remuxer._subprocess_run = MagicMock(side_effect=run_mplayer)
+
+        with self.assertRaisesRegex(Exception, "mplayer exited with code 1"):
+            remuxer.dumpstream(1, self.tmp_dir)
+
+        self.assertNotIn("stream", remuxer.get_journal(1, self.tmp_dir).stages)
+
+        remuxer = self.create_remuxer()
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_called_once()
+
+    def test_dumpstream_missing(self):
+        self.remuxer._perform_dumpstream = MagicMock()
+
+        with self.assertRaisesRegex(Exception, "stream stage is incomplete"):
+            self.remuxer.dumpstream(1, self.tmp_dir)
+
+    def write_mkv(self, cmd: list, **kwargs) -> None:
+        Path(cmd[cmd.index("--output") + 1]).write_bytes(b"\x1a\x45\xdf\xa3")
+
+    def test_remux_skipped_when_merged(self):
+        # the journal is kept with the temp files
+        self.remuxer.keep_temp_files = True
+        self.remuxer._subprocess_run = MagicMock(side_effect=self.write_mkv)
+        self.remuxer.remux_to_mkv(1, [[1, "ru"]], [], self.tmp_dir)
+
+        remuxer = self.create_remuxer()
+        remuxer._subprocess_run = MagicMock()
+        outfile = remuxer.remux_to_mkv(1, [[1, "ru"]], [], self.tmp_dir)
+
+        remuxer._subprocess_run.assert_not_called()
+        remuxer._perform_dumpstream.assert_not_called()
+        self.assertEqual(outfile, self.tmp_dir / "TEST_DVD_1.DVDRemux.mkv")
+
+    def test_journal_removed_after_title(self):
+        self.remuxer._subprocess_run = MagicMock(side_effect=self.write_mkv)
+        self.remuxer.remux_to_mkv(1, [[1, "ru"]], [], self.tmp_dir)
+
+        self.assertFalse((self.tmp_dir / "TEST_DVD_1.journal.json").exists())
+        self.assertDictEqual(self.remuxer.journals, {})
+
+    def test_extract_vobsubs_skipped_on_resume(self):
+        self.remuxer._perform_extract_vobsubs = MagicMock(
+            side_effect=lambda file_stream, writers: [
+                (writer.outfile_idx.write_text("idx"), writer.outfile_sub.touch())
+                for writer in writers.values()
+            ]
+        )
+        file_stream = self.tmp_dir / "TEST_DVD_1_video.vob"
+        self.remuxer.extract_vobsubs(1, [[1, "ru"]], file_stream, self.tmp_dir)
+
+        remuxer = self.create_remuxer()
+        remuxer._perform_extract_vobsubs = MagicMock()
+        remuxer.extract_vobsubs(1, [[1, "ru"]], file_stream, self.tmp_dir)
+
+        self.remuxer._perform_extract_vobsubs.assert_called_once()
+        remuxer._perform_extract_vobsubs.assert_not_called()
+
+    def test_resume_with_sys_tmp_dir(self):
+        with redirect_stdout(io.StringIO()) as output:
+            remuxer = DVDRemuxerTest(".", resume=True, use_sys_tmp_dir=True)
+
+        self.assertFalse(remuxer.resume)
+        self.assertIn("WARNING: --resume does not work", output.getvalue())
+
+    def test_no_journal_without_resume(self):
+        self.remuxer.resume = False
+        self.remuxer.dumpstream(1, self.tmp_dir)
+
+        self.assertFalse((self.tmp_dir / "TEST_DVD_1.journal.json").exists())
@@ -0,0 +1,74 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from dvd_remuxer.disc import Cell, Chapter, Disc, Title
+from dvd_remuxer.main_feature import find_main_feature, score_titles
+
+# the cells of the feature as stored in the VOB files
+FEATURE_CELLS = [(i * 1000, i * 1000 + 999) for i in range(12)]
+
+
+def title(ix: int, order: list, length: float = 7200.0, chapters: int = 1) -> Title:
+    return Title(
+        ix,
+        length,
+        vts=1,
+        cell=[
+            Cell(i + 1, 600.0, first_sector=first, last_sector=last)
+            for i, (first, last) in enumerate(order)
+        ],
+        chapter=[Chapter(i + 1, 600.0) for i in range(chapters)],
+    )
+
+
+def shuffled(seed: int) -> list:
+    # a fixed permutation of the feature cells
+    return [FEATURE_CELLS[(i * seed) % 12] for i in range(12)]
+
+
+class TestMainFeature(unittest.TestCase):
+    def test_obfuscated_disc(self):
+        titles = [title(ix, shuffled(seed)) for ix, seed in enumerate([5, 7, 11], 1)]
+        titles.append(title(4, FEATURE_CELLS, length=7190.0, chapters=12))
+        titles.append(title(5, FEATURE_CELLS[:6] + FEATURE_CELLS[:6]))
+        # extras are not candidates
+        titles.append(title(6, [(20000, 20999)], length=120.0))
+
+        disc = Disc(".", "TEST_DVD", titles, longest_track=1)
+
+        self.assertEqual(find_main_feature(disc), 4)
+
+        scores = score_titles(titles)
+        self.assertListEqual([result.title.ix for result in scores], [4, 5, 1, 2, 3])
+        self.assertEqual(scores[0].contiguous, 11)
+        self.assertEqual(scores[1].repeated, 6)
+
+    def test_junk_cells(self):
+        titles = [
+            title(1, FEATURE_CELLS[:6] + [(50000, 50999)] + FEATURE_CELLS[6:]),
+            title(2, FEATURE_CELLS),
+        ]
+
+        self.assertEqual(score_titles(titles)[0].title.ix, 2)
+
+    def test_verbose(self):
+        disc = Disc(".", "TEST_DVD", [title(1, FEATURE_CELLS)], longest_track=1)
+
+        with redirect_stdout(io.StringIO()) as output:
+            find_main_feature(disc, verbose=True)
+
+        self.assertEqual(
+            output.getvalue(),
+            "title #1: score 1.01, 12 cells, 11 contiguous, 0 backward jumps,"
+            " 0 repeated, 0% shared\n",
+        )
+
+    def test_without_cells(self):
+        disc = Disc(".", "TEST_DVD", [Title(1, 10.0), Title(2, 20.0)], longest_track=2)
+
+        self.assertEqual(find_main_feature(disc), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
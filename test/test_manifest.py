@@ -0,0 +1,200 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+from dvd_remuxer import manifest
+from dvd_remuxer.manifest import OutputManifest, get_outputs
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+INPUTS = {
+    "disc": "0123",
+    "title": 1,
+    "audio": [[1, "ru"]],
+    "subs": [[1, "ru"]],
+    "aspect_ratio": None,
+    "split_chapters": False,
+    "tools": {"mkvmerge": "mkvmerge v1", "mplayer": None, "mencoder": None},
+}
+
+
+class TestOutputManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.outfile = self.tmp_dir / "TEST_DVD_1.DVDRemux.mkv"
+        self.outfile.write_bytes(b"\x1a" * 8192)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_save(self):
+        self.assertTrue(OutputManifest(self.outfile, INPUTS).save())
+
+        self.assertTrue(
+            (self.tmp_dir / "TEST_DVD_1.DVDRemux.mkv.manifest.json").exists()
+        )
+        self.assertTrue(OutputManifest(self.outfile, dict(INPUTS)).is_current())
+
+    def test_missing_manifest(self):
+        self.assertFalse(OutputManifest(self.outfile, INPUTS).is_current())
+
+    def test_save_without_output(self):
+        self.outfile.unlink()
+
+        self.assertFalse(OutputManifest(self.outfile, INPUTS).save())
+
+    def test_changed_inputs(self):
+        OutputManifest(self.outfile, INPUTS).save()
+
+        for key, value in (
+            ("subs", []),
+            ("aspect_ratio", "16/9"),
+            ("split_chapters", True),
+            ("tools", {"mkvmerge": "mkvmerge v2"}),
+            ("disc", "4567"),
+        ):
+            inputs = dict(INPUTS)
+            inputs[key] = value
+
+            self.assertFalse(OutputManifest(self.outfile, inputs).is_current(), key)
+
+    def test_changed_output(self):
+        OutputManifest(self.outfile, INPUTS).save()
+
+        self.outfile.write_bytes(b"\x1b" * 8192)
+
+        self.assertFalse(OutputManifest(self.outfile, INPUTS).is_current())
+
+    def test_truncated_output(self):
+        OutputManifest(self.outfile, INPUTS).save()
+
+        self.outfile.write_bytes(b"\x1a" * 4096)
+
+        self.assertFalse(OutputManifest(self.outfile, INPUTS).is_current())
+
+    def test_split_outputs(self):
+        self.outfile.unlink()
+        for i in (1, 2):
+            (self.tmp_dir / ("TEST_DVD_1.DVDRemux-%03i.mkv" % (i))).write_bytes(
+                b"\x1a" * 4096
+            )
+
+        self.assertEqual(
+            [file.name for file in get_outputs(self.outfile)],
+            ["TEST_DVD_1.DVDRemux-001.mkv", "TEST_DVD_1.DVDRemux-002.mkv"],
+        )
+
+        OutputManifest(self.outfile, INPUTS).save()
+        self.assertTrue(OutputManifest(self.outfile, INPUTS).is_current())
+
+        (self.tmp_dir / "TEST_DVD_1.DVDRemux-002.mkv").unlink()
+        self.assertFalse(OutputManifest(self.outfile, INPUTS).is_current())
+
+    def test_tool_version_missing_tool(self):
+        with patch.dict(manifest.VERSION_CMDS, {"mkvmerge": ["missing-mkvmerge"]}):
+            self.assertIsNone(manifest.read_tool_version("mkvmerge"))
+
+
+class TestRemuxerManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.outdir = Path(self.tmp_dir_obj.name)
+        self.remuxer = DVDRemuxerTest(
+            ".",
+            lsdvd=lsdvd_test.read("."),
+            file_prefix="TEST_DVD",
+            tmp_dir=self.outdir,
+        )
+        self.remuxer.disc_fingerprint = "0123"
+        self.outfile = self.outdir / "TEST_DVD_1.DVDRemux.mkv"
+
+        patcher = patch("dvd_remuxer.dvdremux.get_tool_version", return_value="v1")
+        self.get_tool_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def remux(self):
+        return self.remuxer.prepare_remux(1, [[1, "ru"]], [[1, "ru"]], self.outdir)
+
+    def test_up_to_date(self):
+        job = self.remux()
+        self.assertFalse(job.done)
+
+        self.outfile.write_bytes(b"\x1a" * 4096)
+        self.remuxer.merge_remux(job)
+
+        job = self.remux()
+        self.assertTrue(job.done)
+        self.assertEqual(self.remuxer.merge_remux(job), self.outfile)
+
+    def test_rewrite(self):
+        self.outfile.write_bytes(b"\x1a" * 4096)
+        self.remuxer.merge_remux(self.remux())
+
+        self.remuxer.rewrite = True
+
+        self.assertFalse(self.remux().done)
+
+    def test_other_params(self):
+        self.outfile.write_bytes(b"\x1a" * 4096)
+        self.remuxer.merge_remux(self.remux())
+
+        job = self.remuxer.prepare_remux(1, [[1, "ru"]], [], self.outdir)
+
+        self.assertFalse(job.done)
+
+    def test_without_fingerprint(self):
+        self.remuxer.disc_fingerprint = ""
+        self.outfile.write_bytes(b"\x1a" * 4096)
+
+        self.remuxer.merge_remux(self.remux())
+
+        self.assertFalse(self.remux().done)
+        self.assertFalse(
+            (self.outdir / "TEST_DVD_1.DVDRemux.mkv.manifest.json").exists()
+        )
+
+    def test_dry_run(self):
+        self.remuxer.dry_run = True
+        self.remuxer.disc_fingerprint = None
+        self.outfile.write_bytes(b"\x1a" * 4096)
+
+        self.remuxer.merge_remux(self.remux())
+
+        self.assertFalse(
+            (self.outdir / "TEST_DVD_1.DVDRemux.mkv.manifest.json").exists()
+        )
+        self.get_tool_version.assert_not_called()
+        self.assertIsNone(self.remuxer.disc_fingerprint)
+
+    def run_mkvmerge(self, code: int) -> MagicMock:
+        # the dumps before the merge succeed
+        return MagicMock(
+            side_effect=lambda cmd, **kwargs: code if cmd[0] == "mkvmerge" else 0
+        )
+
+    def test_failed_merge(self):
+        self.remuxer._subprocess_run = self.run_mkvmerge(2)
+        self.outfile.write_bytes(b"\x1a" * 4096)
+
+        with self.assertRaisesRegex(Exception, "mkvmerge exited with code 2"):
+            self.remuxer.merge_remux(self.remux())
+
+        self.assertFalse(self.outfile.exists())
+        self.assertFalse(
+            (self.outdir / "TEST_DVD_1.DVDRemux.mkv.manifest.json").exists()
+        )
+
+    def test_merge_warnings(self):
+        self.remuxer._subprocess_run = self.run_mkvmerge(1)
+        self.outfile.write_bytes(b"\x1a" * 4096)
+
+        self.remuxer.merge_remux(self.remux())
+
+        self.assertTrue(
+            (self.outdir / "TEST_DVD_1.DVDRemux.mkv.manifest.json").exists()
+        )
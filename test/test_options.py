@@ -58,6 +58,61 @@ class TestOptions(unittest.TestCase):
         args = self.argparser.parse_args(["--add-sub-langcode", "ru,en,jp", "."])
         self.assertListEqual(args.add_sub_langcode, ["ru", "en", "jp"])
 
+    def test_jobs(self):
+        args = self.argparser.parse_args(["--jobs", "4", "."])
+        self.assertEqual(args.jobs, 4)
+
+    def test_jobs_default(self):
+        args = self.argparser.parse_args(["."])
+        self.assertEqual(args.jobs, 1)
+
+    def test_jobs_invalid(self):
+        with self.assertRaises(SystemExit) as cm:
+            self.argparser.parse_args(["--jobs", "0", "."])
+
+        self.assertEqual(cm.exception.code, 2)
+
+    def test_plan_with_sys_tmp_dir(self):
+        args = self.argparser.parse_args(["--plan", "plan.json", "."])
+        self.assertIs(options.check_args(self.argparser, args), args)
+
+        args = self.argparser.parse_args(
+            ["--plan", "plan.json", "--use-sys-tmp-dir", "."]
+        )
+        with self.assertRaises(SystemExit) as cm:
+            options.check_args(self.argparser, args)
+
+        self.assertEqual(cm.exception.code, 2)
+
+    def test_batch_and_daemon_plan_default(self):
+        args = options.create_batch_argparser().parse_args(["."])
+        self.assertIsNone(args.plan)
+        self.assertIsNone(args.execute_plan)
+
+        args = options.create_daemon_argparser().parse_args(["--socket", "s"])
+        self.assertIsNone(args.plan)
+        self.assertIsNone(args.execute_plan)
+
+    def test_async_with_pipeline(self):
+        with self.assertRaises(SystemExit) as cm:
+            self.argparser.parse_args(["--async", "--pipeline", "."])
+
+        self.assertEqual(cm.exception.code, 2)
+
+    def test_pipeline_with_jobs(self):
+        args = self.argparser.parse_args(["--pipeline", "."])
+        self.assertIs(options.check_args(self.argparser, args), args)
+
+        args = self.argparser.parse_args(["--jobs", "2", "--pipeline", "."])
+        with self.assertRaises(SystemExit) as cm:
+            options.check_args(self.argparser, args)
+
+        self.assertEqual(cm.exception.code, 2)
+
+    def test_sub_jobs(self):
+        args = self.argparser.parse_args(["--sub-jobs", "3", "."])
+        self.assertEqual(args.sub_jobs, 3)
+
 
 if __name__ == "__main__":
     unittest.main()
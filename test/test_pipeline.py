@@ -0,0 +1,49 @@
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from dvd_remuxer.pipeline import RemuxPipeline
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+
+class TestRemuxPipeline(unittest.TestCase):
+    def setUp(self):
+        self.remuxer = DVDRemuxerTest(
+            ".",
+            lsdvd=lsdvd_test.read("."),
+            file_prefix="TEST_DVD",
+        )
+        self.outdir = Path.cwd()
+
+    def test_run(self):
+        outfiles = RemuxPipeline(self.remuxer).run(
+            [(1, [[1, "en"]], [[1, "ru"]]), (2, [], []), (3, [], [])], self.outdir
+        )
+
+        self.assertListEqual(
+            [outfile.name for outfile in outfiles],
+            [
+                "TEST_DVD_1.DVDRemux.mkv",
+                "TEST_DVD_2.DVDRemux.mkv",
+                "TEST_DVD_3.DVDRemux.mkv",
+            ],
+        )
+
+    def test_run_read_error(self):
+        with self.assertRaises(Exception) as cm:
+            RemuxPipeline(self.remuxer).run([(5, [], []), (2, [], [])], self.outdir)
+
+        self.assertEqual(str(cm.exception), "Failed titles: #5")
+
+    def test_run_write_error(self):
+        self.remuxer.merge_remux = MagicMock(side_effect=Exception("mkvmerge"))
+
+        with self.assertRaises(Exception) as cm:
+            RemuxPipeline(self.remuxer).run([(2, [], []), (3, [], [])], self.outdir)
+
+        self.assertEqual(str(cm.exception), "Failed titles: #2, #3")
+
+
+if __name__ == "__main__":
+    unittest.main()
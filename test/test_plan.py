@@ -0,0 +1,245 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer.plan import (
+    PlanError,
+    PlanExecutor,
+    build_plan,
+    check_plan,
+    get_ready_stages,
+    load_plan,
+    save_plan,
+)
+from dvd_remuxer.remux_service import RemuxService
+from dvd_remuxer.staging import DVD_MAX_BYTES_PER_SECOND
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+from .test_remux_service import Args
+
+
+class FileRemuxer(DVDRemuxerTest):
+    # writes the outputs of the tools and records the commands
+    def __init__(self, device: str, **options):
+        super().__init__(device, **options)
+        self.commands = []
+
+    def _subprocess_run(self, cmd: list, **kwargs) -> None:
+        self.commands.append([str(arg) for arg in cmd])
+
+        if cmd[0] == "mplayer":
+            Path(cmd[-1]).write_bytes(b"\x00" * 2048)
+        elif cmd[0] == "mencoder":
+            vobsubout = cmd[cmd.index("-vobsubout") + 1]
+            Path("%s.idx" % (vobsubout)).write_text("# VobSub index file, v7\n")
+            Path("%s.sub" % (vobsubout)).write_bytes(b"\x00" * 2048)
+        elif cmd[0] == "mkvmerge":
+            Path(cmd[cmd.index("--output") + 1]).write_bytes(b"\x1a" * 2048)
+
+    def _save_to_file(self, outfile: Path, data: str) -> None:
+        outfile.write_text(data)
+
+    def _rm_temp_files(self, temp_files: list = None) -> None:
+        for file in temp_files:
+            file.unlink()
+
+
+class TestPlan(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def create_service(self, **args) -> RemuxService:
+        service = RemuxService(lsdvd_test, DVDRemuxerTest, Args(dvd=".", **args))
+        service.outdir = self.tmp_dir
+        service.tmp_dir = self.tmp_dir
+        service.langcodes = service._create_remuxer().langcodes
+
+        return service
+
+    def test_build_plan(self):
+        plan = build_plan(self.create_service(), [1, 2])
+
+        self.assertEqual(
+            [stage["id"] for stage in plan["stages"]],
+            [
+                "title1/stream",
+                "title1/vobsub_1_ru",
+                "title1/chapters",
+                "title1/merge",
+                "title2/stream",
+                "title2/chapters",
+                "title2/merge",
+            ],
+        )
+
+        stream, vobsub, chapters, merge = plan["stages"][:4]
+        self.assertEqual(stream["argv"][0], "mplayer")
+        self.assertEqual(stream["inputs"], ["."])
+        self.assertEqual(vobsub["argv"][0], "mencoder")
+        self.assertIsNone(chapters["argv"])
+        self.assertIn("CHAPTER01=00:00:00.000", chapters["content"])
+        self.assertEqual(merge["argv"][0], "mkvmerge")
+        self.assertEqual(
+            merge["deps"], ["title1/stream", "title1/vobsub_1_ru", "title1/chapters"]
+        )
+        self.assertEqual(
+            merge["inputs"],
+            stream["outputs"] + vobsub["outputs"] + chapters["outputs"],
+        )
+        self.assertEqual(
+            merge["outputs"], [str(self.tmp_dir / "TEST_DVD_1.DVDRemux.mkv")]
+        )
+        self.assertEqual(len(merge["temp_files"]), 4)
+
+        # titles without cells are estimated from their length
+        self.assertEqual(plan["titles"][0]["estimated_by"], "length")
+        self.assertEqual(stream["read_bytes"], 3600 * DVD_MAX_BYTES_PER_SECOND)
+        self.assertEqual(
+            plan["totals"]["read_bytes"],
+            sum(stage["read_bytes"] for stage in plan["stages"]),
+        )
+
+    def test_build_plan_stream_mux(self):
+        plan = build_plan(self.create_service(stream_mux=True, keep=True), [1])
+        merge = plan["stages"][-1]
+
+        self.assertNotIn("title1/stream", [stage["id"] for stage in plan["stages"]])
+        self.assertEqual(merge["stream_argv"][0], "mplayer")
+        self.assertTrue(merge["stream_argv"][-1].endswith(".fifo.vob"))
+        self.assertEqual(merge["inputs"][0], ".")
+        self.assertEqual(merge["temp_files"], [])
+
+    def test_build_plan_actions(self):
+        plan = build_plan(self.create_service(action="subs"), [1])
+        self.assertEqual(
+            [stage["id"] for stage in plan["stages"]], ["title1/vobsub_1_ru"]
+        )
+
+        plan = build_plan(self.create_service(action="chapters"), [1, 2])
+        self.assertEqual(
+            [stage["id"] for stage in plan["stages"]],
+            ["title1/chapters", "title2/chapters"],
+        )
+
+    def test_run_saves_plan(self):
+        plan_file = self.tmp_dir / "plan.json"
+        service = self.create_service(title_idx=[1], plan=str(plan_file))
+
+        service.run()
+
+        plan = load_plan(plan_file)
+        self.assertEqual(plan["totals"]["stages"], 4)
+
+    def test_load_plan(self):
+        plan_file = self.tmp_dir / "plan.json"
+        plan_file.write_text(json.dumps({"version": 0, "stages": []}))
+
+        with self.assertRaises(PlanError):
+            load_plan(plan_file)
+
+    def test_check_plan(self):
+        with self.assertRaises(PlanError):
+            check_plan([{"id": "a", "deps": ["b"]}])
+
+        with self.assertRaises(PlanError):
+            check_plan([{"id": "a", "deps": ["b"]}, {"id": "b", "deps": ["a"]}])
+
+        check_plan([{"id": "a", "deps": []}, {"id": "b", "deps": ["a"]}])
+
+    def test_get_ready_stages(self):
+        stages = [
+            {"id": "a", "deps": []},
+            {"id": "b", "deps": ["a"]},
+            {"id": "c", "deps": []},
+        ]
+
+        self.assertEqual(
+            [stage["id"] for stage in get_ready_stages(stages, set(), set())],
+            ["a", "c"],
+        )
+        self.assertEqual(
+            [stage["id"] for stage in get_ready_stages(stages, {"a"}, {"a", "c"})],
+            ["b"],
+        )
+
+    def test_execute_plan(self):
+        plan_file = self.tmp_dir / "plan.json"
+        save_plan(build_plan(self.create_service(), [1, 2]), plan_file)
+        remuxer = FileRemuxer("/media/image.iso")
+
+        PlanExecutor(remuxer, load_plan(plan_file), "/media/image.iso").run(jobs=3)
+
+        self.assertEqual(
+            sorted(path.name for path in self.tmp_dir.iterdir()),
+            ["TEST_DVD_1.DVDRemux.mkv", "TEST_DVD_2.DVDRemux.mkv", "plan.json"],
+        )
+        self.assertTrue(
+            all(
+                command[command.index("-dvd-device") + 1] == "/media/image.iso"
+                for command in remuxer.commands
+                if command[0] != "mkvmerge"
+            )
+        )
+        self.assertEqual(
+            sorted(command[0] for command in remuxer.commands),
+            ["mencoder", "mkvmerge", "mkvmerge", "mplayer", "mplayer"],
+        )
+
+    def test_execute_plan_failed_stage(self):
+        plan = build_plan(self.create_service(), [1])
+        remuxer = DVDRemuxerTest(".")
+
+        with self.assertRaises(Exception) as cm:
+            PlanExecutor(remuxer, plan).run(jobs=2)
+
+        # the tools of the test remuxer write nothing
+        self.assertIn("title1/stream", str(cm.exception))
+        self.assertIn("title1/merge", str(cm.exception))
+
+    def test_execute_plan_failed_merge(self):
+        plan = build_plan(self.create_service(), [2])
+        remuxer = FileRemuxer(".")
+        run = remuxer._subprocess_run
+        # mkvmerge writes a part of the output and fails
+        remuxer._subprocess_run = lambda cmd, **kwargs: run(cmd) or (
+            2 if cmd[0] == "mkvmerge" else 0
+        )
+
+        with self.assertRaises(Exception) as cm:
+            PlanExecutor(remuxer, plan).run()
+
+        self.assertIn("title2/merge", str(cm.exception))
+        self.assertFalse((self.tmp_dir / "TEST_DVD_2.DVDRemux.mkv").exists())
+
+    def test_execute_plan_failed_stream(self):
+        plan = build_plan(self.create_service(), [2])
+        remuxer = FileRemuxer(".")
+        run = remuxer._subprocess_run
+        # mplayer stops on a read error after a part of the stream
+        remuxer._subprocess_run = lambda cmd, **kwargs: run(cmd) or (
+            1 if cmd[0] == "mplayer" else 0
+        )
+
+        with self.assertRaises(Exception) as cm:
+            PlanExecutor(remuxer, plan).run()
+
+        self.assertIn("title2/stream", str(cm.exception))
+        self.assertNotIn("mkvmerge", [cmd[0] for cmd in remuxer.commands])
+
+    def test_execute_plan_dry_run(self):
+        plan = build_plan(self.create_service(), [1])
+        remuxer = DVDRemuxerTest(".", dry_run=True)
+
+        self.assertEqual(
+            PlanExecutor(remuxer, plan).run(),
+            [stage["id"] for stage in plan["stages"]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
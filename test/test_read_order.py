@@ -0,0 +1,95 @@
+import unittest
+
+from dvd_remuxer.disc import SECTOR_SIZE, Cell, Title
+from dvd_remuxer.read_order import (
+    estimate_seeks,
+    get_position,
+    group_adjacent,
+    order_titles,
+)
+
+
+def title(ix: int, *ranges, vts: int = 1, vts_sector: int = None) -> Title:
+    cells = [
+        Cell(cell_ix, 1.0, first_sector=first, last_sector=last)
+        for cell_ix, (first, last) in enumerate(ranges, start=1)
+    ]
+
+    if vts_sector is None:
+        return Title(ix, 1.0, vts=vts, cell=cells)
+
+    return Title(ix, 1.0, vts=vts, vts_sector=vts_sector, vobs_sector=10, cell=cells)
+
+
+class TestReadOrder(unittest.TestCase):
+    def test_get_position(self):
+        self.assertEqual(get_position(title(1, vts=2), 100), (2, 100))
+        self.assertEqual(get_position(title(1, vts=2, vts_sector=5000), 100), (0, 5110))
+
+    def test_order_titles(self):
+        titles = [
+            title(1, (2000, 2999)),
+            title(2, (0, 999), vts=2),
+            Title(3, 1.0),
+            title(4, (3000, 3999), (1000, 1999)),
+        ]
+
+        # the title sets follow each other on the disc
+        self.assertListEqual([title.ix for title in order_titles(titles)], [4, 1, 2, 3])
+
+    def test_order_titles_disc_sectors(self):
+        titles = [
+            title(1, (0, 999), vts=1, vts_sector=1000),
+            title(2, (0, 999), vts=2, vts_sector=100),
+            title(3, (500, 999), vts=1, vts_sector=1000),
+        ]
+
+        self.assertListEqual([title.ix for title in order_titles(titles)], [2, 1, 3])
+
+    def test_group_adjacent(self):
+        titles = [
+            title(1, (0, 999)),
+            title(2, (1000, 1999)),
+            title(3, (1500, 1599)),
+            title(4, (100000, 100999)),
+            title(5, (101000, 101999), vts=2),
+            Title(6, 1.0),
+        ]
+
+        self.assertListEqual(
+            [[title.ix for title in group] for group in group_adjacent(titles)],
+            [[1, 2, 3], [4], [5], [6]],
+        )
+
+    def test_group_adjacent_backwards(self):
+        titles = [
+            title(1, (100000, 100999)),
+            title(2, (0, 999)),
+            title(3, (98000, 99999)),
+            title(4, (101000, 101999)),
+        ]
+
+        # a title far before the group starts a new one
+        self.assertListEqual(
+            [[title.ix for title in group] for group in group_adjacent(titles)],
+            [[1], [2], [3, 4]],
+        )
+
+    def test_estimate_seeks(self):
+        first = title(1, (0, 999))
+        second = title(2, (1000, 1999))
+        third = title(3, (5000, 5999))
+
+        self.assertEqual(
+            estimate_seeks([first, second, third]), (1, 3000 * SECTOR_SIZE)
+        )
+        self.assertEqual(
+            estimate_seeks([third, first, second]), (1, 6000 * SECTOR_SIZE)
+        )
+        self.assertEqual(
+            estimate_seeks([second, third, first]), (2, 9000 * SECTOR_SIZE)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,17 @@
+import io
+import os
 import unittest
+from contextlib import redirect_stdout
+from unittest import mock
 
-from dvd_remuxer.remux_service import RemuxService
+from dvd_remuxer.remux_service import (
+    RemuxService,
+    _run_title_group_job,
+    _run_title_job,
+)
+from dvd_remuxer.disc import Cell
 from dvd_remuxer.lsdvd import lsdvd
+from dvd_remuxer.tools import TOOLS_DIR_ENV
 from .dvdremux_test import DVDRemuxerTest
 from .lsdvd_test import lsdvd_test
 
@@ -109,13 +119,72 @@ class TestRemuxService(unittest.TestCase):
         remux_service.run()
         self.assertListEqual(remux_service._get_titles(), [1, 2, 3])
 
+    def test_get_titles_main_feature(self):
+        args = Args(dvd=".", main_feature=True)
+        remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+
+        with redirect_stdout(io.StringIO()):
+            self.assertListEqual(remux_service._get_titles(), [1])
+
+    def test_get_titles_dedup(self):
+        args = Args(dvd=".", all_titles=True, dedup=True)
+        remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+
+        for track, (first, last) in zip(
+            remux_service.lsdvd.track, [(0, 999), (1000, 1999), (1500, 1599)]
+        ):
+            track.vts = 1
+            track.cell = [Cell(1, track.length, first_sector=first, last_sector=last)]
+
+        with redirect_stdout(io.StringIO()) as output:
+            titles_idx = remux_service._get_titles()
+
+        self.assertListEqual(titles_idx, [1, 2])
+        self.assertIn("skip title #3: cells contained in title #2", output.getvalue())
+
+    def test_get_titles_sector_order(self):
+        args = Args(dvd=".", title_idx=[1, 2, 3], sector_order=True, verbose=True)
+        remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+
+        for track, (first, last) in zip(
+            remux_service.lsdvd.track, [(5000, 5999), (0, 999), (1000, 1999)]
+        ):
+            track.vts = 1
+            track.cell = [Cell(1, track.length, first_sector=first, last_sector=last)]
+
+        with redirect_stdout(io.StringIO()) as output:
+            titles_idx = remux_service._get_titles()
+
+        self.assertListEqual(titles_idx, [2, 3, 1])
+        self.assertIn("sector order: 1 seeks over 5.9 MiB", output.getvalue())
+
+    def test_get_title_groups(self):
+        args = Args(dvd=".", merge_reads=True)
+        remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+
+        for track, (first, last) in zip(
+            remux_service.lsdvd.track, [(0, 999), (1000, 1999), (500000, 500999)]
+        ):
+            track.vts = 1
+            track.cell = [Cell(1, track.length, first_sector=first, last_sector=last)]
+
+        self.assertListEqual(
+            remux_service._get_title_groups([1, 2, 3, 4]), [[1, 2], [3], [4]]
+        )
+
     def test_run_dvd_info(self):
         args = Args(dvd=".", info=True)
 
-        with self.assertRaises(SystemExit) as cm:
-            RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+        with mock.patch.object(
+            lsdvd_test, "get_printable_dvd_info"
+        ) as get_printable_dvd_info, redirect_stdout(io.StringIO()) as output:
+            with self.assertRaises(SystemExit) as cm:
+                RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
 
         self.assertEqual(cm.exception.code, 0)
+        # printed from the parsed info, lsdvd is not run again
+        get_printable_dvd_info.assert_not_called()
+        self.assertIn("Disc Title: TEST_DVD", output.getvalue())
 
     def test_add_sub_langcode(self):
         args = Args(dvd=".", add_sub_langcode=["jp", "fr"])
@@ -123,6 +192,15 @@ class TestRemuxService(unittest.TestCase):
         remux_service.run()
         self.assertListEqual(remux_service.langcodes, ["ru", "en", "jp", "fr"])
 
+    def test_tools_dir(self):
+        args = Args(dvd=".", tools_dir="/opt/dvd-tools")
+        with mock.patch.dict(os.environ, clear=True):
+            remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+            remuxer = remux_service._create_remuxer()
+
+            self.assertNotIn(TOOLS_DIR_ENV, os.environ)
+        self.assertEqual(remuxer.tools_dir, "/opt/dvd-tools")
+
     def test_run_verbose(self):
         args = Args(dvd=".", verbose=True)
         RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
@@ -143,6 +221,91 @@ class TestRemuxService(unittest.TestCase):
         RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
         pass
 
+    def test_run_jobs(self):
+        args = Args(dvd=".", all_titles=True, jobs=2)
+        RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+    def test_run_jobs_errors(self):
+        args = Args(dvd=".", title_idx=[1, 5, 2, 6], action="chapters", jobs=2)
+
+        with self.assertRaises(Exception) as cm:
+            RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+        self.assertEqual(str(cm.exception), "Failed titles: #5, #6")
+
+    def test_run_jobs_merge_reads(self):
+        args = Args(
+            dvd=".", title_idx=[1, 5, 2], action="chapters", jobs=2, merge_reads=True
+        )
+
+        with self.assertRaises(Exception) as cm:
+            RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+        self.assertEqual(str(cm.exception), "Failed titles: #5")
+
+    def test_run_async(self):
+        args = Args(dvd=".", all_titles=True, async_engine=True, jobs=2)
+        RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+    def test_run_async_errors(self):
+        args = Args(dvd=".", title_idx=[1, 5], action="chapters", async_engine=True)
+
+        with self.assertRaises(Exception) as cm:
+            RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+        self.assertEqual(str(cm.exception), "Failed titles: #5")
+
+    def test_run_staging(self):
+        args = Args(dvd=".", all_titles=True, staging=True, jobs=2)
+
+        # small titles fit anywhere
+        with mock.patch(
+            "dvd_remuxer.dvdremux.estimate_title_space", return_value=(1024, 1024)
+        ):
+            remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+            remux_service.run()
+
+        self.assertIsNotNone(remux_service.staging)
+        self.assertTrue(remux_service.staging.pool.shared)
+
+    def test_run_pipeline(self):
+        args = Args(dvd=".", all_titles=True, pipeline=True, verbose=True)
+        RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+    def test_run_title_job(self):
+        args = Args(dvd=".", action="chapters")
+        remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+        idx, output, error, events = _run_title_job(remux_service, 1)
+
+        self.assertEqual(idx, 1)
+        self.assertEqual(output, "dump chapters\n")
+        self.assertIsNone(error)
+
+    def test_run_title_group_job(self):
+        args = Args(dvd=".", action="chapters")
+        remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+        results = _run_title_group_job(remux_service, [1, 5])
+
+        self.assertListEqual([result[0] for result in results], [1, 5])
+        self.assertIsNone(results[0][2])
+        self.assertIsNotNone(results[1][2])
+
+    def test_run_title_group_job_trace(self):
+        args = Args(dvd=".", action="chapters", trace="trace.json")
+        remux_service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+        events = len(remux_service.tracer.events)
+        results = _run_title_group_job(remux_service, [1, 2])
+
+        # each title returns only its own spans
+        self.assertListEqual(
+            [{event["args"].get("title") for event in result[3]} for result in results],
+            [{1}, {2}],
+        )
+        self.assertEqual(
+            sum(len(result[3]) for result in results),
+            len(remux_service.tracer.events) - events,
+        )
+
 
 class Args:
     def __init__(self, **args) -> None:
@@ -161,6 +324,27 @@ class Args:
         self.subs_params = args.get("subs_params")
         self.split_chapters = args.get("split_chapters") or False
         self.add_sub_langcode = args.get("add_sub_langcode")
+        self.native_vobsub = args.get("native_vobsub") or False
+        self.stream_mux = args.get("stream_mux") or False
+        self.jobs = args.get("jobs") or 1
+        self.no_cache = args.get("no_cache") or False
+        self.pipeline = args.get("pipeline") or False
+        self.resume = args.get("resume") or False
+        self.image_first = args.get("image_first") or False
+        self.rescue = args.get("rescue") or False
+        self.recover = args.get("recover") or False
+        self.native_dump = args.get("native_dump") or False
+        self.sub_jobs = args.get("sub_jobs") or 1
+        self.trace = args.get("trace")
+        self.tools_dir = args.get("tools_dir")
+        self.async_engine = args.get("async_engine") or False
+        self.staging = args.get("staging") or False
+        self.dedup = args.get("dedup") or False
+        self.main_feature = args.get("main_feature") or False
+        self.plan = args.get("plan")
+        self.sector_order = args.get("sector_order") or False
+        self.merge_reads = args.get("merge_reads") or False
+        self.execute_plan = args.get("execute_plan")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+import io
+import os
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from dvd_remuxer.disc import SECTOR_SIZE
+from dvd_remuxer.remux_service import RemuxService
+from dvd_remuxer.rescue import BadBlockMap, RescueImager, get_bad_block_map_path
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+from .test_remux_service import Args
+
+
+class DamagedDiscImager(RescueImager):
+    # fails on the bad sectors, takes long on the slow ones
+    def __init__(self, device, outfile, bad_blocks, bad=(), slow=(), **options):
+        super().__init__(device, outfile, bad_blocks, **options)
+        self.bad = set(bad)
+        self.slow = set(slow)
+        self.read_sectors = []
+
+    def _pread(self, fd: int, length: int, position: int) -> bytes:
+        sectors = range(position // SECTOR_SIZE, (position + length) // SECTOR_SIZE)
+        self.read_sectors += sectors
+
+        if self.bad.intersection(sectors):
+            raise OSError(5, "Input/output error")
+
+        if self.slow.intersection(sectors):
+            time.sleep(0.02)
+
+        return super()._pread(fd, length, position)
+
+
+class TestRescue(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.disc = self.tmp_dir / "disc"
+        self.disc.write_bytes(
+            b"".join(bytes([sector + 1]) * SECTOR_SIZE for sector in range(40))
+        )
+        self.image = self.tmp_dir / "disc.iso"
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def create_imager(self, bad_blocks: BadBlockMap, **options) -> RescueImager:
+        return DamagedDiscImager(
+            str(self.disc), self.image, bad_blocks, block_sectors=2, **options
+        )
+
+    def read_image_sectors(self) -> list:
+        data = self.image.read_bytes()
+        return [data[pos] for pos in range(0, len(data), SECTOR_SIZE)]
+
+    def test_bad_block_map(self):
+        bad_blocks = BadBlockMap(ranges=[[10, 5], [30, 2]])
+
+        bad_blocks.add(15, 3)
+        bad_blocks.add(0, 2)
+        self.assertEqual(bad_blocks.ranges, [[0, 2], [10, 8], [30, 2]])
+
+        bad_blocks.remove(12, 2)
+        bad_blocks.remove(30, 5)
+        self.assertEqual(bad_blocks.ranges, [[0, 2], [10, 2], [14, 4]])
+        self.assertEqual(bad_blocks.sectors, 8)
+        self.assertEqual(bad_blocks.find(11, 4), [[10, 2], [14, 4]])
+        self.assertEqual(bad_blocks.find(2, 8), [])
+
+    def test_bad_block_map_save(self):
+        path = self.tmp_dir / "badblocks" / "disc.json"
+        bad_blocks = BadBlockMap.load(path)
+        bad_blocks.add(100, 32)
+        bad_blocks.save()
+
+        self.assertEqual(BadBlockMap.load(path).ranges, [[100, 32]])
+
+        path.write_text("{")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(BadBlockMap.load(path).ranges, [])
+
+    def test_get_bad_block_map_path(self):
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": "/cache"}):
+            self.assertEqual(
+                get_bad_block_map_path("abc"),
+                Path("/cache/dvdremuxer/badblocks/abc.json"),
+            )
+
+    def test_run_skips_in_growing_steps(self):
+        bad_blocks = BadBlockMap()
+        imager = self.create_imager(bad_blocks, bad={4, 6, 10})
+
+        with redirect_stdout(io.StringIO()):
+            imager.run()
+
+        sectors = self.read_image_sectors()
+        self.assertEqual(len(sectors), 40)
+        # 2 sectors skipped at 4, 4 at 6 and 8 at 10
+        self.assertEqual(bad_blocks.ranges, [[4, 14]])
+        self.assertEqual(sectors[3:5], [4, 0])
+        self.assertEqual(sectors[17:19], [0, 19])
+        self.assertEqual(sectors[-1], 40)
+
+    def test_run_stalled_read(self):
+        bad_blocks = BadBlockMap()
+        imager = self.create_imager(bad_blocks, slow={2}, stall_seconds=0.01)
+
+        with redirect_stdout(io.StringIO()):
+            imager.run()
+
+        # the slow block is kept, the area after it is skipped
+        self.assertEqual(bad_blocks.ranges, [[4, 2]])
+        self.assertEqual(self.read_image_sectors()[1:7], [2, 3, 4, 0, 0, 7])
+
+    def test_run_skips_known_bad_blocks(self):
+        bad_blocks = BadBlockMap(ranges=[[5, 10]])
+        imager = self.create_imager(bad_blocks)
+
+        with redirect_stdout(io.StringIO()):
+            imager.run()
+
+        self.assertFalse(set(range(5, 15)).intersection(imager.read_sectors))
+        self.assertEqual(self.read_image_sectors()[4:16], [5] + [0] * 10 + [16])
+        self.assertEqual(bad_blocks.ranges, [[5, 10]])
+
+    def test_run_interrupted_and_resumed(self):
+        bad_blocks = BadBlockMap()
+        imager = self.create_imager(bad_blocks, bad={4})
+        part = self.image.with_name(self.image.name + ".part")
+        read = imager._read
+
+        def interrupt(fd: int, position: int, length: int, retries: int = None):
+            if position >= 20 * SECTOR_SIZE:
+                raise KeyboardInterrupt()
+            return read(fd, position, length, retries)
+
+        imager._read = interrupt
+
+        with redirect_stdout(io.StringIO()), self.assertRaises(KeyboardInterrupt):
+            imager.run()
+
+        self.assertEqual(part.stat().st_size, 20 * SECTOR_SIZE)
+        self.assertFalse(self.image.exists())
+
+        imager = self.create_imager(bad_blocks)
+
+        with redirect_stdout(io.StringIO()) as output:
+            imager.run()
+
+        self.assertIn("resume %s at sector 20 of 40" % (part), output.getvalue())
+        self.assertEqual(min(imager.read_sectors), 20)
+        self.assertFalse(part.exists())
+        self.assertEqual(
+            self.read_image_sectors(), [1, 2, 3, 4, 0, 0] + list(range(7, 41))
+        )
+
+    def test_run_interrupted_without_resume(self):
+        imager = self.create_imager(BadBlockMap(), resume=False)
+        imager._read = mock.MagicMock(side_effect=KeyboardInterrupt())
+
+        with redirect_stdout(io.StringIO()), self.assertRaises(KeyboardInterrupt):
+            imager.run()
+
+        self.assertFalse(self.image.with_name(self.image.name + ".part").exists())
+
+    def test_recover(self):
+        bad_blocks = BadBlockMap(ranges=[[5, 10]])
+
+        with redirect_stdout(io.StringIO()):
+            self.create_imager(bad_blocks).run()
+            recovered = self.create_imager(bad_blocks, bad={7}).recover()
+
+        self.assertEqual(recovered, 9)
+        self.assertEqual(bad_blocks.ranges, [[7, 1]])
+        self.assertEqual(self.read_image_sectors()[4:9], [5, 6, 7, 0, 9])
+
+    def test_service_rescue(self):
+        self.image = self.tmp_dir / "sr0.abc.image.iso"
+        self.image.write_bytes(bytes(SECTOR_SIZE))
+        args = Args(dvd="/dev/sr0", action="chapters", recover=True)
+        service = RemuxService(lsdvd_test, DVDRemuxerTest, args)
+        service.outdir = self.tmp_dir
+
+        with mock.patch(
+            "dvd_remuxer.remux_service.fingerprint", return_value="abc"
+        ), mock.patch("dvd_remuxer.remux_service.RescueImager") as imager_cls:
+            service.run()
+
+        # the image is there, only the bad blocks are read again
+        imager_cls.return_value.run.assert_not_called()
+        imager_cls.return_value.recover.assert_called_once_with()
+        self.assertEqual(imager_cls.call_args[0][2].path, get_bad_block_map_path("abc"))
+        self.assertEqual(args.dvd, str(self.image))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,267 @@
+import io
+import multiprocessing
+import pickle
+import shutil
+import threading
+import time
+import unittest
+from collections import namedtuple
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from dvd_remuxer import staging
+from dvd_remuxer.disc import Cell, Title
+from dvd_remuxer.staging import (
+    GIB,
+    StagingError,
+    StagingPlanner,
+    StagingPool,
+    estimate_title_space,
+    get_staging_name,
+)
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+
+DiskUsage = namedtuple("DiskUsage", ["total", "used", "free"])
+
+
+class TestEstimate(unittest.TestCase):
+    def test_from_cells(self):
+        title = Title(
+            1, 10.0, cell=[Cell(1, 10.0, first_sector=0, last_sector=1023)]
+        )
+
+        self.assertTupleEqual(
+            estimate_title_space(title, 2), (2097152 + 2 * 1048576, 2097152)
+        )
+        self.assertTupleEqual(
+            estimate_title_space(title, 2, stream_mux=True), (2 * 1048576, 2097152)
+        )
+
+    def test_from_length(self):
+        temp_size, output_size = estimate_title_space(Title(1, 3600.0), 0)
+
+        self.assertEqual(output_size, 3600 * 1260000)
+        self.assertEqual(temp_size, output_size)
+
+
+class TestStagingPlanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.outdir = Path(self.tmp_dir_obj.name) / "out"
+        self.tmpfs = Path(self.tmp_dir_obj.name) / "shm"
+        self.outdir.mkdir()
+        self.tmpfs.mkdir()
+        self.free = {self.outdir: 100 * GIB, self.tmpfs: 8 * GIB}
+
+        # tmpfs is device 2, anything else is on the output file system
+        self.devices = {self.outdir: 1, self.tmpfs: 2}
+        patchers = [
+            mock.patch.object(
+                staging, "get_device", lambda path: self.devices.get(path, 1)
+            ),
+            mock.patch.object(
+                shutil,
+                "disk_usage",
+                lambda path: DiskUsage(16 * GIB, 0, self.free[path]),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.planner = StagingPlanner(self.outdir, self.outdir, self.tmpfs)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def reserve(
+        self, title_idx: int, temp_size: int, output_size: int, prefix: str = None
+    ) -> Path:
+        with redirect_stdout(io.StringIO()):
+            return self.planner.reserve(title_idx, temp_size, output_size, prefix)
+
+    def test_tmpfs(self):
+        tmp_dir = self.reserve(1, 2 * GIB, 2 * GIB)
+
+        self.assertEqual(tmp_dir, self.planner.tmpfs_dir)
+        self.assertTrue(tmp_dir.is_dir())
+
+        self.planner.release(1)
+        self.planner.cleanup()
+
+        self.assertFalse(tmp_dir.exists())
+
+    def test_output_file_system(self):
+        # a quarter of tmpfs is left for the system
+        self.assertEqual(self.reserve(1, 5 * GIB, 5 * GIB), self.outdir)
+
+    def test_reservations(self):
+        self.assertEqual(self.reserve(1, 4 * GIB, 4 * GIB), self.planner.tmpfs_dir)
+        self.assertEqual(self.reserve(2, 4 * GIB, 4 * GIB), self.outdir)
+        self.assertDictEqual(
+            {
+                key: value["needs"]
+                for key, value in self.planner.pool.reservations.items()
+            },
+            {(None, 1): {2: 4 * GIB, 1: 4 * GIB}, (None, 2): {1: 8 * GIB}},
+        )
+
+    def test_written_files(self):
+        self.free[self.outdir] = 13 * GIB
+        self.assertEqual(self.reserve(1, 6 * GIB, 6 * GIB, "DVD_1"), self.outdir)
+        self.assertEqual(self.planner.get_available(1), 1 * GIB - staging.DISK_RESERVE)
+
+        # the written files are already missing from the free space
+        for name in ("DVD_1_video.vob", "DVD_1.DVDRemux.mkv", "DVD_10_video.vob"):
+            with (self.outdir / name).open(mode="wb") as f:
+                f.truncate(GIB)
+        self.free[self.outdir] = 11 * GIB
+
+        self.assertEqual(self.planner.get_available(1), 1 * GIB - staging.DISK_RESERVE)
+
+    def test_refuse(self):
+        self.free[self.outdir] = 6 * GIB
+
+        with self.assertRaises(StagingError) as cm:
+            self.reserve(1, 7 * GIB, 7 * GIB)
+
+        self.assertRegex(
+            str(cm.exception), r"^title #1 needs 7\.0 GiB of temp files and 7\.0 GiB"
+        )
+        self.assertDictEqual(self.planner.pool.reservations, {})
+
+    def test_wait_for_free_space(self):
+        self.free[self.outdir] = 13 * GIB
+        self.reserve(1, 6 * GIB, 6 * GIB)
+        result = []
+
+        thread = threading.Thread(
+            target=lambda: result.append(self.reserve(2, 6 * GIB, 6 * GIB))
+        )
+        thread.start()
+        time.sleep(0.1)
+
+        self.assertListEqual(result, [])
+
+        self.planner.release(1)
+        thread.join(5)
+
+        self.assertListEqual(result, [self.outdir])
+
+    def test_pickle(self):
+        self.reserve(1, 1 * GIB, 1 * GIB)
+
+        planner = pickle.loads(pickle.dumps(self.planner))
+
+        self.assertDictEqual(planner.pool.reservations, {})
+        self.assertEqual(planner.tmpfs_dir, self.planner.tmpfs_dir)
+
+    def test_share(self):
+        self.reserve(1, 1 * GIB, 1 * GIB)
+
+        with multiprocessing.Manager() as manager:
+            self.planner.pool.share(manager)
+            # the copy of a worker process
+            planner = pickle.loads(pickle.dumps(self.planner))
+
+            with redirect_stdout(io.StringIO()):
+                planner.reserve(2, 1 * GIB, 1 * GIB)
+            planner.release(1)
+
+            self.assertListEqual(self.planner.pool.reservations.keys(), [(None, 2)])
+            self.assertListEqual(planner.pool.reservations.keys(), [(None, 2)])
+
+    def test_disc_tmpfs_dir(self):
+        self.planner = StagingPlanner(self.outdir, self.outdir, self.tmpfs, "DVD-1")
+        tmp_dir = self.reserve(1, 2 * GIB, 2 * GIB)
+
+        self.assertEqual(tmp_dir.parent.parent, self.tmpfs)
+        self.assertEqual(tmp_dir.name, "DVD-1")
+        self.assertTrue(tmp_dir.is_dir())
+
+        self.planner.release(1)
+        self.planner.cleanup()
+
+        self.assertListEqual(list(self.tmpfs.iterdir()), [])
+
+    def test_shared_pool(self):
+        # two discs with the same label staged at the same time
+        pool = StagingPool()
+        planners = [
+            StagingPlanner(self.outdir, self.outdir, self.tmpfs, name, pool)
+            for name in ("DVD-1", "DVD-2")
+        ]
+
+        with redirect_stdout(io.StringIO()):
+            tmp_dirs = [
+                planner.reserve(1, 4 * GIB, 4 * GIB, "DVD_1") for planner in planners
+            ]
+
+        # the second disc does not get the tmpfs space promised to the first one
+        self.assertEqual(tmp_dirs, [planners[0].tmpfs_dir, self.outdir])
+        self.assertListEqual(list(pool.reservations), [("DVD-1", 1), ("DVD-2", 1)])
+
+        planners[1].release(1)
+
+        self.assertListEqual(list(pool.reservations), [("DVD-1", 1)])
+
+        # the directory of the other disc is kept
+        planners[1].cleanup()
+
+        self.assertTrue(planners[0].tmpfs_dir.is_dir())
+
+    def test_get_staging_name(self):
+        name = get_staging_name("DVD", "/media/a", self.outdir)
+
+        self.assertRegex(name, r"^DVD-[0-9a-f]{8}$")
+        self.assertEqual(name, get_staging_name("DVD", "/media/a", self.outdir))
+        self.assertNotEqual(name, get_staging_name("DVD", "/media/b", self.outdir))
+        self.assertNotEqual(name, get_staging_name("DVD", "/media/a", self.tmpfs))
+
+
+class TestRemuxerStaging(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.planner = mock.MagicMock()
+        self.planner.reserve.return_value = self.tmp_dir
+        self.remuxer = DVDRemuxerTest(
+            ".",
+            lsdvd=lsdvd_test.read("."),
+            file_prefix="TEST_DVD",
+            staging=self.planner,
+        )
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_remux_to_mkv(self):
+        with redirect_stdout(io.StringIO()):
+            job = self.remuxer.prepare_remux(1, [[1, "en"]], [[1, "en"]], Path("."))
+
+        self.planner.reserve.assert_called_once_with(
+            1, 3600 * 1260000 + 45360000, 3600 * 1260000, "TEST_DVD_1"
+        )
+        self.assertIn(self.tmp_dir / "TEST_DVD_1_video.vob", job.mkvmerge_cmd)
+        self.assertEqual(job.temp_files[0].parent, self.tmp_dir)
+
+        with redirect_stdout(io.StringIO()):
+            self.remuxer.merge_remux(job)
+
+        self.planner.release.assert_called_once_with(1)
+        self.assertDictEqual(self.remuxer.title_tmp_dirs, {})
+
+    def test_failed_dump(self):
+        self.remuxer.dumpstream = mock.MagicMock(side_effect=Exception("no disc"))
+
+        with redirect_stdout(io.StringIO()), self.assertRaises(Exception):
+            self.remuxer.prepare_remux(1, [[1, "en"]], [], Path("."))
+
+        self.planner.release.assert_called_once_with(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from dvd_remuxer.tools import TOOLS_DIR_ENV, get_tool_path, resolve_cmd
+
+
+class TestTools(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.tools_dir = Path(self.tmp_dir.name)
+
+        tool = self.tools_dir / "mkvmerge"
+        tool.write_text("#!/bin/sh\n")
+        tool.chmod(0o755)
+
+        # not executable
+        (self.tools_dir / "mplayer").write_text("#!/bin/sh\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_tool_path(self):
+        with mock.patch.dict(os.environ, {TOOLS_DIR_ENV: str(self.tools_dir)}):
+            self.assertEqual(
+                get_tool_path("mkvmerge"), str(self.tools_dir / "mkvmerge")
+            )
+            self.assertEqual(get_tool_path("mplayer"), "mplayer")
+            self.assertEqual(get_tool_path("mencoder"), "mencoder")
+
+    def test_get_tool_path_without_tools_dir(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertEqual(get_tool_path("mkvmerge"), "mkvmerge")
+
+    def test_get_tool_path_tools_dir_over_env(self):
+        with mock.patch.dict(os.environ, {TOOLS_DIR_ENV: "/nonexistent"}):
+            self.assertEqual(
+                get_tool_path("mkvmerge", str(self.tools_dir)),
+                str(self.tools_dir.resolve() / "mkvmerge"),
+            )
+            self.assertEqual(get_tool_path("mkvmerge"), "mkvmerge")
+
+    def test_resolve_cmd(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertListEqual(
+                resolve_cmd(["mkvmerge", "--output", "mkvmerge"], str(self.tools_dir)),
+                [str(self.tools_dir.resolve() / "mkvmerge"), "--output", "mkvmerge"],
+            )
+            self.assertNotIn(TOOLS_DIR_ENV, os.environ)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import json
+import pickle
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from dvd_remuxer.remux_service import RemuxService
+from dvd_remuxer.trace import Tracer, files_size
+from .dvdremux_test import DVDRemuxerTest
+from .lsdvd_test import lsdvd_test
+from .test_remux_service import Args
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.trace_file = self.tmp_dir / "trace.json"
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_span(self):
+        tracer = Tracer(str(self.trace_file))
+        outfile = self.tmp_dir / "TEST_DVD_1_video.vob"
+
+        with tracer.span("stream", "title #1", [outfile], title=1):
+            outfile.write_bytes(b"\x00" * 4096)
+
+        event = tracer.events[0]
+        self.assertEqual(event["name"], "stream")
+        self.assertEqual(event["cat"], "title #1")
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"]["title"], 1)
+        self.assertEqual(event["args"]["bytes_written"], 4096)
+        self.assertIn("children_user_seconds", event["args"])
+        self.assertIn("mib_per_second", event["args"])
+
+    def test_span_with_error(self):
+        tracer = Tracer(str(self.trace_file))
+
+        with self.assertRaises(ValueError):
+            with tracer.span("merge", "title #1"):
+                raise ValueError()
+
+        self.assertEqual(len(tracer.events), 1)
+        self.assertNotIn("bytes_written", tracer.events[0]["args"])
+
+    def test_disabled(self):
+        tracer = Tracer()
+
+        with tracer.span("stream", "title #1"):
+            pass
+
+        tracer.save()
+
+        self.assertListEqual(tracer.events, [])
+
+    def test_save(self):
+        tracer = Tracer(str(self.trace_file))
+
+        with tracer.span("chapters", "title #1"):
+            pass
+
+        tracer.save()
+
+        data = json.loads(self.trace_file.read_text())
+        self.assertEqual(data["traceEvents"][0]["name"], "chapters")
+
+    def test_pickle(self):
+        tracer = Tracer(str(self.trace_file))
+
+        with tracer.span("chapters", "title #1"):
+            pass
+
+        copy = pickle.loads(pickle.dumps(tracer))
+
+        self.assertEqual(copy.path, tracer.path)
+        self.assertListEqual(copy.events, [])
+
+    def test_files_size(self):
+        outfile = self.tmp_dir / "file"
+        outfile.write_bytes(b"\x00" * 10)
+
+        self.assertEqual(files_size([outfile, self.tmp_dir / "missing"]), 10)
+
+
+class TestRemuxTrace(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.trace_file = Path(self.tmp_dir_obj.name) / "trace.json"
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_trace_stages(self):
+        args = Args(dvd=".", title_idx=[1], trace=str(self.trace_file))
+        RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+        events = json.loads(self.trace_file.read_text())["traceEvents"]
+
+        self.assertListEqual(
+            [event["name"] for event in events],
+            [
+                "read DVD info",
+                "stream",
+                "vobsub_1_ru",
+                "chapters",
+                "merge",
+            ],
+        )
+        self.assertEqual(events[1]["args"]["title"], 1)
+
+    def test_trace_jobs(self):
+        args = Args(
+            dvd=".",
+            title_idx=[1, 2],
+            action="chapters",
+            jobs=2,
+            trace=str(self.trace_file),
+        )
+        RemuxService(lsdvd_test, DVDRemuxerTest, args).run()
+
+        events = json.loads(self.trace_file.read_text())["traceEvents"]
+
+        self.assertListEqual(
+            sorted(event["cat"] for event in events), ["disc", "title #1", "title #2"]
+        )
@@ -0,0 +1,227 @@
+import errno
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+from dvd_remuxer import ifo, vobcopy
+from dvd_remuxer.disc import Cell, Disc, Title
+from dvd_remuxer.dvdremux import DVDRemuxer
+from dvd_remuxer.vobcopy import VobCopier, VobCopyError, is_scrambled
+from .ifo_test import (
+    build_vob,
+    build_vob_sector,
+    create_iso,
+    create_video_ts,
+    create_vobs,
+    title_sectors,
+)
+
+
+def angle_cell(ix: int, block_mode: int, first_sector: int, last_sector: int) -> Cell:
+    return Cell(
+        ix,
+        1.0,
+        block_mode=block_mode,
+        block_type=1,
+        first_sector=first_sector,
+        last_sector=last_sector,
+    )
+
+
+class TestVobCopierBase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.outfile = self.tmp_dir / "TEST_DVD_1_video.vob"
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def create_video_ts(self) -> ifo.VideoTsDirectory:
+        video_ts = create_video_ts(self.tmp_dir)
+        create_vobs(video_ts)
+
+        return ifo.open_video_ts(str(self.tmp_dir))
+
+
+class TestVobCopier(TestVobCopierBase):
+    def test_copy_video_ts(self):
+        source = self.create_video_ts()
+        disc = Disc.from_dict(ifo.read_dvd_info(source, str(self.tmp_dir)))
+
+        copier = VobCopier(source, disc.track[0])
+        copier.copy(self.outfile)
+
+        # the cells of the title span VTS_01_1.VOB and VTS_01_2.VOB
+        self.assertEqual(len(copier.ranges), 2)
+        self.assertEqual(copier.size, disc.track[0].dump_size)
+        self.assertEqual(self.outfile.read_bytes(), build_vob(0, title_sectors()))
+
+    def test_copy_iso(self):
+        source = ifo.open_video_ts(str(create_iso(self.tmp_dir, with_vobs=True)))
+        disc = Disc.from_dict(ifo.read_dvd_info(source, "TEST_DVD.iso"))
+
+        try:
+            VobCopier(source, disc.track[0]).copy(self.outfile)
+        finally:
+            source.close()
+
+        self.assertEqual(self.outfile.read_bytes(), build_vob(0, title_sectors()))
+
+    def test_copy_cells(self):
+        source = self.create_video_ts()
+        title = Title(
+            1,
+            3.0,
+            vts=1,
+            cell=[
+                Cell(1, 1.0, first_sector=0, last_sector=9),
+                Cell(2, 1.0, first_sector=10, last_sector=19),
+                Cell(3, 1.0, first_sector=40, last_sector=49),
+            ],
+        )
+
+        copier = VobCopier(source, title)
+        copier.copy(self.outfile)
+
+        self.assertEqual(len(copier.ranges), 2)
+        self.assertEqual(
+            self.outfile.read_bytes(), build_vob(0, 20) + build_vob(40, 10)
+        )
+
+    def test_interleaved_angle_block(self):
+        source = self.create_video_ts()
+        title = Title(
+            1,
+            3.0,
+            vts=1,
+            cell=[
+                Cell(1, 1.0, first_sector=0, last_sector=9),
+                # the units of two angles alternate in sectors 10-29, the cell
+                # of the first angle covers the units of the second one too
+                angle_cell(2, 1, 10, 27),
+                angle_cell(3, 3, 12, 29),
+                Cell(4, 1.0, first_sector=30, last_sector=39),
+            ],
+        )
+
+        with self.assertRaisesRegex(VobCopyError, "has several angles"):
+            VobCopier(source, title)
+
+    def test_several_angles(self):
+        source = self.create_video_ts()
+        title = Title(
+            1, 1.0, vts=1, angles=2, cell=[Cell(1, 1.0, first_sector=0, last_sector=9)]
+        )
+
+        with self.assertRaisesRegex(VobCopyError, "has several angles"):
+            VobCopier(source, title)
+
+    def test_cell_out_of_vob_files(self):
+        source = self.create_video_ts()
+        title = Title(
+            1, 1.0, vts=1, cell=[Cell(1, 1.0, first_sector=0, last_sector=10000)]
+        )
+
+        with self.assertRaisesRegex(VobCopyError, "out of the VOB files"):
+            VobCopier(source, title)
+
+    def test_no_cells(self):
+        with self.assertRaisesRegex(VobCopyError, "no cell address table"):
+            VobCopier(self.create_video_ts(), Title(2, 1.0, vts=1))
+
+    def test_no_vob_files(self):
+        source = ifo.open_video_ts(str(create_video_ts(self.tmp_dir)))
+        title = Title(1, 1.0, vts=1, cell=[Cell(1, 1.0, first_sector=0, last_sector=1)])
+
+        with self.assertRaisesRegex(VobCopyError, "VOB files of title set 1"):
+            VobCopier(source, title)
+
+    def test_copy_with_buffer(self):
+        source = self.create_video_ts()
+        disc = Disc.from_dict(ifo.read_dvd_info(source, str(self.tmp_dir)))
+
+        with patch.object(
+            vobcopy.os, "copy_file_range", side_effect=OSError(errno.EXDEV, "")
+        ), patch.object(vobcopy.os, "sendfile", side_effect=OSError(errno.EINVAL, "")):
+            VobCopier(source, disc.track[0]).copy(self.outfile)
+
+        self.assertEqual(self.outfile.read_bytes(), build_vob(0, title_sectors()))
+
+
+class TestIsScrambled(unittest.TestCase):
+    def test_is_scrambled(self):
+        self.assertFalse(is_scrambled(build_vob_sector(1)))
+        self.assertTrue(is_scrambled(build_vob_sector(1, scrambled=True)))
+
+    def test_not_a_pack(self):
+        self.assertFalse(is_scrambled(b"\x00" * 2048))
+
+
+class TestNativeDumpstream(TestVobCopierBase):
+    def create_remuxer(self) -> DVDRemuxer:
+        self.create_video_ts()
+
+        remuxer = DVDRemuxer(
+            str(self.tmp_dir),
+            lsdvd=Disc.from_dict(ifo.read(str(self.tmp_dir))),
+            dry_run=False,
+            rewrite=False,
+            use_sys_tmp_dir=False,
+            tmp_dir=self.tmp_dir,
+            verbose=False,
+            file_prefix="TEST_DVD",
+            native_dump=True,
+        )
+        remuxer._perform_dumpstream = MagicMock()
+
+        return remuxer
+
+    def test_native_dumpstream(self):
+        remuxer = self.create_remuxer()
+
+        self.assertEqual(remuxer.dumpstream(1, self.tmp_dir), self.outfile)
+
+        remuxer._perform_dumpstream.assert_not_called()
+        self.assertEqual(self.outfile.read_bytes(), build_vob(0, title_sectors()))
+
+    def test_fallback_to_mplayer_when_scrambled(self):
+        remuxer = self.create_remuxer()
+        vob_file = self.tmp_dir / "VIDEO_TS" / "VTS_01_1.VOB"
+        vob_file.write_bytes(
+            build_vob_sector(0, scrambled=True) + vob_file.read_bytes()[2048:]
+        )
+
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_called_once()
+        self.assertFalse(self.outfile.exists())
+
+    def test_fallback_to_mplayer_with_angles(self):
+        remuxer = self.create_remuxer()
+        remuxer.lsdvd.track[0].cell[1:] = [
+            angle_cell(2, 1, 10, 27),
+            angle_cell(3, 3, 12, 29),
+        ]
+
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_called_once()
+        self.assertFalse(self.outfile.exists())
+
+    def test_fallback_to_mplayer_without_cells(self):
+        remuxer = self.create_remuxer()
+
+        remuxer.dumpstream(2, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_called_once()
+
+    def test_dry_run(self):
+        remuxer = self.create_remuxer()
+        remuxer.dry_run = True
+
+        remuxer.dumpstream(1, self.tmp_dir)
+
+        remuxer._perform_dumpstream.assert_not_called()
+        self.assertFalse(self.outfile.exists())
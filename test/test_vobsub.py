@@ -0,0 +1,98 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from benchmarks.discgen import gen_pes, pack_header
+from dvd_remuxer import vobsub
+from dvd_remuxer.vobsub import VobSubDemuxer, VobSubWriter
+
+
+def make_sector(pes: bytes) -> bytes:
+    return vobsub.pad_to_sector(pack_header(), pes)
+
+
+def make_vob() -> bytes:
+    return b"".join(
+        [
+            make_sector(gen_pes(0xE0, b"\x00" * 100, pts=90000)),
+            make_sector(gen_pes(0xBD, b"\x20" + b"A" * 50, pts=180000)),
+            make_sector(gen_pes(0xBD, b"\x20" + b"B" * 50)),
+            make_sector(gen_pes(0xBD, b"\x21" + b"C" * 50, pts=270000)),
+            make_sector(gen_pes(0xBD, b"\x80" + b"D" * 50, pts=270000)),
+            make_sector(gen_pes(0xC0, b"\x00" * 50, pts=360000)),
+        ]
+    )
+
+
+class TestVobSub(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp_dir_obj.name)
+        self.vob_file = self.tmp_dir / "title_video.vob"
+        self.vob_file.write_bytes(make_vob())
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def create_writer(self, name: str, langcode: str, index: int) -> VobSubWriter:
+        return VobSubWriter(
+            self.tmp_dir / (name + ".idx"),
+            self.tmp_dir / (name + ".sub"),
+            langcode,
+            index,
+        )
+
+    def test_demux(self):
+        writer_ru = self.create_writer("ru", "ru", 1)
+        writer_en = self.create_writer("en", "en", 2)
+
+        VobSubDemuxer({0x20: writer_ru, 0x21: writer_en}).demux(self.vob_file)
+
+        self.assertEqual(writer_ru.outfile_sub.stat().st_size, 2 * vobsub.SECTOR_SIZE)
+        self.assertEqual(writer_en.outfile_sub.stat().st_size, vobsub.SECTOR_SIZE)
+        self.assertListEqual(writer_ru.timestamps, [(90000, 0)])
+        self.assertListEqual(writer_en.timestamps, [(180000, 0)])
+
+        idx_content = writer_ru.outfile_idx.read_text()
+        self.assertIn("id: ru, index: 1\n", idx_content)
+        self.assertIn("timestamp: 00:00:01:000, filepos: 000000000\n", idx_content)
+
+        idx_content = writer_en.outfile_idx.read_text()
+        self.assertIn("id: en, index: 2\n", idx_content)
+        self.assertIn("timestamp: 00:00:02:000, filepos: 000000000\n", idx_content)
+
+    def test_demux_sub_content(self):
+        writer = self.create_writer("ru", "ru", 1)
+
+        VobSubDemuxer({0x20: writer}).demux(self.vob_file)
+
+        content = writer.outfile_sub.read_bytes()
+        self.assertIn(b"A" * 50, content[: vobsub.SECTOR_SIZE])
+        self.assertIn(b"B" * 50, content[vobsub.SECTOR_SIZE :])
+        self.assertNotIn(b"C" * 50, content)
+
+    def test_parse_pes_pts(self):
+        pes = gen_pes(0xBD, b"\x20", pts=123456789)
+        self.assertEqual(vobsub.parse_pes_pts(pes), 123456789)
+
+    def test_parse_pes_pts_without_pts(self):
+        self.assertIsNone(vobsub.parse_pes_pts(gen_pes(0xBD, b"\x20" * 10)))
+
+    def test_pad_to_sector(self):
+        sector = make_sector(gen_pes(0xBD, b"\x20"))
+        self.assertEqual(len(sector), vobsub.SECTOR_SIZE)
+
+    def test_format_timestamp(self):
+        self.assertEqual(vobsub.format_timestamp(90000 * 3723 + 45000), "01:02:03:500")
+
+    def test_ycrcb_to_rgb(self):
+        self.assertEqual(vobsub.ycrcb_to_rgb(0x108080), 0x101010)
+        self.assertEqual(vobsub.ycrcb_to_rgb(0xEB8080), 0xEBEBEB)
+
+    def test_convert_palette(self):
+        self.assertListEqual(vobsub.convert_palette(["0x108080"]), [0x101010])
+        self.assertListEqual(vobsub.convert_palette(None), vobsub.default_palette)
+
+
+if __name__ == "__main__":
+    unittest.main()